@@ -1,29 +1,27 @@
 """The C3 integration."""
 from __future__ import annotations
 
-# from datetime import timedelta
 import logging
+from datetime import timedelta
 
 import voluptuous as vol
-from c3.consts import C3_PORT_DEFAULT
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PASSWORD, CONF_PORT
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-
-# from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.start import async_at_started
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 
 from .const import (
+    C3_PORT_DEFAULT,
     DATA_DISCOVERY_INTERVAL,
     DATA_DISCOVERY_SERVICE,
+    DISCOVERY_SCAN_INTERVAL,
     DOMAIN,
     SUPPORTED_PLATFORMS,
 )
-from .coordinator import C3Coordinator
-
-# from homeassistant.components.network import async_get_ipv4_broadcast_addresses
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -53,29 +51,51 @@ def setup_platform(
 
 
 async def async_setup(hass: HomeAssistant, config_entry: ConfigType) -> bool:
-    """Set up the C3 panel platform."""
+    """Set up the C3 panel platform.
+
+    The c3 library, the coordinator and the network component are imported when
+    they are first used, to keep them out of the Home Assistant startup.
+    """
+    hass.data.setdefault(DOMAIN, {})
+
+    async def _async_start_discovery(_: HomeAssistant) -> None:
+        # pylint: disable-next=import-outside-toplevel
+        from .discovery import C3DiscoveryService
+
+        # Setup C3 discovery to automatically find panels
+        c3_discovery = C3DiscoveryService(hass)
+        hass.data[DOMAIN][DATA_DISCOVERY_SERVICE] = c3_discovery
+
+        async def _async_scan_update(_=None) -> None:
+            _LOGGER.debug("Scanning network for ZKAccess C3 devices")
+            await c3_discovery.async_scan()
+
+        hass.async_create_background_task(_async_scan_update(), f"{DOMAIN} discovery")
+        hass.data[DOMAIN][DATA_DISCOVERY_INTERVAL] = async_track_time_interval(
+            hass,
+            _async_scan_update,
+            timedelta(seconds=DISCOVERY_SCAN_INTERVAL),
+            cancel_on_shutdown=True,
+        )
+
+    async_at_started(hass, _async_start_discovery)
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
-    """Set up C3 from a config entry."""
-    hass.data.setdefault(DOMAIN, {})
+    """Set up C3 from a config entry.
 
-    # # Setup C3 discovery to automatically add devices
-    # c3_discovery = C3DiscoveryService(hass)
-    # hass.data[DOMAIN][DATA_DISCOVERY_SERVICE] = c3_discovery
-    #
-    # await hass.config_entries.async_forward_entry_setups(config_entry, SUPPORTED_PLATFORMS)
-    #
-    # #def _async_scan_update(_=None):
-    #     c3_discovery.scan()
-    #
-    # _LOGGER.debug("Scanning network for ZKAccess C3 devices")
-    # await _async_scan_update()
-    #
-    # hass.data[DOMAIN][DATA_DISCOVERY_INTERVAL] = async_track_time_interval(
-    #     hass, _async_scan_update, timedelta(seconds=DISCOVERY_SCAN_INTERVAL)
-    # )
+    The platforms are set up right away, the first refresh drains the RT log of
+    the panel in the background. The entities are unavailable until it completes.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from .coordinator import C3Coordinator
+
+    # pylint: disable-next=import-outside-toplevel
+    from .services import async_setup_services
+
+    hass.data.setdefault(DOMAIN, {})
+    async_setup_services(hass)
 
     c3_coordinator = C3Coordinator(
         hass,
@@ -85,37 +105,38 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
         config_entry.data.get(CONF_PASSWORD, ""),
     )
 
-    # Fetch first data before creating entity entries
-    await c3_coordinator.async_config_entry_first_refresh()
-
+    await c3_coordinator.async_setup()
     await hass.config_entries.async_forward_entry_setups(
         config_entry, SUPPORTED_PLATFORMS
     )
-    config_entry.async_on_unload(config_entry.add_update_listener(async_reload_entry))
+    config_entry.async_create_background_task(
+        hass,
+        c3_coordinator.async_refresh(),
+        f"{DOMAIN} first refresh {config_entry.title}",
+    )
 
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Unload discovery thread and entities entry."""
+    """Unload entities entry."""
     if not hass.data.get(DOMAIN):
         return True
 
-    if hass.data[DOMAIN].get(DATA_DISCOVERY_INTERVAL) is not None:
-        hass.data[DOMAIN].pop(DATA_DISCOVERY_INTERVAL)
-
-    if hass.data[DOMAIN].get(DATA_DISCOVERY_SERVICE) is not None:
-        hass.data[DOMAIN].pop(DATA_DISCOVERY_SERVICE)
-
     if unload_ok := await hass.config_entries.async_unload_platforms(
         entry, SUPPORTED_PLATFORMS
     ):
+        # pylint: disable-next=import-outside-toplevel
+        from .services import async_unload_services
+
         hass.data[DOMAIN].pop(entry.entry_id)
+        async_unload_services(hass)
 
     return unload_ok
 
 
-async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored panel data of a removed config entry."""
+    from .storage import C3PanelStore  # pylint: disable=import-outside-toplevel
+
+    await C3PanelStore(hass, entry.entry_id).async_remove()
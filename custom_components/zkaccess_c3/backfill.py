@@ -0,0 +1,226 @@
+"""Backfill of the events a C3 panel recorded while it was not polled."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any
+
+from c3 import rtlog
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+
+from .const import BACKFILL_CHUNK_SIZE, BACKFILL_MAX_SEEN_EVENTS, BACKFILL_READ_TIMEOUT
+from .events import C3EventDispatcher
+from .storage import C3BackfillCursor, C3EventKey, C3PanelStore
+from .transport import C3Transport
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def event_key(record: rtlog.EventRecord) -> C3EventKey:
+    """Return the key identifying an event, in both the RT log and transactions."""
+    return (
+        record.time_second.isoformat(),
+        record.port_nr,
+        int(record.event_type),
+        record.card_no,
+        record.pin,
+    )
+
+
+def select_transactions(
+    records: list[rtlog.EventRecord],
+    cursor: C3BackfillCursor | None,
+    seen: set[C3EventKey],
+) -> tuple[C3BackfillCursor, list[rtlog.EventRecord]]:
+    """Return the cursor and the transactions to publish, oldest first.
+
+    Without cursor, a cursor at the end of the table is returned, without any
+    transactions to publish. Runs in the executor, as the table can be large.
+    """
+    if cursor is None:
+        cursor = C3BackfillCursor()
+        for record in records:
+            cursor.advance(record.time_second, event_key(record))
+        return cursor, []
+
+    missed = [
+        record
+        for record in records
+        if (key := event_key(record)) not in seen
+        and cursor.is_new(record.time_second, key)
+    ]
+    missed.sort(key=lambda record: record.time_second)
+    return cursor, missed
+
+
+class C3EventBackfill:
+    """Publication of the transactions that were not received in the RT log.
+
+    The panel stores all events in its transaction table, also while it is not
+    polled. After each (re)connect, the table is read and the events after the
+    cursor are published in chunks. RT log events advance the cursor, except
+    while a backfill is pending. These events are remembered instead, so they
+    are not published twice.
+
+    The table is read in a single panel request, which delays the polls while
+    it runs. When the read takes too long, no backfill is started anymore, to
+    avoid that each reconnect delays the polls again.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        transport: C3Transport,
+        dispatcher: C3EventDispatcher,
+        store: C3PanelStore,
+    ) -> None:
+        """Initialize the backfill of a panel."""
+        self._hass = hass
+        self._config_entry = config_entry
+        self._transport = transport
+        self._dispatcher = dispatcher
+        self._store = store
+        self._cursor: C3BackfillCursor | None = None
+        self._seen: dict[C3EventKey, None] = {}
+        self._pending = False
+        self._rerun = False
+        self._supported = True
+        self._timed_out = False
+        self._task: asyncio.Task | None = None
+        self.events_published = 0
+
+    @callback
+    def async_load(self) -> None:
+        """Load the cursor from the panel storage."""
+        self._cursor = self._store.backfill_cursor
+
+    @property
+    def cursor(self) -> C3BackfillCursor | None:
+        """Return the cursor, None when the transaction table was never read."""
+        return self._cursor
+
+    @callback
+    def async_event_received(self, record: rtlog.EventRecord) -> None:
+        """Process an event received in the RT log."""
+        if not record.time_second:
+            return
+
+        key = event_key(record)
+        if self._pending:
+            self._seen[key] = None
+            if len(self._seen) > BACKFILL_MAX_SEEN_EVENTS:
+                del self._seen[next(iter(self._seen))]
+        elif self._cursor is not None:
+            self._cursor.advance(record.time_second, key)
+            self._store.async_schedule_save_backfill_cursor(self._cursor)
+
+    @callback
+    def async_start(self) -> None:
+        """Start a backfill, after (re)connecting to the panel."""
+        if not self._supported or self._timed_out:
+            return
+
+        self._pending = True
+        if self._task is not None and not self._task.done():
+            # Read the table again after the running backfill, it may have been
+            # read before the reconnect
+            self._rerun = True
+        else:
+            self._task = self._config_entry.async_create_background_task(
+                self._hass,
+                self._async_backfill(),
+                f"C3 backfill {self._transport.panel.host}",
+            )
+
+    async def _async_backfill(self) -> None:
+        """Run backfills until no new one is requested.
+
+        The RT log events advance the cursor again afterwards, also when the
+        backfill failed, otherwise no later backfill is started.
+        """
+        try:
+            while True:
+                self._rerun = False
+                await self._async_publish_transactions()
+                if not self._rerun or not self._supported or self._timed_out:
+                    break
+        finally:
+            self._rerun = False
+            self._pending = False
+
+    async def _async_publish_transactions(self) -> None:
+        """Publish the stored transactions after the cursor.
+
+        When the table is read for the first time, the cursor is placed at its
+        end, without publishing the (possibly large) history of the panel.
+        """
+        host = self._transport.panel.host
+        try:
+            async with asyncio.timeout(BACKFILL_READ_TIMEOUT):
+                records = await self._transport.async_get_transactions()
+        except asyncio.TimeoutError:
+            _LOGGER.warning(
+                "Transaction backfill from %s took more than %d seconds, "
+                "no backfill is performed anymore",
+                host,
+                BACKFILL_READ_TIMEOUT,
+            )
+            self._timed_out = True
+            self._seen.clear()
+            return
+        except ValueError as ex:
+            _LOGGER.warning(
+                "Transaction backfill from %s is not supported: %s", host, ex
+            )
+            self._supported = False
+            self._seen.clear()
+            return
+        except ConnectionError as ex:
+            _LOGGER.debug(
+                "Transaction backfill from %s failed, retrying after reconnect: %s",
+                host,
+                ex,
+            )
+            return
+
+        # The cursor only changes after the backfill, it is safe to use it in
+        # the executor
+        self._cursor, missed = await self._hass.async_add_executor_job(
+            select_transactions, records, self._cursor, set(self._seen)
+        )
+        for start in range(0, len(missed), BACKFILL_CHUNK_SIZE):
+            chunk = missed[start : start + BACKFILL_CHUNK_SIZE]
+            for record in chunk:
+                self._dispatcher.add(record, backfill=True)
+                self._cursor.advance(record.time_second, event_key(record))
+            self._dispatcher.async_flush()
+            self.events_published += len(chunk)
+            self._store.async_schedule_save_backfill_cursor(self._cursor)
+            # Let polls and other tasks run between chunks
+            await asyncio.sleep(0)
+
+        if missed:
+            _LOGGER.info(
+                "Published %d event(s) recorded by %s while not polled",
+                len(missed),
+                host,
+            )
+
+        # The RT log events received during the backfill are published already
+        for key in self._seen:
+            self._cursor.advance(datetime.fromisoformat(key[0]), key)
+        self._seen.clear()
+        self._store.async_schedule_save_backfill_cursor(self._cursor)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the backfill state as dictionary."""
+        return {
+            "supported": self._supported,
+            "timed_out": self._timed_out,
+            "pending": self._pending,
+            "events_published": self.events_published,
+            "cursor": self._cursor.as_dict() if self._cursor else None,
+        }
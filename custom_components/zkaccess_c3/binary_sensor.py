@@ -14,6 +14,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DATA_C3_COORDINATOR, DOMAIN
+from .coordinator import C3PortType
 
 _ICON_AUX_UNKNOWN = "mdi:unknown"
 _ICON_AUX_ON = "mdi:toggle-switch-variant"
@@ -40,21 +41,22 @@ class C3AuxInEntity(CoordinatorEntity, BinarySensorEntity):
 
     def __init__(self, coordinator, idx: int) -> None:
         """Pass coordinator to CoordinatorEntity."""
-        super().__init__(coordinator, context=idx)
+        super().__init__(coordinator, context=(C3PortType.AUX_IN, idx))
         self._coordinator = coordinator
         self._idx = idx
         self._attr_is_on = None
         self._attr_device_class = BinarySensorDeviceClass.DOOR.value
         self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, self._coordinator.c3_panel.serial_number)},
+            identifiers={(DOMAIN, self._coordinator.serial_number)},
         )
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        if self._coordinator.c3_panel.aux_in_status(self._idx) == InOutStatus.OPEN:
+        aux_in_status = self._coordinator.c3_panel.aux_in_status(self._idx)
+        if aux_in_status == InOutStatus.OPEN:
             self._attr_is_on = True
-        elif self._coordinator.c3_panel.aux_in_status(self._idx) == InOutStatus.CLOSED:
+        elif aux_in_status == InOutStatus.CLOSED:
             self._attr_is_on = False
 
         self.async_write_ha_state()
@@ -72,7 +74,7 @@ class C3AuxInEntity(CoordinatorEntity, BinarySensorEntity):
     @property
     def unique_id(self):
         """Get unique ID."""
-        return f"{self._coordinator.c3_panel.serial_number}-in{self._idx}"
+        return f"{self._coordinator.serial_number}-in{self._idx}"
 
     @property
     def icon(self) -> str | None:
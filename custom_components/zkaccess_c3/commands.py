@@ -0,0 +1,155 @@
+"""Tracking of the confirmation of control commands sent to a C3 panel."""
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any
+
+from c3.consts import EventType
+
+_LOGGER = logging.getLogger(__name__)
+
+# Port type and number, see C3Port of the coordinator
+_Port = tuple[str, int]
+
+
+@dataclass
+class C3PendingCommand:
+    """A control command that is not yet confirmed by the panel."""
+
+    activate: bool
+    confirm_event: EventType
+    sent: float = field(default_factory=monotonic)
+
+
+@dataclass
+class C3CommandMetrics:
+    """Confirmation statistics of the control commands of a panel."""
+
+    commands: int = 0
+    confirmed: int = 0
+    rolled_back: int = 0
+    last_latency: float | None = None
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+
+    @property
+    def average_latency(self) -> float | None:
+        """Return the average time from command to confirmation."""
+        return self.total_latency / self.confirmed if self.confirmed else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as dictionary."""
+        return {
+            "commands": self.commands,
+            "confirmed": self.confirmed,
+            "rolled_back": self.rolled_back,
+            "last_latency": round(self.last_latency, 3)
+            if self.last_latency is not None
+            else None,
+            "max_latency": round(self.max_latency, 3),
+            "average_latency": round(self.average_latency, 3)
+            if self.average_latency is not None
+            else None,
+        }
+
+
+class C3CommandTracker:
+    """Pending control commands, by panel port.
+
+    A command is pending from the moment it is sent, until the panel reports
+    the event that confirms it in the RT log, or until a status read after the
+    command shows the port in its expected state. Entities show the expected
+    state of a port while its command is pending. When the command fails, the
+    status contradicts it, or it is not confirmed within the timeout, it is
+    rolled back and the entities show the state reported by the panel again.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        """Initialize the tracker, with the confirmation timeout in seconds."""
+        self._timeout = timeout
+        self._pending: dict[_Port, C3PendingCommand] = {}
+        self.metrics = C3CommandMetrics()
+
+    def pending(self, port: _Port) -> C3PendingCommand | None:
+        """Return the pending command of a port."""
+        return self._pending.get(port)
+
+    @property
+    def has_pending(self) -> bool:
+        """Return whether any command is waiting for confirmation."""
+        return bool(self._pending)
+
+    def track(self, port: _Port, activate: bool, confirm_event: EventType) -> None:
+        """Start tracking a command, replacing a pending command of the port."""
+        self._pending[port] = C3PendingCommand(activate, confirm_event)
+        self.metrics.commands += 1
+
+    def cancel(self, port: _Port) -> None:
+        """Roll back the command of a port, because sending it failed."""
+        if self._pending.pop(port, None) is not None:
+            self.metrics.rolled_back += 1
+
+    def confirm(self, port: _Port, event_type: EventType) -> bool:
+        """Confirm the pending command of the port, when the event matches it."""
+        command = self._pending.get(port)
+        if command is None or command.confirm_event != event_type:
+            return False
+
+        del self._pending[port]
+        self._record_confirmed(command)
+        return True
+
+    def _record_confirmed(self, command: C3PendingCommand) -> None:
+        """Record the confirmation latency of a command."""
+        latency = monotonic() - command.sent
+        self.metrics.confirmed += 1
+        self.metrics.last_latency = latency
+        self.metrics.max_latency = max(self.metrics.max_latency, latency)
+        self.metrics.total_latency += latency
+
+    def reconcile(
+        self, requested: float, is_active: Callable[[_Port], bool | None]
+    ) -> list[_Port]:
+        """Reconcile the commands sent before a status request with the status.
+
+        The panel reports the status after all buffered events, so a command
+        sent before the status was requested and still pending was not
+        confirmed by an event. It is confirmed when its port is reported in the
+        expected state, and rolled back otherwise, also when the state of the
+        port is unknown. Returns the ports of the confirmed and rolled back
+        commands.
+        """
+        reconciled = []
+        for port, command in list(self._pending.items()):
+            if command.sent >= requested:
+                continue
+
+            del self._pending[port]
+            if is_active(port) == command.activate:
+                self._record_confirmed(command)
+            else:
+                _LOGGER.warning(
+                    "Command for %s %d was not executed by the panel", port[0], port[1]
+                )
+                self.metrics.rolled_back += 1
+            reconciled.append(port)
+        return reconciled
+
+    def expire(self) -> list[_Port]:
+        """Roll back the commands that are not confirmed in time."""
+        now = monotonic()
+        expired = [
+            port
+            for port, command in self._pending.items()
+            if now - command.sent > self._timeout
+        ]
+        for port in expired:
+            _LOGGER.warning(
+                "Command for %s %d was not confirmed by the panel", port[0], port[1]
+            )
+            del self._pending[port]
+        self.metrics.rolled_back += len(expired)
+        return expired
@@ -2,13 +2,12 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+from dataclasses import asdict
+from ipaddress import ip_address
+from typing import TYPE_CHECKING, Any
 
 import voluptuous as vol
-from c3 import C3
-from c3.consts import C3_PORT_DEFAULT
 from homeassistant import config_entries
-from homeassistant.components import network
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_HOST,
@@ -18,21 +17,46 @@ from homeassistant.const import (
     CONF_SCAN_INTERVAL,
 )
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.data_entry_flow import FlowResult
+from homeassistant.data_entry_flow import AbortFlow, FlowResult
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import DiscoveryInfoType
+
+if TYPE_CHECKING:
+    from .transport import C3Transport
 
 from .const import (
+    C3_PORT_DEFAULT,
     CONF_AUX_ON_DURATION,
+    CONF_EXPORT_FILE,
+    CONF_EXPORT_MQTT_TOPIC,
+    CONF_FAST_POLL_DECAY,
+    CONF_FAST_POLL_INTERVAL,
+    CONF_FAST_POLL_MAX_INTERVAL,
+    CONF_PROXY_HOST,
+    CONF_PROXY_PASSWORD,
+    CONF_PROXY_PORT,
+    CONF_RTLOG_MAX_DRAIN_TIME,
+    CONF_RTLOG_MAX_RECORDS,
     CONF_UNLOCK_DURATION,
     DEFAULT_AUX_ON_DURATION,
+    DEFAULT_FAST_POLL_DECAY,
+    DEFAULT_FAST_POLL_INTERVAL,
+    DEFAULT_FAST_POLL_MAX_INTERVAL,
     DEFAULT_POLL_INTERVAL,
+    DEFAULT_POLL_TIMEOUT,
+    DEFAULT_PROXY_HOST,
+    DEFAULT_PROXY_PORT,
+    DEFAULT_RTLOG_MAX_DRAIN_TIME,
+    DEFAULT_RTLOG_MAX_RECORDS,
     DEFAULT_UNLOCK_DURATION,
     DOMAIN,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+CONF_MANUAL = "manual"
+
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_HOST): cv.string,
@@ -43,26 +67,44 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
 )
 
 
-async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
-    """Validate C3 connection parameters."""
-    panel = C3(data[CONF_HOST], port=data[CONF_PORT])
-    if not panel.connect(data.get(CONF_PASSWORD, "")):
-        raise CannotConnect
-
-    return {"title": data[CONF_NAME] or "ZKAccess C3"}
+async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> C3Transport:
+    """Validate C3 connection parameters.
 
+    After a TCP probe, the session handshake is done by a transport, without
+    blocking the event loop. The handshake also reads the serial number and
+    layout of the panel. Returns the connected transport, which is closed when
+    the validation fails.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .connection import C3ConnectionMonitor
+    from .scheduler import async_get_scheduler
+    from .transport import C3Transport
 
-async def _async_has_devices(hass: HomeAssistant) -> bool:
-    """Return if there are devices that can be discovered."""
-    adapters = await network.async_get_adapters(hass)
-    ipv4_adapters = [adapter["ipv4"] for adapter in adapters]
-    ipv4_addresses = [ip_info[0]["address"] for ip_info in ipv4_adapters]
-
-    devices = await hass.async_add_executor_job(C3.discover, ipv4_addresses)
-    return len(devices) > 0
+    transport = C3Transport(
+        hass,
+        data[CONF_HOST],
+        data[CONF_PORT],
+        data.get(CONF_PASSWORD, ""),
+        io_limit=async_get_scheduler(hass),
+    )
+    try:
+        try:
+            connected = (
+                await C3ConnectionMonitor(transport).async_probe()
+                and await transport.async_connect()
+            )
+        except (ConnectionError, ValueError, OSError) as ex:
+            _LOGGER.debug("Connection to %s failed: %s", data[CONF_HOST], ex)
+            connected = False
 
+        if not connected or not transport.panel.serial_number:
+            raise CannotConnect
+    except BaseException:
+        # Also on unexpected errors, the panel only accepts a few sessions
+        await transport.async_close()
+        raise
 
-# config_entry_flow.register_discovery_flow(DOMAIN, "C3", _async_has_devices)
+    return transport
 
 
 class C3OptionsFlow(config_entries.OptionsFlow):
@@ -77,33 +119,103 @@ class C3OptionsFlow(config_entries.OptionsFlow):
         user_input: dict[str, str] | None = None,
     ) -> FlowResult:
         """Manage the options."""
+        errors: dict[str, str] = {}
         if user_input is not None:
-            return self.async_create_entry(
-                title="",
-                data=user_input,
-            )
+            proxy_host = user_input.get(CONF_PROXY_HOST) or DEFAULT_PROXY_HOST
+            try:
+                loopback = ip_address(proxy_host).is_loopback
+            except ValueError:
+                errors[CONF_PROXY_HOST] = "invalid_proxy_host"
+            else:
+                # A proxy reachable from the network must not be open to anyone
+                if (
+                    user_input.get(CONF_PROXY_PORT)
+                    and not loopback
+                    and not user_input.get(CONF_PROXY_PASSWORD)
+                    and not self.config_entry.data.get(CONF_PASSWORD)
+                ):
+                    errors[CONF_PROXY_PASSWORD] = "proxy_password_required"
+            if not errors:
+                return self.async_create_entry(
+                    title="",
+                    data=user_input,
+                )
 
+        options = user_input if user_input is not None else self.config_entry.options
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(
                 {
                     vol.Optional(
                         CONF_SCAN_INTERVAL,
-                        default=self.config_entry.options.get(CONF_SCAN_INTERVAL)
+                        default=options.get(CONF_SCAN_INTERVAL)
                         or DEFAULT_POLL_INTERVAL,
                     ): cv.positive_int,
                     vol.Optional(
                         CONF_UNLOCK_DURATION,
-                        default=self.config_entry.options.get(CONF_UNLOCK_DURATION)
+                        default=options.get(CONF_UNLOCK_DURATION)
                         or DEFAULT_UNLOCK_DURATION,
                     ): cv.positive_int,
                     vol.Optional(
                         CONF_AUX_ON_DURATION,
-                        default=self.config_entry.options.get(CONF_AUX_ON_DURATION)
+                        default=options.get(CONF_AUX_ON_DURATION)
                         or DEFAULT_AUX_ON_DURATION,
                     ): cv.positive_int,
+                    vol.Optional(
+                        CONF_FAST_POLL_INTERVAL,
+                        default=options.get(CONF_FAST_POLL_INTERVAL)
+                        or DEFAULT_FAST_POLL_INTERVAL,
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.1)),
+                    vol.Optional(
+                        CONF_FAST_POLL_MAX_INTERVAL,
+                        default=options.get(CONF_FAST_POLL_MAX_INTERVAL)
+                        or DEFAULT_FAST_POLL_MAX_INTERVAL,
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.1)),
+                    vol.Optional(
+                        CONF_FAST_POLL_DECAY,
+                        default=options.get(CONF_FAST_POLL_DECAY)
+                        or DEFAULT_FAST_POLL_DECAY,
+                    ): vol.All(vol.Coerce(float), vol.Range(min=1.1, max=10)),
+                    vol.Optional(
+                        CONF_RTLOG_MAX_RECORDS,
+                        default=options.get(CONF_RTLOG_MAX_RECORDS)
+                        or DEFAULT_RTLOG_MAX_RECORDS,
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_RTLOG_MAX_DRAIN_TIME,
+                        default=options.get(CONF_RTLOG_MAX_DRAIN_TIME)
+                        or DEFAULT_RTLOG_MAX_DRAIN_TIME,
+                    ): vol.All(
+                        vol.Coerce(float),
+                        vol.Range(min=0.5, max=DEFAULT_POLL_TIMEOUT - 1),
+                    ),
+                    vol.Optional(
+                        CONF_PROXY_HOST,
+                        default=options.get(CONF_PROXY_HOST) or DEFAULT_PROXY_HOST,
+                    ): cv.string,
+                    vol.Optional(
+                        CONF_PROXY_PORT,
+                        default=options.get(CONF_PROXY_PORT) or DEFAULT_PROXY_PORT,
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=65535)),
+                    vol.Optional(
+                        CONF_PROXY_PASSWORD,
+                        description={
+                            "suggested_value": options.get(CONF_PROXY_PASSWORD)
+                        },
+                    ): cv.string,
+                    vol.Optional(
+                        CONF_EXPORT_FILE,
+                        default=options.get(CONF_EXPORT_FILE, False),
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_EXPORT_MQTT_TOPIC,
+                        description={
+                            "suggested_value": options.get(CONF_EXPORT_MQTT_TOPIC)
+                        },
+                    ): cv.string,
                 },
             ),
+            errors=errors,
         )
 
 
@@ -112,6 +224,12 @@ class C3ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._discovered_devices: dict[str, DiscoveryInfoType] = {}
+        self._discovery_info: DiscoveryInfoType | None = None
+        self._manual = False
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry: ConfigEntry) -> C3OptionsFlow:
@@ -122,22 +240,164 @@ class C3ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle the initial step."""
+        if user_input is None and not self._manual:
+            return await self.async_step_pick_device()
+
         errors: dict[str, str] = {}
         if user_input is not None:
+            # Entries created before the serial number was the unique ID
+            self._async_abort_entries_match(
+                {CONF_HOST: user_input[CONF_HOST], CONF_PORT: user_input[CONF_PORT]}
+            )
             try:
-                info = await validate_input(self.hass, user_input)
+                transport = await validate_input(self.hass, user_input)
             except CannotConnect:
                 errors["base"] = "cannot_connect"
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
             else:
-                return self.async_create_entry(title=info["title"], data=user_input)
+                return await self._async_create_panel_entry(transport, user_input)
 
         return self.async_show_form(
             step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
 
+    async def async_step_pick_device(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Let the user pick a discovered panel, or enter the panel manually."""
+        if user_input is not None:
+            if user_input[CONF_HOST] == CONF_MANUAL:
+                self._manual = True
+                return await self.async_step_user()
+            return await self.async_step_integration_discovery(
+                self._discovered_devices[user_input[CONF_HOST]]
+            )
+
+        configured_hosts = self._async_current_ids() | {
+            entry.data[CONF_HOST] for entry in self._async_current_entries()
+        }
+        # Imported here, the network component is only needed when a flow runs
+        # pylint: disable-next=import-outside-toplevel
+        from .discovery import async_discover_panels, async_get_ipv4_addresses
+
+        devices = await async_discover_panels(await async_get_ipv4_addresses(self.hass))
+        self._discovered_devices = {
+            device.host: asdict(device)
+            for device in devices
+            if device.host not in configured_hosts
+            and device.serial_number not in configured_hosts
+        }
+        if not self._discovered_devices:
+            self._manual = True
+            return await self.async_step_user()
+
+        return self.async_show_form(
+            step_id="pick_device",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_HOST): vol.In(
+                        {
+                            host: f"{device['device_name'] or 'C3'} ({host})"
+                            for host, device in self._discovered_devices.items()
+                        }
+                        | {CONF_MANUAL: "Manual entry"}
+                    )
+                }
+            ),
+        )
+
+    async def async_step_integration_discovery(
+        self, discovery_info: DiscoveryInfoType
+    ) -> FlowResult:
+        """Handle a panel found by the network discovery."""
+        host = discovery_info[CONF_HOST]
+        if discovery_info.get("serial_number"):
+            await self.async_set_unique_id(discovery_info["serial_number"])
+            # The update listener of the entry moves the session to the new address
+            self._abort_if_unique_id_configured(
+                updates={CONF_HOST: host}, reload_on_update=False
+            )
+        self._async_abort_entries_match({CONF_HOST: host})
+
+        self._discovery_info = discovery_info
+        self.context["title_placeholders"] = {
+            "name": discovery_info.get("device_name") or host
+        }
+        return await self.async_step_discovery_confirm()
+
+    async def async_step_discovery_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Confirm the setup of a discovered panel."""
+        assert self._discovery_info is not None
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            data = {
+                CONF_HOST: self._discovery_info[CONF_HOST],
+                CONF_PORT: self._discovery_info.get("port") or C3_PORT_DEFAULT,
+                **user_input,
+            }
+            try:
+                transport = await validate_input(self.hass, data)
+            except CannotConnect:
+                errors["base"] = "cannot_connect"
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected exception")
+                errors["base"] = "unknown"
+            else:
+                return await self._async_create_panel_entry(transport, data)
+
+        return self.async_show_form(
+            step_id="discovery_confirm",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(CONF_PASSWORD): cv.string,
+                    vol.Optional(
+                        CONF_NAME,
+                        default=self._discovery_info.get("device_name") or "",
+                    ): cv.string,
+                }
+            ),
+            description_placeholders={
+                "host": self._discovery_info[CONF_HOST],
+                "serial_number": self._discovery_info.get("serial_number") or "?",
+            },
+            errors=errors,
+        )
+
+    async def _async_create_panel_entry(
+        self, transport: C3Transport, data: dict[str, Any]
+    ) -> FlowResult:
+        """Create the entry of a validated panel, and hand over its session.
+
+        The serial number of the panel is the unique ID. When the panel is
+        already configured, the address of its entry is updated without a
+        reload, the update listener of the entry moves its session to the new
+        address. The session of the flow is closed.
+        """
+        # pylint: disable-next=import-outside-toplevel
+        from .transport import async_store_session
+
+        try:
+            await self.async_set_unique_id(
+                transport.panel.serial_number, raise_on_progress=False
+            )
+            self._abort_if_unique_id_configured(
+                updates={CONF_HOST: data[CONF_HOST], CONF_PORT: data[CONF_PORT]},
+                reload_on_update=False,
+            )
+        except AbortFlow:
+            await transport.async_close()
+            raise
+
+        async_store_session(self.hass, transport)
+        return self.async_create_entry(
+            title=data.get(CONF_NAME) or "ZKAccess C3",
+            data=data,
+        )
+
 
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
@@ -0,0 +1,169 @@
+"""Connection state of a C3 panel, with reconnect backoff and circuit breaker."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from contextlib import suppress
+from dataclasses import dataclass
+from enum import StrEnum
+from time import monotonic
+from typing import Any
+
+from .const import (
+    RECONNECT_BACKOFF_JITTER,
+    RECONNECT_FAILURE_THRESHOLD,
+    RECONNECT_MAX_BACKOFF,
+    RECONNECT_MIN_BACKOFF,
+    RECONNECT_PROBE_TIMEOUT,
+)
+from .transport import C3Transport
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class C3ConnectionState(StrEnum):
+    """State of the connection with a panel."""
+
+    CONNECTED = "connected"
+    DISCONNECTED = "disconnected"
+    CIRCUIT_OPEN = "circuit_open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class C3ConnectionMetrics:
+    """Connection statistics of a panel."""
+
+    connect_attempts: int = 0
+    connect_failures: int = 0
+    probe_failures: int = 0
+    consecutive_failures: int = 0
+    circuit_opened: int = 0
+    last_error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as dictionary."""
+        return {
+            "connect_attempts": self.connect_attempts,
+            "connect_failures": self.connect_failures,
+            "probe_failures": self.probe_failures,
+            "consecutive_failures": self.consecutive_failures,
+            "circuit_opened": self.circuit_opened,
+            "last_error": self.last_error,
+        }
+
+
+class C3ConnectionMonitor:
+    """Circuit breaker for the connection with a panel.
+
+    Failed connection attempts and polls are counted. After a number of
+    consecutive failures, the circuit opens: no connection attempts are made
+    until a backoff delay has passed, which grows exponentially (with jitter)
+    with each further failure. After the delay, the circuit is half open and a
+    single attempt is allowed, which starts with a cheap TCP probe of the panel
+    before the full session handshake is performed.
+    """
+
+    def __init__(self, transport: C3Transport) -> None:
+        """Initialize the connection monitor for the panel of the transport."""
+        self._transport = transport
+        self._circuit_open = False
+        self._retry_at = 0.0
+        self.metrics = C3ConnectionMetrics()
+
+    @property
+    def state(self) -> C3ConnectionState:
+        """Return the connection state."""
+        if self._circuit_open:
+            if monotonic() < self._retry_at:
+                return C3ConnectionState.CIRCUIT_OPEN
+            return C3ConnectionState.HALF_OPEN
+        if self._transport.is_connected():
+            return C3ConnectionState.CONNECTED
+        return C3ConnectionState.DISCONNECTED
+
+    @property
+    def retry_in(self) -> float:
+        """Return the time until the next connection attempt is allowed."""
+        if not self._circuit_open:
+            return 0.0
+        return max(self._retry_at - monotonic(), 0.0)
+
+    def attempt_allowed(self) -> bool:
+        """Return whether a connection attempt is allowed now."""
+        return self.state != C3ConnectionState.CIRCUIT_OPEN
+
+    async def async_probe(self) -> bool:
+        """Check whether the panel accepts TCP connections, without a session."""
+        try:
+            async with asyncio.timeout(RECONNECT_PROBE_TIMEOUT):
+                _, writer = await asyncio.open_connection(
+                    self._transport.panel.host, self._transport.panel.port
+                )
+        except (OSError, asyncio.TimeoutError) as ex:
+            self.metrics.probe_failures += 1
+            self.record_failure(f"Panel not reachable: {str(ex) or 'timeout'}")
+            return False
+
+        writer.close()
+        with suppress(OSError):
+            await writer.wait_closed()
+        return True
+
+    def record_attempt(self) -> None:
+        """Record a session handshake attempt."""
+        self.metrics.connect_attempts += 1
+
+    def record_success(self) -> None:
+        """Record an established session or successful poll, closing the circuit."""
+        if self._circuit_open:
+            _LOGGER.info("Connection to %s restored", self._transport.panel.host)
+        self._circuit_open = False
+        self.metrics.consecutive_failures = 0
+
+    def reset(self) -> None:
+        """Close the circuit and clear the failures, e.g. after an address change."""
+        self._circuit_open = False
+        self.metrics.consecutive_failures = 0
+
+    def record_connect_failure(self, error: str) -> None:
+        """Record a failed session handshake."""
+        self.metrics.connect_failures += 1
+        self.record_failure(error)
+
+    def record_failure(self, error: str) -> bool:
+        """Record a failed connection attempt or poll.
+
+        Returns whether the circuit is open as result of the failure.
+        """
+        self.metrics.consecutive_failures += 1
+        self.metrics.last_error = error
+        failures = self.metrics.consecutive_failures - RECONNECT_FAILURE_THRESHOLD
+        if failures < 0:
+            return False
+
+        backoff = min(RECONNECT_MIN_BACKOFF * 2**failures, RECONNECT_MAX_BACKOFF)
+        backoff *= 1 + random.uniform(
+            -RECONNECT_BACKOFF_JITTER, RECONNECT_BACKOFF_JITTER
+        )
+        if not self._circuit_open:
+            self.metrics.circuit_opened += 1
+            _LOGGER.warning(
+                "Connection to %s failed %d times (%s), retrying in %.0f seconds",
+                self._transport.panel.host,
+                self.metrics.consecutive_failures,
+                error,
+                backoff,
+            )
+        self._circuit_open = True
+        self._retry_at = monotonic() + backoff
+        return True
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the connection state and metrics."""
+        return {
+            "state": self.state.value,
+            "retry_in": round(self.retry_in, 1),
+            **self.metrics.as_dict(),
+        }
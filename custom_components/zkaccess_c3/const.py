@@ -2,22 +2,75 @@
 from homeassistant.const import Platform
 
 DOMAIN = "zkaccess_c3"
+# Same as c3.consts.C3_PORT_DEFAULT, the library is only imported when a panel is set up
+C3_PORT_DEFAULT = 4370
 MANUFACTURER = "ZKTEco"
 
 SUPPORTED_PLATFORMS: list[Platform] = [
     Platform.LOCK,
     Platform.SWITCH,
     Platform.BINARY_SENSOR,
+    Platform.EVENT,
+    Platform.SENSOR,
 ]
 
+EVENT_C3 = "zkaccess_c3_event"
+EVENT_C3_BATCH = "zkaccess_c3_events"
+
 DATA_C3_COORDINATOR = "c3_coordinator"
+DATA_SCHEDULER = "c3_scheduler"
+DATA_SESSIONS = "c3_sessions"
 DATA_DISCOVERY_SERVICE = "c3_discovery"
 DATA_DISCOVERY_INTERVAL = "c3_discovery_interval"
 DISCOVERY_SCAN_INTERVAL = 300
 DISCOVERY_TIMEOUT = 2
 DEFAULT_POLL_INTERVAL = 15
+DEFAULT_POLL_TIMEOUT = 5
 DEFAULT_UNLOCK_DURATION = 3
 DEFAULT_AUX_ON_DURATION = 33
+DEFAULT_FAST_POLL_INTERVAL = 0.5
+DEFAULT_FAST_POLL_MAX_INTERVAL = 5.0
+DEFAULT_FAST_POLL_DECAY = 1.5
+DEFAULT_RTLOG_MAX_RECORDS = 200
+DEFAULT_RTLOG_MAX_DRAIN_TIME = 2.0
+MAX_CONCURRENT_PANEL_IO = 8
+SCHEDULER_JITTER = 0.1
+SCHEDULER_METRICS_WINDOW = 60
+DOOR_EVENT_HISTORY_SIZE = 100
+RECONNECT_FAILURE_THRESHOLD = 3
+RECONNECT_MIN_BACKOFF = 30
+RECONNECT_MAX_BACKOFF = 600
+RECONNECT_BACKOFF_JITTER = 0.2
+RECONNECT_PROBE_TIMEOUT = 2
+COMMAND_CONFIRM_TIMEOUT = 5
+BACKFILL_CHUNK_SIZE = 50
+BACKFILL_CURSOR_SAVE_DELAY = 10
+BACKFILL_MAX_SEEN_EVENTS = 1000
+BACKFILL_READ_TIMEOUT = 60
+USERS_WRITE_BATCH_SIZE = 100
+SESSION_HANDOFF_TIMEOUT = 60
+DEFAULT_PROXY_HOST = "127.0.0.1"
+DEFAULT_PROXY_PORT = 0
+PROXY_MAX_PENDING_RECORDS = 1000
+PROXY_RECORDS_PER_REPLY = 32
+PROXY_REQUEST_TIMEOUT = 10
+EXPORT_DIRECTORY = "zkaccess_c3"
+EXPORT_BATCH_SIZE = 100
+EXPORT_FLUSH_INTERVAL = 5
+EXPORT_MAX_QUEUE = 10000
+EXPORT_RETRY_DELAY = 30
+EXPORT_STOP_TIMEOUT = 10
+EXPORT_FILE_MAX_SIZE = 10 * 1024 * 1024
 
 CONF_UNLOCK_DURATION = "unlock_duration"
 CONF_AUX_ON_DURATION = "aux_on_duration"
+CONF_FAST_POLL_INTERVAL = "fast_poll_interval"
+CONF_FAST_POLL_MAX_INTERVAL = "fast_poll_max_interval"
+CONF_FAST_POLL_DECAY = "fast_poll_decay"
+CONF_RTLOG_MAX_RECORDS = "rtlog_max_records"
+CONF_RTLOG_MAX_DRAIN_TIME = "rtlog_max_drain_time"
+CONF_PROXY_HOST = "proxy_host"
+CONF_PROXY_PORT = "proxy_port"
+CONF_PROXY_PASSWORD = "proxy_password"
+CONF_EXPORT_FILE = "export_file"
+CONF_EXPORT_MQTT_TOPIC = "export_mqtt_topic"
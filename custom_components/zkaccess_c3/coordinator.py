@@ -1,39 +1,118 @@
 """Coordinator class for the C3 panel entities."""
 import asyncio
 import logging
+from collections.abc import Callable, Mapping
 from datetime import timedelta
+from enum import StrEnum
+from time import monotonic, perf_counter
+from types import MappingProxyType
 from typing import Any, TypeVar
 
-import async_timeout
-import requests
-from c3 import C3, rtlog
-from c3.consts import EventType
+from c3 import C3, controldevice, rtlog
+from c3.consts import ControlOutputAddress, EventType, InOutStatus
+from c3.core import C3DoorSettings
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_PORT,
     CONF_SCAN_INTERVAL,
     MAJOR_VERSION,
     MINOR_VERSION,
     Platform,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .backfill import C3EventBackfill
+from .commands import C3CommandTracker
+from .connection import C3ConnectionMonitor
 from .const import (
+    COMMAND_CONFIRM_TIMEOUT,
     CONF_AUX_ON_DURATION,
+    CONF_EXPORT_FILE,
+    CONF_EXPORT_MQTT_TOPIC,
+    CONF_FAST_POLL_DECAY,
+    CONF_FAST_POLL_INTERVAL,
+    CONF_FAST_POLL_MAX_INTERVAL,
+    CONF_PROXY_HOST,
+    CONF_PROXY_PASSWORD,
+    CONF_PROXY_PORT,
+    CONF_RTLOG_MAX_DRAIN_TIME,
+    CONF_RTLOG_MAX_RECORDS,
     CONF_UNLOCK_DURATION,
     DATA_C3_COORDINATOR,
     DEFAULT_AUX_ON_DURATION,
+    DEFAULT_FAST_POLL_DECAY,
+    DEFAULT_FAST_POLL_INTERVAL,
+    DEFAULT_FAST_POLL_MAX_INTERVAL,
     DEFAULT_POLL_INTERVAL,
+    DEFAULT_POLL_TIMEOUT,
+    DEFAULT_PROXY_HOST,
+    DEFAULT_PROXY_PORT,
+    DEFAULT_RTLOG_MAX_DRAIN_TIME,
+    DEFAULT_RTLOG_MAX_RECORDS,
     DEFAULT_UNLOCK_DURATION,
     DOMAIN,
+    DOOR_EVENT_HISTORY_SIZE,
+    EXPORT_DIRECTORY,
     MANUFACTURER,
 )
+from .events import C3EventData, C3EventDispatcher
+from .export import C3ExportSink, C3ExportWriter, C3FileSink, C3MqttSink
+from .history import C3EventHistory
+from .metrics import C3PollMetrics
+from .proxy import C3Proxy, is_loopback_address
+from .scheduler import C3Scheduler, async_get_scheduler
+from .storage import C3PanelInfo, C3PanelStore
+from .tracing import C3Tracer
+from .transport import C3Transport, C3TransportMetrics, async_claim_session
+from .users import (
+    C3UserDiff,
+    C3UserTable,
+    C3UserUpload,
+    async_read_users,
+    async_write_users,
+)
 
 _DataT = TypeVar("_DataT")
 _LOGGER = logging.getLogger(__name__)
 
 
+class C3PortType(StrEnum):
+    """Type of panel port, represented by an entity."""
+
+    DOOR = "door"
+    DOOR_ALARM = "door_alarm"
+    DOOR_EVENT = "door_event"
+    AUX_IN = "aux_in"
+    AUX_OUT = "aux_out"
+    DIAGNOSTIC = "diagnostic"
+
+
+C3Port = tuple[C3PortType, int]
+
+_DIAGNOSTIC_PORT: C3Port = (C3PortType.DIAGNOSTIC, 0)
+
+RTLogListener = Callable[[list[rtlog.EventRecord | rtlog.DoorAlarmStatusRecord]], None]
+
+# Port type and RT log event confirming the activation (True) or deactivation
+# (False), by control output address
+_OUTPUT_PORTS: dict[ControlOutputAddress, tuple[C3PortType, dict[bool, EventType]]] = {
+    ControlOutputAddress.DOOR_OUTPUT: (
+        C3PortType.DOOR,
+        {True: EventType.REMOTE_OPENING, False: EventType.REMOTE_CLOSING},
+    ),
+    ControlOutputAddress.AUX_OUTPUT: (
+        C3PortType.AUX_OUT,
+        {True: EventType.OPEN_AUX_OUTPUT, False: EventType.CLOSE_AUX_OUTPUT},
+    ),
+}
+
+
 class C3Coordinator(DataUpdateCoordinator):
     """ZKAccess C3 panel coordinator."""
 
@@ -58,52 +137,501 @@ class C3Coordinator(DataUpdateCoordinator):
             ),
         )
 
-        self._password = password
-        self._poll_timeout_count = 0
+        if self.config_entry is None:
+            # Not set up through the config entries. Bind the entry explicitly.
+            self.config_entry = config_entry
+            config_entry.async_on_unload(self.async_shutdown)
+
         self._entry_id = config_entry.entry_id
         self._attr_unique_id = self._entry_id
 
         self._status = rtlog.DoorAlarmStatusRecord()
-        self._door_events: dict[rtlog.EventRecord, Any] = {}
-        self.unlock_duration: int = (
-            config_entry.options.get(CONF_UNLOCK_DURATION) or DEFAULT_UNLOCK_DURATION
+        self._door_events: dict[int, rtlog.EventRecord] = {}
+        self._door_history: dict[int, C3EventHistory] = {}
+        self._door_settings: dict[int, C3DoorSettings] = {}
+        self._port_states: dict[C3Port, Any] = {}
+        self._changed_ports: set[C3Port] | None = None
+        self._listeners_available: bool | None = None
+        self.unlock_duration: int = DEFAULT_UNLOCK_DURATION
+        self.aux_on_duration: int = DEFAULT_AUX_ON_DURATION
+        self._fast_poll_min: float = DEFAULT_FAST_POLL_INTERVAL
+        self._fast_poll_max: float = DEFAULT_FAST_POLL_MAX_INTERVAL
+        self._fast_poll_decay: float = DEFAULT_FAST_POLL_DECAY
+        self._fast_poll_interval: float | None = None
+        self._refreshing = False
+        self._rtlog_max_records: int = DEFAULT_RTLOG_MAX_RECORDS
+        self._rtlog_max_drain_time: float = DEFAULT_RTLOG_MAX_DRAIN_TIME
+        self._rtlog_drained = 0
+        self._rtlog_listeners: list[RTLogListener] = []
+        self._proxy_host: str = DEFAULT_PROXY_HOST
+        self._proxy_port: int = DEFAULT_PROXY_PORT
+        self._proxy_password: str | None = None
+        self._proxy: C3Proxy | None = None
+        self._export_file = False
+        self._export_mqtt_topic: str | None = None
+        self._exporters: dict[str, C3ExportWriter] = {}
+        self._apply_options(config_entry.options)
+
+        config_entry.async_on_unload(
+            config_entry.add_update_listener(self._update_entry_listener)
         )
-        self.aux_on_duration: int = (
-            config_entry.options.get(CONF_AUX_ON_DURATION) or DEFAULT_AUX_ON_DURATION
+
+        self._scheduler: C3Scheduler = async_get_scheduler(hass)
+        self._scheduler.register(self._entry_id)
+        # The session of the config flow is used, when the entry was just created
+        self._transport = async_claim_session(hass, host, port) or C3Transport(
+            hass, host, port, password, io_limit=self._scheduler
+        )
+        self._connection = C3ConnectionMonitor(self._transport)
+        self._event_dispatcher = C3EventDispatcher(hass)
+        self._event_dispatcher.async_add_listener(self._async_export_events)
+        self._commands = C3CommandTracker(COMMAND_CONFIRM_TIMEOUT)
+        self._metrics = C3PollMetrics()
+        self._store = C3PanelStore(hass, self._entry_id)
+        self._backfill = C3EventBackfill(
+            hass, config_entry, self._transport, self._event_dispatcher, self._store
         )
+        self.panel_info: C3PanelInfo | None = None
+        self.device_id: str | None = None
 
-        config_entry.async_on_unload(
-            config_entry.add_update_listener(self._update_options_listener)
-        )
-
-        self.c3_panel: C3 = C3(host, port)
-        if self.c3_panel.connect(password):
-            hass.data[DOMAIN][self._entry_id] = {
-                DATA_C3_COORDINATOR: self,
-                Platform.LOCK: list(range(1, self.c3_panel.nr_of_locks + 1)),
-                Platform.SWITCH: list(range(1, self.c3_panel.nr_aux_out + 1)),
-                Platform.BINARY_SENSOR: list(range(1, self.c3_panel.nr_aux_in + 1)),
-            }
-
-            # Cache door settings
-            if self.c3_panel.nr_of_locks:
-                self.c3_panel.door_settings(1)
-
-            device_registry = dr.async_get(hass)
-            device_info = {
-                "config_entry_id": self._entry_id,
-                "identifiers": {(DOMAIN, self.c3_panel.serial_number)},
-                "manufacturer": MANUFACTURER,
-                "model": "C3/inBio",
-                "name": (self.c3_panel.device_name if not "?" else "")
-                or config_entry.title,
-                "sw_version": self.c3_panel.firmware_version,
-            }
-            if MAJOR_VERSION >= 2023 and MINOR_VERSION >= 11:
-                device_info["serial_number"] = self.c3_panel.serial_number
-            device_registry.async_get_or_create(**device_info)
+    @property
+    def c3_panel(self) -> C3:
+        """Return the C3 panel library instance."""
+        return self._transport.panel
+
+    @property
+    def serial_number(self) -> str:
+        """Return the serial number of the panel."""
+        return self.panel_info.serial_number if self.panel_info else "?"
+
+    @property
+    def door_settings(self) -> Mapping[int, C3DoorSettings]:
+        """Return a read-only view on the settings of all doors."""
+        return MappingProxyType(self._door_settings)
+
+    @property
+    def queue_metrics(self) -> C3TransportMetrics:
+        """Return the statistics of the panel command queue."""
+        return self._transport.metrics
+
+    @property
+    def tracer(self) -> C3Tracer:
+        """Return the tracer of the panel round-trips."""
+        return self._transport.tracer
+
+    @property
+    def proxy(self) -> C3Proxy | None:
+        """Return the running proxy of the panel, if enabled."""
+        return self._proxy
+
+    @property
+    def exporters(self) -> dict[str, C3ExportWriter]:
+        """Return the running event export writers, by sink name."""
+        return self._exporters
+
+    @property
+    def connection(self) -> C3ConnectionMonitor:
+        """Return the connection state and statistics of the panel."""
+        return self._connection
+
+    @property
+    def scheduler(self) -> C3Scheduler:
+        """Return the poll scheduler shared by all panels."""
+        return self._scheduler
+
+    @property
+    def metrics(self) -> C3PollMetrics:
+        """Return the performance metrics of the polls and commands."""
+        return self._metrics
+
+    @property
+    def commands(self) -> C3CommandTracker:
+        """Return the control commands waiting for confirmation by the panel."""
+        return self._commands
+
+    @property
+    def backfill(self) -> C3EventBackfill:
+        """Return the backfill of the events recorded while not polled."""
+        return self._backfill
+
+    async def async_setup(self) -> None:
+        """Set up the panel device and its entity layout.
+
+        When the panel information is stored from a previous setup, the entities
+        are set up from it without connecting to the panel. Otherwise, the panel
+        is connected to learn its layout. The entities are unavailable until the
+        first successful poll, which connects to the panel when needed.
+        """
+        await self._store.async_load()
+        self.panel_info = self._store.panel_info
+        self._backfill.async_load()
+
+        if self.panel_info is None:
+            await self.async_connect()
+        else:
+            self._door_settings.update(self.panel_info.door_settings)
+            self._transport.set_door_settings(self._door_settings)
+        self.last_update_success = False
+
+        self.hass.data[DOMAIN][self._entry_id] = {
+            DATA_C3_COORDINATOR: self,
+            Platform.LOCK: list(range(1, self.panel_info.nr_of_locks + 1)),
+            Platform.SWITCH: list(range(1, self.panel_info.nr_aux_out + 1)),
+            Platform.BINARY_SENSOR: list(range(1, self.panel_info.nr_aux_in + 1)),
+        }
+        self._async_register_device()
+        await self._async_update_proxy()
+        await self._async_update_export()
+
+    async def async_connect(self) -> None:
+        """Connect to the panel.
+
+        The panel I/O is performed by the transport, without blocking the event loop.
+        No handshake is done when the session of the config flow was handed over.
+        """
+        if self._transport.is_connected():
+            self._connection.record_success()
+            await self._async_panel_connected()
+            return
+
+        if not await self._connection.async_probe():
+            raise ConfigEntryNotReady(
+                f"C3 {self.c3_panel.host} is not reachable: "
+                f"{self._connection.metrics.last_error}"
+            )
+
+        self._connection.record_attempt()
+        if not await self._transport.async_connect():
+            self._connection.record_connect_failure("Session handshake failed")
+            raise ConfigEntryNotReady(f"Connection to C3 {self.c3_panel.host} failed.")
+
+        self._connection.record_success()
+        await self._async_panel_connected()
+
+    async def _async_reconnect(self) -> None:
+        """Reconnect to the panel, when allowed by the circuit breaker.
+
+        A cheap TCP probe is done first, so an unreachable panel does not occupy
+        the transport with a blocking session handshake.
+        """
+        if not self._connection.attempt_allowed():
+            return
+
+        if not await self._connection.async_probe():
+            return
+
+        self._connection.record_attempt()
+        try:
+            if await self._transport.async_connect():
+                self._connection.record_success()
+                self._metrics.reconnects += 1
+                await self._async_panel_connected()
+            else:
+                self._connection.record_connect_failure("Session handshake failed")
+        except ValueError as ex:
+            self._connection.record_connect_failure(str(ex))
+            _LOGGER.error("Invalid response received: %s", str(ex))
+        except Exception as ex:
+            self._connection.record_connect_failure(str(ex))
+            await self._transport.async_disconnect()
+            _LOGGER.error(
+                "Error communicating with API (%s). Will reconnect at next interval.",
+                str(ex),
+            )
+
+    async def _async_panel_connected(self) -> None:
+        """Update the stored panel information after (re)connecting.
+
+        The door settings are read again with a single parameter request, to
+        pick up settings changed with the ZKAccess software. The events recorded
+        by the panel while it was not polled are backfilled in the background.
+        """
+        self._backfill.async_start()
+        stored_info = self.panel_info
+
+        self._door_settings.clear()
+        if self.c3_panel.nr_of_locks:
+            self._door_settings.update(await self._transport.async_read_door_settings())
+
+        self._async_set_unique_id()
+        panel_info = C3PanelInfo.from_panel(self.c3_panel, self._door_settings)
+        if panel_info == stored_info:
+            return
+
+        self.panel_info = panel_info
+        await self._store.async_save_panel_info(panel_info)
+
+        if stored_info is not None:
+            self._async_register_device()
+            if not panel_info.same_layout(stored_info):
+                _LOGGER.info(
+                    "Layout of panel %s changed, reloading", self.c3_panel.host
+                )
+                self.hass.async_create_task(
+                    self.hass.config_entries.async_reload(self._entry_id)
+                )
+
+    @callback
+    def _async_set_unique_id(self) -> None:
+        """Use the serial number as unique ID of an entry created without it.
+
+        The unique ID is not set when another entry of the panel has it already.
+        """
+        serial_number = self.c3_panel.serial_number
+        if self.config_entry.unique_id is not None or serial_number == "?":
+            return
+        if any(
+            entry.unique_id == serial_number
+            for entry in self.hass.config_entries.async_entries(DOMAIN)
+        ):
+            _LOGGER.warning(
+                "Panel %s is configured more than once, remove one of its entries",
+                serial_number,
+            )
+            return
+        self.hass.config_entries.async_update_entry(
+            self.config_entry, unique_id=serial_number
+        )
+
+    @callback
+    def _async_register_device(self) -> None:
+        """Register the panel in the device registry."""
+        device_registry = dr.async_get(self.hass)
+        device_info = {
+            "config_entry_id": self._entry_id,
+            "identifiers": {(DOMAIN, self.panel_info.serial_number)},
+            "manufacturer": MANUFACTURER,
+            "model": "C3/inBio",
+            "name": (
+                self.panel_info.device_name
+                if self.panel_info.device_name != "?"
+                else ""
+            )
+            or self.config_entry.title,
+            "sw_version": self.panel_info.firmware_version,
+        }
+        if MAJOR_VERSION >= 2023 and MINOR_VERSION >= 11:
+            device_info["serial_number"] = self.panel_info.serial_number
+        device = device_registry.async_get_or_create(**device_info)
+        self.device_id = device.id
+        self._event_dispatcher.device_id = device.id
+        self._event_dispatcher.serial_number = self.panel_info.serial_number
+
+    async def async_shutdown(self) -> None:
+        """Stop polling and close the connection to the panel."""
+        await super().async_shutdown()
+        self._scheduler.unregister(self._entry_id)
+        self._proxy_port = DEFAULT_PROXY_PORT
+        await self._async_update_proxy()
+        self._export_file = False
+        self._export_mqtt_topic = None
+        await self._async_update_export()
+        await self._transport.async_close()
+
+    async def async_control_device(
+        self, command: controldevice.ControlDeviceBase
+    ) -> None:
+        """Send a control command to the panel.
+
+        Control commands take precedence over pending RT log polls.
+        The expected state of an output is published right away, and confirmed
+        or rolled back based on the RT log. After the command, the panel is
+        polled at the fast poll interval to pick up the resulting status change.
+        """
+        ports = self._track_commands([command])
+        start = monotonic()
+        try:
+            await self._transport.async_control_device(command)
+        except Exception:
+            self._cancel_commands(ports)
+            raise
+        self._metrics.record_control(monotonic() - start)
+        self._start_fast_poll()
+        if self._listeners:
+            self._schedule_refresh()
+
+    async def async_control_devices(
+        self, commands: list[controldevice.ControlDeviceBase]
+    ) -> list[Exception | None]:
+        """Send multiple control commands to the panel, back-to-back.
+
+        Returns the error of each command, or None when it succeeded.
+        """
+        ports = self._track_commands(commands)
+        start = monotonic()
+        try:
+            results = await self._transport.async_control_devices(commands)
+        except Exception:
+            self._cancel_commands(ports)
+            raise
+        self._metrics.record_control(monotonic() - start)
+        self._cancel_commands(
+            [port for port, error in zip(ports, results) if error is not None]
+        )
+        self._start_fast_poll()
+        if self._listeners:
+            self._schedule_refresh()
+        return results
+
+    @callback
+    def _track_commands(
+        self, commands: list[controldevice.ControlDeviceBase]
+    ) -> list[C3Port | None]:
+        """Track the output commands and publish their expected state."""
+        ports: list[C3Port | None] = []
+        for command in commands:
+            port = None
+            if isinstance(command, controldevice.ControlDeviceOutput) and (
+                output := _OUTPUT_PORTS.get(command.address)
+            ):
+                port_type, confirm_events = output
+                port = (port_type, command.output_number)
+                activate = command.duration > 0
+                self._commands.track(port, activate, confirm_events[activate])
+            ports.append(port)
+        self._async_update_ports({port for port in ports if port})
+        return ports
+
+    @callback
+    def _cancel_commands(self, ports: list[C3Port | None]) -> None:
+        """Roll back the commands that could not be sent."""
+        for port in ports:
+            if port:
+                self._commands.cancel(port)
+        self._async_update_ports({port for port in ports if port})
+
+    @callback
+    def _async_update_ports(self, ports: set[C3Port]) -> None:
+        """Update the listeners of the ports right away."""
+        if ports:
+            if self._changed_ports is not None:
+                self._changed_ports |= ports
+            self.async_update_listeners()
+
+    async def async_read_users(self) -> C3UserTable:
+        """Read the users and their door authorizations from the panel."""
+        if not self._transport.is_connected():
+            raise ConnectionError(f"No connection to C3 {self.c3_panel.host}")
+        return await async_read_users(self._transport)
+
+    async def async_write_users(self, diff: C3UserDiff) -> C3UserUpload:
+        """Write the changed users and their door authorizations to the panel."""
+        if not self._transport.is_connected():
+            raise ConnectionError(f"No connection to C3 {self.c3_panel.host}")
+        return await async_write_users(self._transport, diff)
+
+    def _get_port_states(self) -> dict[C3Port, Any]:
+        """Return the current state of all ports, as represented by the entities."""
+        if self.panel_info is None:
+            return {}
+
+        states: dict[C3Port, Any] = {}
+        for idx in range(1, self.panel_info.nr_of_locks + 1):
+            states[(C3PortType.DOOR, idx)] = self.c3_panel.lock_status(idx)
+            states[(C3PortType.DOOR_ALARM, idx)] = self._status.has_alarm(idx)
+            states[(C3PortType.DOOR_EVENT, idx)] = (
+                history.total if (history := self._door_history.get(idx)) else 0
+            )
+        for idx in range(1, self.panel_info.nr_aux_in + 1):
+            states[(C3PortType.AUX_IN, idx)] = self.c3_panel.aux_in_status(idx)
+        for idx in range(1, self.panel_info.nr_aux_out + 1):
+            states[(C3PortType.AUX_OUT, idx)] = self.c3_panel.aux_out_status(idx)
+        return states
+
+    def _update_changed_ports(self) -> None:
+        """Determine the ports of which the state changed since the last poll."""
+        port_states = self._get_port_states()
+        changed = {
+            port
+            for port, state in port_states.items()
+            if port not in self._port_states or self._port_states[port] != state
+        }
+        if self._changed_ports is not None:
+            self._changed_ports |= changed
+        self._port_states = port_states
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the listeners of the ports that changed state.
+
+        All listeners are updated when the availability changed, or when the
+        changed ports are not known (e.g. the first update). The diagnostic
+        listeners are updated at every update.
+        """
+        changed_ports = self._changed_ports
+        self._changed_ports = set()
+        if (
+            changed_ports is None
+            or self._listeners_available != self.last_update_success
+        ):
+            self._listeners_available = self.last_update_success
+            super().async_update_listeners()
+            return
+
+        for update_callback, context in list(self._listeners.values()):
+            if context in changed_ports or context == _DIAGNOSTIC_PORT:
+                update_callback()
+
+    @property
+    def rtlog_drain_incomplete(self) -> bool:
+        """Return whether the last poll stopped before the door/alarm status.
+
+        The panel does not report how many records are still waiting, only that
+        a drain ran out of its budget before reaching the current status.
+        """
+        return self._rtlog_drained > 0
+
+    @property
+    def rtlog_drained(self) -> int:
+        """Return the records read since an incomplete RT log drain started.
+
+        The value is 0 when the last poll reached the current door/alarm status.
+        """
+        return self._rtlog_drained
+
+    @property
+    def fast_poll_interval(self) -> float | None:
+        """Return the current fast poll interval, or None when polling is idle."""
+        return self._fast_poll_interval
+
+    @callback
+    def _start_fast_poll(self) -> None:
+        """Poll at the minimal interval, because activity is ongoing."""
+        self._fast_poll_interval = self._fast_poll_min
+
+    @callback
+    def _decay_fast_poll(self) -> None:
+        """Back off the fast poll interval, until the idle interval is reached."""
+        if self._fast_poll_interval is not None:
+            self._fast_poll_interval *= self._fast_poll_decay
+            if self._fast_poll_interval > self._fast_poll_max:
+                self._fast_poll_interval = None
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Schedule the next refresh.
+
+        While activity is ongoing, the refresh is scheduled at the fast poll
+        interval. Otherwise, the integration scheduler determines the time slot
+        of the next poll, to spread the polls of all panels over the interval.
+        While a refresh is running (e.g. a command is sent during a poll), the
+        refresh is scheduled when it completes, so two polls never run in parallel.
+        """
+        if self.update_interval is None or self._refreshing:
+            return
+
+        if self.config_entry and self.config_entry.pref_disable_polling:
+            return
+
+        if self._fast_poll_interval is not None:
+            delay = self._fast_poll_interval
         else:
-            raise UpdateFailed(f"Connection to C3 {host} failed.")
+            delay = self._scheduler.next_poll_delay(
+                self._entry_id, self.update_interval.total_seconds()
+            )
+
+        self._async_unsub_refresh()
+        self._unsub_refresh = async_call_later(self.hass, delay, self._job)
 
     @property
     def status(self) -> rtlog.DoorAlarmStatusRecord:
@@ -118,66 +646,336 @@ class C3Coordinator(DataUpdateCoordinator):
             else rtlog.EventRecord()
         )
 
-    async def _update_options_listener(
-        self, hass: HomeAssistant, config_entry: ConfigEntry
-    ):
-        """Handle options update."""
+    def door_history(self, door_id: int) -> C3EventHistory | None:
+        """Return the history of events of a door."""
+        return self._door_history.get(door_id)
+
+    @callback
+    def _confirm_command(self, log: rtlog.EventRecord) -> None:
+        """Confirm the pending command of the port of the event."""
+        port_type = (
+            C3PortType.AUX_OUT
+            if log.event_type in (EventType.OPEN_AUX_OUTPUT, EventType.CLOSE_AUX_OUTPUT)
+            else C3PortType.DOOR
+        )
+        if self._commands.confirm((port_type, log.port_nr), log.event_type):
+            if self._changed_ports is not None:
+                self._changed_ports.add((port_type, log.port_nr))
+
+    @callback
+    def _reconcile_commands(self, requested: float) -> None:
+        """Confirm or roll back the pending commands with the received status."""
+        reconciled = self._commands.reconcile(requested, self._is_port_active)
+        if reconciled and self._changed_ports is not None:
+            self._changed_ports.update(reconciled)
+
+    def _is_port_active(self, port: C3Port) -> bool | None:
+        """Return whether the panel reports an output port as open (activated)."""
+        port_type, idx = port
+        status = (
+            self.c3_panel.lock_status(idx)
+            if port_type == C3PortType.DOOR
+            else self.c3_panel.aux_out_status(idx)
+        )
+        return {InOutStatus.OPEN: True, InOutStatus.CLOSED: False}.get(status)
+
+    @callback
+    def _expire_commands(self) -> None:
+        """Roll back the pending commands that were not confirmed in time."""
+        expired = self._commands.expire()
+        if expired and self._changed_ports is not None:
+            self._changed_ports.update(expired)
+
+    def _add_door_event(self, log: rtlog.EventRecord) -> None:
+        """Store a received door event as last event and in the door history."""
+        self._door_events[log.port_nr] = log
+        if log.port_nr not in self._door_history:
+            self._door_history[log.port_nr] = C3EventHistory(DOOR_EVENT_HISTORY_SIZE)
+        self._door_history[log.port_nr].append(
+            log.time_second.timestamp() if log.time_second else 0.0,
+            log.event_type,
+            log.card_no,
+            log.verified,
+        )
+
+    def _apply_options(self, options: Mapping[str, Any]) -> None:
+        """Apply the options of the config entry."""
         self.update_interval = timedelta(
-            seconds=config_entry.options.get(CONF_SCAN_INTERVAL)
-            or DEFAULT_POLL_INTERVAL
+            seconds=options.get(CONF_SCAN_INTERVAL) or DEFAULT_POLL_INTERVAL
         )
         self.unlock_duration = (
-            config_entry.options.get(CONF_UNLOCK_DURATION) or DEFAULT_UNLOCK_DURATION
+            options.get(CONF_UNLOCK_DURATION) or DEFAULT_UNLOCK_DURATION
         )
         self.aux_on_duration = (
-            config_entry.options.get(CONF_AUX_ON_DURATION) or DEFAULT_AUX_ON_DURATION
+            options.get(CONF_AUX_ON_DURATION) or DEFAULT_AUX_ON_DURATION
+        )
+        self._fast_poll_min = (
+            options.get(CONF_FAST_POLL_INTERVAL) or DEFAULT_FAST_POLL_INTERVAL
+        )
+        self._fast_poll_max = (
+            options.get(CONF_FAST_POLL_MAX_INTERVAL) or DEFAULT_FAST_POLL_MAX_INTERVAL
         )
+        self._fast_poll_decay = (
+            options.get(CONF_FAST_POLL_DECAY) or DEFAULT_FAST_POLL_DECAY
+        )
+        self._rtlog_max_records = (
+            options.get(CONF_RTLOG_MAX_RECORDS) or DEFAULT_RTLOG_MAX_RECORDS
+        )
+        self._rtlog_max_drain_time = (
+            options.get(CONF_RTLOG_MAX_DRAIN_TIME) or DEFAULT_RTLOG_MAX_DRAIN_TIME
+        )
+        self._proxy_host = options.get(CONF_PROXY_HOST) or DEFAULT_PROXY_HOST
+        self._proxy_port = options.get(CONF_PROXY_PORT) or DEFAULT_PROXY_PORT
+        self._proxy_password = options.get(CONF_PROXY_PASSWORD) or None
+        self._export_file = bool(options.get(CONF_EXPORT_FILE))
+        self._export_mqtt_topic = options.get(CONF_EXPORT_MQTT_TOPIC) or None
+
+    @callback
+    def async_add_rt_log_listener(self, listener: RTLogListener) -> CALLBACK_TYPE:
+        """Listen for the RT log records read from the panel.
+
+        The listener is called on the event loop with each batch of records
+        read, including the status records. Returns a function to remove the
+        listener.
+        """
+        self._rtlog_listeners.append(listener)
+
+        @callback
+        def _remove_listener() -> None:
+            self._rtlog_listeners.remove(listener)
+
+        return _remove_listener
+
+    async def _async_update_proxy(self) -> None:
+        """Start, stop or move the proxy, when its address changed.
+
+        Clients of the proxy use the proxy password, or else the password of
+        the panel. Without password, the proxy only listens on a loopback address.
+        """
+        password = self._proxy_password or self.config_entry.data.get(CONF_PASSWORD, "")
+        if self._proxy is not None:
+            if (self._proxy.host, self._proxy.port) == (
+                self._proxy_host,
+                self._proxy_port,
+            ):
+                self._proxy.password = password
+                return
+            self._rtlog_listeners.remove(self._proxy.async_publish)
+            await self._proxy.async_stop()
+            self._proxy = None
 
-    def _poll_rt_log(self) -> _DataT:
-        """Fetch RT log from C3."""
+        if not self._proxy_port:
+            return
+        if not password and not is_loopback_address(self._proxy_host):
+            _LOGGER.error(
+                "Proxy for C3 %s requires a password to listen on %s",
+                self.c3_panel.host,
+                self._proxy_host,
+            )
+            return
+
+        proxy = C3Proxy(
+            self._transport,
+            self._proxy_host,
+            self._proxy_port,
+            password,
+            self._async_proxy_command,
+        )
         try:
-            if not self.c3_panel.is_connected():
-                self.c3_panel.connect(self._password)
-        except ValueError as ex:
-            _LOGGER.error("Invalid response received: %s", str(ex))
-        except Exception as ex:
-            self.c3_panel.disconnect()
+            await proxy.async_start()
+        except OSError as ex:
             _LOGGER.error(
-                "Error communicating with API (%s). Will reconnect at next interval.",
-                str(ex),
+                "Proxy for C3 %s can not listen on %s port %d: %s",
+                self.c3_panel.host,
+                self._proxy_host,
+                self._proxy_port,
+                ex,
             )
+            return
+        self._proxy = proxy
+        self._rtlog_listeners.append(proxy.async_publish)
+
+    async def _async_update_export(self) -> None:
+        """Start and stop the event export writers of the configured sinks."""
+        sinks: list[C3ExportSink] = []
+        if self._export_file and self.panel_info:
+            sinks.append(
+                C3FileSink(
+                    self.hass,
+                    self.hass.config.path(
+                        EXPORT_DIRECTORY,
+                        f"events_{self.panel_info.serial_number}.jsonl",
+                    ),
+                )
+            )
+        if self._export_mqtt_topic:
+            sinks.append(C3MqttSink(self.hass, self._export_mqtt_topic))
+
+        names = {sink.name for sink in sinks}
+        for name in [name for name in self._exporters if name not in names]:
+            await self._exporters.pop(name).async_stop()
+        for sink in sinks:
+            if sink.name not in self._exporters:
+                writer = C3ExportWriter(self.hass, sink)
+                writer.async_start()
+                self._exporters[sink.name] = writer
+
+    @callback
+    def _async_export_events(self, events: list[C3EventData]) -> None:
+        """Queue the fired events for export, without waiting for the sinks."""
+        for writer in self._exporters.values():
+            writer.async_add(events)
+
+    @callback
+    def _async_proxy_command(self) -> None:
+        """Poll faster after a control command of a proxy client."""
+        self._start_fast_poll()
+        if self._listeners:
+            self._schedule_refresh()
+
+    async def _update_entry_listener(
+        self, hass: HomeAssistant, config_entry: ConfigEntry
+    ) -> None:
+        """Apply changed options and connection parameters to the running panel.
+
+        The entities and the session with the panel are kept, options are used
+        from the next poll or command on. When the poll interval changed, the
+        next idle poll is rescheduled.
+        """
+        update_interval = self.update_interval
+        self._apply_options(config_entry.options)
+        if (
+            self.update_interval != update_interval
+            and self._fast_poll_interval is None
+            and self._unsub_refresh is not None
+        ):
+            self._schedule_refresh()
+
+        await self._async_update_proxy()
+        await self._async_update_export()
+        await self.async_update_connection(
+            config_entry.data[CONF_HOST],
+            config_entry.data[CONF_PORT],
+            config_entry.data.get(CONF_PASSWORD, ""),
+        )
+
+    async def async_update_connection(
+        self, host: str, port: int, password: str
+    ) -> None:
+        """Connect to the panel at a changed address.
+
+        The new address is connected at the next poll. When another panel is
+        found at the new address, the entry is reloaded once connected.
+        """
+        if await self._transport.async_update_connection(host, port, password):
+            return
+
+        _LOGGER.info("Address of panel %s changed to %s:%d", self.name, host, port)
+        self.name = f"ZKAccess C3 @ {host}:{port}"
+        self._connection.reset()
+        await self.async_request_refresh()
+
+    async def _async_poll_rt_log(self) -> _DataT:
+        """Fetch RT log from C3.
+
+        The panel returns buffered events first, followed by a door/alarm status
+        record. The RT log is read until the status record is received, or until
+        the per-poll record or time budget is used. In the latter case, the drain
+        resumes at the next (fast) poll.
+        """
+        if not self._transport.is_connected():
+            await self._async_reconnect()
+
+        if not self._transport.is_connected():
+            self._fast_poll_interval = None
+            self._expire_commands()
+            if not self._connection.attempt_allowed():
+                raise UpdateFailed(
+                    f"Connection to C3 {self.c3_panel.host} suspended, "
+                    f"retrying in {self._connection.retry_in:.0f} seconds"
+                )
+            raise UpdateFailed(f"No connection to C3 {self.c3_panel.host}")
 
         updated = False
+        activity = False
 
-        if self.c3_panel.is_connected():
-            try:
-                last_record_is_status = False
-                while not last_record_is_status:
-                    logs = self.c3_panel.get_rt_log()
-                    for log in logs:
-                        if isinstance(log, rtlog.DoorAlarmStatusRecord):
-                            self._status = log
-                            last_record_is_status = True
-                        elif isinstance(log, rtlog.EventRecord):
-                            if log.port_nr > 0 and log.event_type not in (
-                                EventType.OPEN_AUX_OUTPUT,
-                                EventType.CLOSE_AUX_OUTPUT,
-                                EventType.AUX_INPUT_DISCONNECT,
-                                EventType.AUX_INPUT_SHORT,
-                            ):
-                                self._door_events[log.port_nr] = log
-                        updated = True
-            except ConnectionError as ex:
-                _LOGGER.error("Realtime log update failed: %s", ex)
-
-            if updated:
-                self._poll_timeout_count = 0
-            else:
-                # Disconnect explicitly, so a re-connect can be performed at the next attempt
-                try:
-                    self.c3_panel.disconnect()
-                finally:
-                    pass
+        drain_start = monotonic()
+        records = 0
+        iterations = 0
+        blocking = 0.0
+        last_record_is_status = False
+        try:
+            while not last_record_is_status:
+                if (
+                    records >= self._rtlog_max_records
+                    or monotonic() - drain_start >= self._rtlog_max_drain_time
+                ):
+                    break
+                requested = monotonic()
+                logs = await self._transport.async_get_rt_log()
+                iterations += 1
+                records += len(logs)
+                process_start = perf_counter()
+                for log in logs:
+                    if isinstance(log, rtlog.DoorAlarmStatusRecord):
+                        if (log.alarm_status, log.dss_status) != (
+                            self._status.alarm_status,
+                            self._status.dss_status,
+                        ):
+                            activity = True
+                        self._status = log
+                        last_record_is_status = True
+                        self._reconcile_commands(requested)
+                    elif isinstance(log, rtlog.EventRecord):
+                        activity = True
+                        self._event_dispatcher.add(log)
+                        self._backfill.async_event_received(log)
+                        self._confirm_command(log)
+                        if log.port_nr > 0 and log.event_type not in (
+                            EventType.OPEN_AUX_OUTPUT,
+                            EventType.CLOSE_AUX_OUTPUT,
+                            EventType.AUX_INPUT_DISCONNECT,
+                            EventType.AUX_INPUT_SHORT,
+                        ):
+                            self._add_door_event(log)
+                    updated = True
+                for listener in self._rtlog_listeners:
+                    listener(logs)
+                blocking += perf_counter() - process_start
+        except ConnectionError as ex:
+            self._connection.record_failure(f"Realtime log update failed: {ex}")
+            _LOGGER.error("Realtime log update failed: %s", ex)
+
+        process_start = perf_counter()
+        self._event_dispatcher.async_flush()
+        self._expire_commands()
+        self._update_changed_ports()
+        blocking += perf_counter() - process_start
+        self._metrics.record_drain(records, iterations, blocking)
+
+        if last_record_is_status:
+            self._rtlog_drained = 0
+        elif updated:
+            self._rtlog_drained += records
+            _LOGGER.debug(
+                "RT log drain budget used after %d records, %d records drained",
+                records,
+                self._rtlog_drained,
+            )
+
+        if activity or self._rtlog_drained or self._commands.has_pending:
+            self._start_fast_poll()
+        else:
+            self._decay_fast_poll()
+
+        if updated:
+            self._connection.record_success()
+            self._scheduler.record_poll(records - int(last_record_is_status))
+        else:
+            # Disconnect explicitly, so a re-connect can be performed at the next attempt
+            await self._transport.async_disconnect()
+            # No fast polling while the panel is unreachable
+            self._fast_poll_interval = None
 
         return updated
 
@@ -185,18 +983,32 @@ class C3Coordinator(DataUpdateCoordinator):
         """Fetch RT log with handling of timeouts.
 
         The RT logs are retrieved, with a small timeout of 5 seconds.
-        When multiple consecutive fetch actions fail, the connection to the panel
-        is actively disconnected to reset the connection at the next poll attempt.
+        The drain budget of a single poll is kept below this timeout.
+        The panel I/O runs on the transport worker thread, so the timeout cancels
+        the wait for the poll without blocking the event loop.
+        When multiple consecutive fetch actions fail, the circuit breaker opens and
+        the connection to the panel is actively disconnected, to reset the
+        connection at the next (backed off) attempt. A poll that timed out while
+        waiting for a table read (e.g. the backfill) is not counted as failure.
         """
+        start = monotonic()
+        updated = False
+        self._refreshing = True
         try:
-            async with async_timeout.timeout(5):
-                return self._poll_rt_log()
-        except (asyncio.TimeoutError, requests.exceptions.Timeout):
-            self._poll_timeout_count = self._poll_timeout_count + 1
-            if self._poll_timeout_count > 5:
+            async with asyncio.timeout(DEFAULT_POLL_TIMEOUT):
+                updated = await self._async_poll_rt_log()
+                return updated
+        except asyncio.TimeoutError:
+            self._metrics.timeouts += 1
+            if self._transport.bulk_call_running:
+                # The poll waited for a table read, the panel is still reachable
+                _LOGGER.debug("Poll of %s delayed by a table read", self.c3_panel.host)
+                return updated
+            self._fast_poll_interval = None
+            if self._connection.record_failure("Poll timed out"):
                 # Disconnect explicitly, so a re-connect can be performed at the next attempt
-                try:
-                    self.c3_panel.disconnect()
-                finally:
-                    pass
+                await self._transport.async_disconnect()
             raise
+        finally:
+            self._refreshing = False
+            self._metrics.record_poll(monotonic() - start, updated)
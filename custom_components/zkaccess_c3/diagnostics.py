@@ -0,0 +1,56 @@
+"""Diagnostics support for the C3 panel."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_PROXY_PASSWORD, DATA_C3_COORDINATOR, DOMAIN
+from .coordinator import C3Coordinator
+
+TO_REDACT = {CONF_PASSWORD, CONF_PROXY_PASSWORD, "card_no", "pin"}
+# The keys of the backfill cursor contain the card number and PIN of the events
+BACKFILL_TO_REDACT = {"keys"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: C3Coordinator = hass.data[DOMAIN][config_entry.entry_id][
+        DATA_C3_COORDINATOR
+    ]
+
+    panel_info = coordinator.panel_info
+    door_history = {}
+    for door_nr in range(1, (panel_info.nr_of_locks if panel_info else 0) + 1):
+        if history := coordinator.door_history(door_nr):
+            door_history[door_nr] = [
+                entry._asdict() for entry in history.last(len(history))
+            ]
+
+    return {
+        "entry": async_redact_data(config_entry.as_dict(), TO_REDACT),
+        "panel": panel_info.as_dict() if panel_info else None,
+        "door_history": async_redact_data(door_history, TO_REDACT),
+        "backfill": async_redact_data(
+            coordinator.backfill.as_dict(), BACKFILL_TO_REDACT
+        ),
+        "commands": coordinator.commands.metrics.as_dict(),
+        "metrics": coordinator.metrics.as_dict(),
+        "rtlog": {
+            "drain_incomplete": coordinator.rtlog_drain_incomplete,
+            "drained": coordinator.rtlog_drained,
+        },
+        "queue": coordinator.queue_metrics.as_dict(),
+        "connection": coordinator.connection.as_dict(),
+        "scheduler": coordinator.scheduler.as_dict(),
+        "tracing": coordinator.tracer.as_dict(),
+        "proxy": coordinator.proxy.as_dict() if coordinator.proxy else None,
+        "export": {
+            name: writer.as_dict() for name, writer in coordinator.exporters.items()
+        },
+    }
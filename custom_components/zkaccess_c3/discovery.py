@@ -1,61 +1,152 @@
-"""Helper and wrapper classes for ZKAccess discovery."""
+"""Network discovery of ZKAccess C3 panels."""
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections.abc import Callable, Iterable
+from dataclasses import asdict
 
-from c3 import C3
-from homeassistant.core import HomeAssistant
+from c3 import C3, consts
+from c3.core import C3DeviceInfo
+from homeassistant.components import network
+from homeassistant.config_entries import SOURCE_INTEGRATION_DISCOVERY
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import discovery_flow
 
-from .const import DISCOVERY_TIMEOUT
+from .const import DISCOVERY_TIMEOUT, DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
+DISCOVERY_BROADCAST_ADDRESS = ("255.255.255.255", consts.C3_PORT_BROADCAST)
+
+
+class C3DiscoveryProtocol(asyncio.DatagramProtocol):
+    """Receiver of the replies to a discovery broadcast on a single interface."""
+
+    def __init__(self, on_reply: Callable[[C3DeviceInfo], None]) -> None:
+        """Initialize the protocol, calling on_reply for each panel that replies."""
+        self._on_reply = on_reply
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        """Parse a discovery reply."""
+        # pylint: disable=protected-access
+        try:
+            command, data_size, _ = C3._get_message_header(data)
+            if command != consts.C3_REPLY_OK:
+                return
+            message = C3._get_message(data)
+        except (ValueError, IndexError) as ex:
+            _LOGGER.debug("Invalid discovery reply from %s: %s", addr[0], ex)
+            return
+
+        if len(message) != data_size:
+            _LOGGER.debug("Incomplete discovery reply from %s", addr[0])
+            return
+
+        params = C3._parse_kv_from_message(message)
+        self._on_reply(
+            C3DeviceInfo(
+                host=params.get("IP") or addr[0],
+                mac=params.get("MAC"),
+                serial_number=params.get("SN"),
+                device_name=params.get("Device"),
+                firmware_version=params.get("Ver"),
+            )
+        )
+
+    def error_received(self, exc: Exception) -> None:
+        """Log a send or receive error."""
+        _LOGGER.debug("Discovery error: %s", exc)
+
+
+async def async_get_ipv4_addresses(hass: HomeAssistant) -> list[str]:
+    """Return the addresses of all enabled IPv4 network interfaces."""
+    adapters = await network.async_get_adapters(hass)
+    return [
+        ip_info["address"]
+        for adapter in adapters
+        if adapter["enabled"]
+        for ip_info in adapter["ipv4"]
+    ]
+
+
+async def async_discover_panels(
+    interface_addresses: Iterable[str],
+    on_device: Callable[[C3DeviceInfo], None] | None = None,
+    timeout: float = DISCOVERY_TIMEOUT,
+    target: tuple[str, int] = DISCOVERY_BROADCAST_ADDRESS,
+) -> list[C3DeviceInfo]:
+    """Discover the C3 panels on the networks of the given interfaces.
+
+    The discovery request is broadcast on all interfaces at once, after which
+    the replies are collected during the timeout. Each panel is reported once
+    (by MAC address) to on_device as soon as its reply arrives.
+    """
+    loop = asyncio.get_running_loop()
+    devices: dict[str, C3DeviceInfo] = {}
+
+    def _on_reply(device_info: C3DeviceInfo) -> None:
+        key = device_info.mac or device_info.serial_number or device_info.host
+        if key in devices:
+            return
+        _LOGGER.debug("Found device (%s): %s", key, device_info)
+        devices[key] = device_info
+        if on_device is not None:
+            on_device(device_info)
+
+    async def _async_open(address: str) -> asyncio.DatagramTransport | None:
+        try:
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: C3DiscoveryProtocol(_on_reply),
+                local_addr=(address, 0),
+                allow_broadcast=True,
+            )
+        except OSError as ex:
+            _LOGGER.debug("Discovery on %s not possible: %s", address, ex)
+            return None
+        return transport
+
+    # pylint: disable-next=protected-access
+    request = C3._construct_message(
+        None, None, consts.Command.DISCOVER, consts.C3_DISCOVERY_MESSAGE
+    )
+    transports = [
+        transport
+        for transport in await asyncio.gather(
+            *(_async_open(address) for address in interface_addresses)
+        )
+        if transport is not None
+    ]
+    try:
+        for transport in transports:
+            transport.sendto(request, target)
+        await asyncio.sleep(timeout)
+    finally:
+        for transport in transports:
+            transport.close()
+
+    return list(devices.values())
+
 
 class C3DiscoveryService:
-    """Discovery event handler for gree devices."""
+    """Discovery of C3 panels, starting a config flow for each panel found."""
 
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize discovery service."""
-        # super().__init__()
         self.hass = hass
 
-        # self.discovery = Discovery(DISCOVERY_TIMEOUT)
-        # self.discovery.add_listener(self)
-
-        # hass.data[DOMAIN].setdefault(COORDINATORS, [])
-
-    def scan(self):
+    async def async_scan(self) -> None:
         """Scan for devices on the local network."""
-        devices = C3.discover(timeout=DISCOVERY_TIMEOUT)
-        for device in devices:
-            _LOGGER.debug("Found device (%s):\n%s", {device.mac or "?"}, repr(device))
-
-    # async def device_found(self, device_info: DeviceInfo) -> None:
-    #    """Handle new device found on the network."""
-
-    #    device = Device(device_info)
-    #    try:
-    #        await device.bind()
-    #    except DeviceNotBoundError:
-    #        _LOGGER.error("Unable to bind to gree device: %s", device_info)
-    #    except DeviceTimeoutError:
-    #        _LOGGER.error("Timeout trying to bind to gree device: %s", device_info)
-
-    #    _LOGGER.info(
-    #        "Adding Gree device %s at %s:%i",
-    #        device.device_info.name,
-    #        device.device_info.ip,
-    #        device.device_info.port,
-    #    )
-    #    coordo = DeviceDataUpdateCoordinator(self.hass, device)
-    #    self.hass.data[DOMAIN][COORDINATORS].append(coordo)
-    #    await coordo.async_refresh()
-    #
-    #    async_dispatcher_send(self.hass, DISPATCH_DEVICE_DISCOVERED, coordo)
-
-    # async def device_update(self, device_info: DeviceInfo) -> None:
-    #    """Handle updates in device information, update if ip has changed."""
-    #    for coordinator in self.hass.data[DOMAIN][COORDINATORS]:
-    #        if coordinator.device.device_info.mac == device_info.mac:
-    #            coordinator.device.device_info.ip = device_info.ip
-    #            await coordinator.async_refresh()
+        await async_discover_panels(
+            await async_get_ipv4_addresses(self.hass), self.device_found
+        )
+
+    @callback
+    def device_found(self, device_info: C3DeviceInfo) -> None:
+        """Handle new device found on the network."""
+        discovery_flow.async_create_flow(
+            self.hass,
+            DOMAIN,
+            context={"source": SOURCE_INTEGRATION_DISCOVERY},
+            data=asdict(device_info),
+        )
@@ -0,0 +1,92 @@
+"""Event entity implementation for C3 door events."""
+from __future__ import annotations
+
+from datetime import datetime
+
+from c3.consts import EventType, VerificationMode
+from homeassistant.components.event import EventEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DATA_C3_COORDINATOR, DOMAIN
+from .coordinator import C3Coordinator, C3PortType
+
+_EVENT_TYPES = [event_type.name.lower() for event_type in EventType]
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the door event entities based on config_entry."""
+    c3_coordinator = hass.data[DOMAIN][config_entry.entry_id][DATA_C3_COORDINATOR]
+    doors = hass.data[DOMAIN][config_entry.entry_id][Platform.LOCK]
+
+    async_add_entities(
+        C3DoorEventEntity(c3_coordinator, door_idx) for door_idx in doors
+    )
+
+
+class C3DoorEventEntity(CoordinatorEntity, EventEntity):
+    """Entity representing the events of a C3 panel door."""
+
+    def __init__(self, coordinator: C3Coordinator, idx: int) -> None:
+        """Pass coordinator to CoordinatorEntity."""
+        super().__init__(coordinator, context=(C3PortType.DOOR_EVENT, idx))
+        self._coordinator = coordinator
+        self._idx = idx
+        self._attr_event_types = _EVENT_TYPES
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, self._coordinator.serial_number)},
+        )
+        history = self._coordinator.door_history(idx)
+        self._history_total = history.total if history else 0
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator.
+
+        Only the most recent event is triggered, the preceding events of the same
+        poll are available in the door history.
+        """
+        history = self._coordinator.door_history(self._idx)
+        if history is not None and history.total != self._history_total:
+            self._history_total = history.total
+            entry = history.last(1)[0]
+            self._trigger_event(
+                EventType(entry.event_type).name.lower(),
+                {
+                    "card_no": entry.card_no,
+                    "verify_mode": VerificationMode(entry.verify_mode).name.lower(),
+                    "event_time": datetime.fromtimestamp(entry.timestamp).isoformat()
+                    if entry.timestamp
+                    else None,
+                },
+            )
+
+        self.async_write_ha_state()
+
+    @property
+    def name(self) -> str | None:
+        """Return the display name of this entity."""
+        return f"Door {self._idx} event"
+
+    @property
+    def should_poll(self) -> bool:
+        """Disable polling, the C3 coordinator polls."""
+        return False
+
+    @property
+    def unique_id(self) -> str | None:
+        """Get unique ID."""
+        return f"{self._coordinator.serial_number}-event{self._idx}"
+
+    @property
+    def icon(self) -> str | None:
+        """Icon of the entity."""
+        return "mdi:door-sliding-lock"
@@ -0,0 +1,106 @@
+"""Publication of the C3 panel RT log events on the Home Assistant event bus."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import TypedDict
+
+from c3 import rtlog
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import EVENT_C3, EVENT_C3_BATCH
+
+
+class C3EventData(TypedDict):
+    """Data of a zkaccess_c3_event."""
+
+    device_id: str | None
+    serial_number: str
+    door: int
+    card_no: int
+    pin: int
+    verify_mode: str
+    event_type: str
+    event_code: int
+    event_description: str
+    direction: str
+    time: str | None
+    backfill: bool
+
+
+class C3EventDispatcher:
+    """Batched publication of RT log event records.
+
+    The event data is built when a record is received, and all events of a
+    poll cycle are fired as a single zkaccess_c3_events event when the cycle
+    completes. Only when there are listeners for the separate events (e.g. the
+    event triggers of automations), a zkaccess_c3_event is fired per record as
+    well. The dispatcher listeners receive each fired batch, e.g. to export the
+    events.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the dispatcher."""
+        self._hass = hass
+        self._pending: list[C3EventData] = []
+        self._listeners: list[Callable[[list[C3EventData]], None]] = []
+        self.device_id: str | None = None
+        self.serial_number: str = "?"
+        self.events_fired = 0
+
+    def add(self, record: rtlog.EventRecord, backfill: bool = False) -> None:
+        """Add an event record to the current batch.
+
+        Backfilled records are read from the panel's transaction table, instead
+        of the RT log.
+        """
+        self._pending.append(
+            C3EventData(
+                device_id=self.device_id,
+                serial_number=self.serial_number,
+                door=record.port_nr,
+                card_no=record.card_no,
+                pin=record.pin,
+                verify_mode=record.verified.name.lower(),
+                event_type=record.event_type.name.lower(),
+                event_code=int(record.event_type),
+                event_description=repr(record.event_type),
+                direction=record.in_out_state.name.lower(),
+                time=record.time_second.isoformat() if record.time_second else None,
+                backfill=backfill,
+            )
+        )
+
+    @callback
+    def async_flush(self) -> None:
+        """Fire the events of the current batch."""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, []
+        self._hass.bus.async_fire(
+            EVENT_C3_BATCH,
+            {
+                "device_id": self.device_id,
+                "serial_number": self.serial_number,
+                "events": pending,
+            },
+        )
+        if self._hass.bus.async_listeners().get(EVENT_C3):
+            for event_data in pending:
+                self._hass.bus.async_fire(EVENT_C3, event_data)
+        self.events_fired += len(pending)
+        for listener in self._listeners:
+            listener(pending)
+
+    @callback
+    def async_add_listener(
+        self, listener: Callable[[list[C3EventData]], None]
+    ) -> CALLBACK_TYPE:
+        """Listen for the fired batches of events, returns a function to remove it."""
+        self._listeners.append(listener)
+
+        @callback
+        def _remove_listener() -> None:
+            self._listeners.remove(listener)
+
+        return _remove_listener
@@ -0,0 +1,291 @@
+"""Batched export of the C3 panel access events to external sinks."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_FILE_MAX_SIZE,
+    EXPORT_FLUSH_INTERVAL,
+    EXPORT_MAX_QUEUE,
+    EXPORT_RETRY_DELAY,
+    EXPORT_STOP_TIMEOUT,
+)
+from .events import C3EventData
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class C3ExportSink(ABC):
+    """Destination of exported events."""
+
+    name: str
+
+    @abstractmethod
+    async def async_write(self, batch: list[C3EventData]) -> None:
+        """Write a batch of events, raises an exception when it failed."""
+
+
+class C3FileSink(C3ExportSink):
+    """Append-only file of events, one JSON object per line.
+
+    The file is rotated when it exceeds its maximum size, or at the first write
+    of a new day. Rotated files are renamed with the time of rotation and are
+    never removed.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, path: str, max_size: int = EXPORT_FILE_MAX_SIZE
+    ) -> None:
+        """Initialize the sink for the file at the given path."""
+        self._hass = hass
+        self._path = path
+        self._max_size = max_size
+        self.name = f"file:{path}"
+
+    def _rotate(self) -> None:
+        """Rename the current file, when it is too large or of a previous day."""
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return
+
+        if (
+            stat.st_size < self._max_size
+            and date.fromtimestamp(stat.st_mtime) == date.today()
+        ):
+            return
+
+        base, ext = os.path.splitext(self._path)
+        rotated = f"{base}_{datetime.now().strftime('%Y%m%d%H%M%S')}{ext}"
+        os.replace(self._path, rotated)
+        _LOGGER.debug("Rotated event export to %s", rotated)
+
+    def _write(self, lines: str) -> None:
+        """Append the lines to the file, and sync it to disk."""
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        self._rotate()
+        with open(self._path, "a", encoding="utf-8") as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    async def async_write(self, batch: list[C3EventData]) -> None:
+        """Append a batch of events to the file, on an executor thread."""
+        lines = "".join(json.dumps(event) + "\n" for event in batch)
+        await self._hass.async_add_executor_job(self._write, lines)
+
+
+class C3MqttSink(C3ExportSink):
+    """Publication of events to a topic of the MQTT integration."""
+
+    def __init__(self, hass: HomeAssistant, topic: str) -> None:
+        """Initialize the sink for the given topic."""
+        self._hass = hass
+        self._topic = topic
+        self.name = f"mqtt:{topic}"
+
+    async def async_write(self, batch: list[C3EventData]) -> None:
+        """Publish each event of the batch as a separate message."""
+        # pylint: disable-next=import-outside-toplevel
+        from homeassistant.components import mqtt
+
+        for event in batch:
+            await mqtt.async_publish(self._hass, self._topic, json.dumps(event), qos=1)
+
+
+@dataclass
+class C3ExportMetrics:
+    """Statistics of an export writer."""
+
+    queued: int = 0
+    written: int = 0
+    batches: int = 0
+    dropped: int = 0
+    failures: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    last_error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as dictionary."""
+        return {
+            "queued": self.queued,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failures": self.failures,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "last_error": self.last_error,
+        }
+
+
+class C3ExportWriter:
+    """Buffered, batched writer of events to a single sink.
+
+    Events are added to a bounded queue on the event loop, without waiting for
+    the sink. A background task writes the queue in batches, when a full batch
+    is queued or when the oldest queued event waited for the flush interval.
+    While the sink fails, the events remain queued and the write is retried
+    after a delay; when the queue is full, new events are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        sink: C3ExportSink,
+        batch_size: int = EXPORT_BATCH_SIZE,
+        flush_interval: float = EXPORT_FLUSH_INTERVAL,
+        max_queue: int = EXPORT_MAX_QUEUE,
+    ) -> None:
+        """Initialize the writer of the sink."""
+        self._hass = hass
+        self._sink = sink
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_queue = max_queue
+        self._queue: deque[C3EventData] = deque()
+        self._flush = asyncio.Event()
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        self._retrying = False
+        self._task: asyncio.Task | None = None
+        self.metrics = C3ExportMetrics()
+
+    @property
+    def name(self) -> str:
+        """Return the name of the sink."""
+        return self._sink.name
+
+    @callback
+    def async_start(self) -> None:
+        """Start the background task writing the batches."""
+        self._task = self._hass.async_create_background_task(
+            self._async_process_queue(), f"C3 export {self._sink.name}"
+        )
+
+    @callback
+    def async_add(self, events: list[C3EventData]) -> None:
+        """Queue events for export."""
+        for event in events:
+            if len(self._queue) >= self._max_queue:
+                if not self.metrics.dropped:
+                    _LOGGER.warning(
+                        "Export queue of %s is full, events are dropped",
+                        self._sink.name,
+                    )
+                self.metrics.dropped += 1
+                continue
+            self._queue.append(event)
+            self.metrics.queued += 1
+        self._update_queue_depth()
+
+        if self._retrying:
+            # The next attempt is already scheduled
+            return
+        if len(self._queue) >= self._batch_size:
+            self._flush.set()
+        elif self._queue and self._unsub_flush is None:
+            self._schedule_flush(self._flush_interval)
+
+    @callback
+    def _schedule_flush(self, delay: float) -> None:
+        """Flush the queue after the delay."""
+
+        @callback
+        def _async_flush(_: Any) -> None:
+            self._unsub_flush = None
+            self._flush.set()
+
+        self._unsub_flush = async_call_later(self._hass, delay, _async_flush)
+
+    def _update_queue_depth(self) -> None:
+        """Update the queue depth statistics."""
+        self.metrics.queue_depth = len(self._queue)
+        self.metrics.max_queue_depth = max(
+            self.metrics.max_queue_depth, self.metrics.queue_depth
+        )
+
+    async def _async_write_batch(self) -> bool:
+        """Write the oldest queued events, returns whether the write succeeded."""
+        batch = [
+            self._queue.popleft()
+            for _ in range(min(len(self._queue), self._batch_size))
+        ]
+        try:
+            await self._sink.async_write(batch)
+        except asyncio.CancelledError:
+            self._queue.extendleft(reversed(batch))
+            raise
+        except Exception as ex:  # pylint: disable=broad-except
+            # Keep the events, in order, for the next attempt
+            self._queue.extendleft(reversed(batch))
+            self.metrics.failures += 1
+            self.metrics.last_error = str(ex)
+            _LOGGER.debug(
+                "Export of %d events to %s failed: %s", len(batch), self._sink.name, ex
+            )
+            return False
+
+        self.metrics.written += len(batch)
+        self.metrics.batches += 1
+        self._update_queue_depth()
+        return True
+
+    async def _async_process_queue(self) -> None:
+        """Write all queued events in batches, each time a flush is requested."""
+        while True:
+            await self._flush.wait()
+            self._flush.clear()
+            if self._unsub_flush is not None:
+                self._unsub_flush()
+                self._unsub_flush = None
+
+            self._retrying = False
+            while self._queue:
+                if not await self._async_write_batch():
+                    self._retrying = True
+                    self._schedule_flush(EXPORT_RETRY_DELAY)
+                    break
+
+    async def async_stop(self) -> None:
+        """Write the queued events and stop the writer.
+
+        The queued events are written as long as the sink accepts them, for at
+        most the stop timeout.
+        """
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        try:
+            async with asyncio.timeout(EXPORT_STOP_TIMEOUT):
+                while self._queue and await self._async_write_batch():
+                    pass
+        except asyncio.TimeoutError:
+            pass
+        if self._queue:
+            _LOGGER.warning(
+                "%d events not exported to %s", len(self._queue), self._sink.name
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the writer as dictionary."""
+        return self.metrics.as_dict()
@@ -0,0 +1,87 @@
+"""Compact event history of C3 panel doors."""
+from __future__ import annotations
+
+import struct
+from collections.abc import Iterator
+from typing import NamedTuple
+
+# Timestamp (seconds since epoch), event type, card number, verify mode. The event
+# type is signed, the library reports unknown (999) and absent (-1) event types
+_RECORD = struct.Struct("<dhIB")
+
+
+class C3HistoryEntry(NamedTuple):
+    """An event in the history of a door."""
+
+    timestamp: float
+    event_type: int
+    card_no: int
+    verify_mode: int
+
+
+class C3EventHistory:
+    """Fixed-capacity ring buffer of door events.
+
+    The events are packed into a single pre-allocated buffer, so the memory use
+    is constant and no Python object is kept alive per event. Entries are only
+    unpacked when queried.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """Initialize an empty history for the given number of events."""
+        self._capacity = capacity
+        self._buffer = bytearray(_RECORD.size * capacity)
+        self._next = 0
+        self._count = 0
+        self.total = 0
+
+    def __len__(self) -> int:
+        """Return the number of events in the history."""
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        """Return the maximum number of events kept."""
+        return self._capacity
+
+    def append(
+        self, timestamp: float, event_type: int, card_no: int, verify_mode: int
+    ) -> None:
+        """Add an event, replacing the oldest event when the history is full."""
+        _RECORD.pack_into(
+            self._buffer,
+            self._next * _RECORD.size,
+            timestamp,
+            event_type,
+            card_no,
+            verify_mode,
+        )
+        self._next = (self._next + 1) % self._capacity
+        self._count = min(self._count + 1, self._capacity)
+        self.total += 1
+
+    def _iter_newest_first(self) -> Iterator[C3HistoryEntry]:
+        """Iterate over the events, starting with the most recent event."""
+        for offset in range(1, self._count + 1):
+            index = (self._next - offset) % self._capacity
+            yield C3HistoryEntry(
+                *_RECORD.unpack_from(self._buffer, index * _RECORD.size)
+            )
+
+    def last(self, count: int = 1) -> list[C3HistoryEntry]:
+        """Return the last events, most recent first."""
+        entries = []
+        for entry in self._iter_newest_first():
+            if len(entries) >= count:
+                break
+            entries.append(entry)
+        return entries
+
+    def since(self, timestamp: float) -> list[C3HistoryEntry]:
+        """Return the events at or after the timestamp, most recent first."""
+        entries = []
+        for entry in self._iter_newest_first():
+            if entry.timestamp < timestamp:
+                break
+            entries.append(entry)
+        return entries
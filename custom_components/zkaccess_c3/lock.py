@@ -16,7 +16,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DATA_C3_COORDINATOR, DOMAIN
-from .coordinator import C3Coordinator
+from .coordinator import C3Coordinator, C3PortType
 
 _LOGGER = logging.getLogger(__name__)
 _ICON_LOCK_UNKNOWN = "mdi:door"
@@ -42,11 +42,18 @@ async def async_setup_entry(
 
 
 class C3LockEntity(CoordinatorEntity, LockEntity):
-    """Entity representing the C3 panel door locks."""
+    """Entity representing the C3 panel door locks.
+
+    The door settings attributes are static, they are not recorded.
+    """
+
+    _unrecorded_attributes = frozenset(
+        {"sensor_type", "lock_drive_time", "door_alarm_timeout"}
+    )
 
     def __init__(self, coordinator: C3Coordinator, idx: int) -> None:
         """Pass coordinator to CoordinatorEntity."""
-        super().__init__(coordinator, context=idx)
+        super().__init__(coordinator, context=(C3PortType.DOOR, idx))
         self._coordinator = coordinator
         self._idx = idx
         """The lock does not support opening, it only represents status"""
@@ -55,35 +62,37 @@ class C3LockEntity(CoordinatorEntity, LockEntity):
         self._attr_is_locking = None
         self._attr_is_unlocking = None
         self._attr_is_jammed = None
+        door_settings = self._coordinator.door_settings.get(idx)
         self._attr_extra_state_attributes: MutableMapping[str, Any] = {
-            "sensor_type": repr(
-                self._coordinator.c3_panel.door_settings(idx).sensor_type
-            ),
-            "lock_drive_time": self._coordinator.c3_panel.door_settings(
-                idx
-            ).lock_drive_time,
-            "door_alarm_timeout": self._coordinator.c3_panel.door_settings(
-                idx
-            ).door_alarm_timeout,
+            "sensor_type": repr(door_settings.sensor_type) if door_settings else None,
+            "lock_drive_time": door_settings.lock_drive_time if door_settings else None,
+            "door_alarm_timeout": door_settings.door_alarm_timeout
+            if door_settings
+            else None,
         }
         self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, self._coordinator.c3_panel.serial_number)},
+            identifiers={(DOMAIN, self._coordinator.serial_number)},
         )
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        if self._coordinator.c3_panel.lock_status(self._idx) == InOutStatus.OPEN:
+        """Handle updated data from the coordinator.
+
+        While a lock or unlock command is not confirmed by the panel, the lock
+        is shown as locking or unlocking.
+        """
+        lock_status = self._coordinator.c3_panel.lock_status(self._idx)
+        if lock_status == InOutStatus.OPEN:
             self._attr_is_locked = False
-            self._attr_is_locking = False
-            self._attr_is_unlocking = False
-        elif self._coordinator.c3_panel.lock_status(self._idx) == InOutStatus.CLOSED:
+        elif lock_status == InOutStatus.CLOSED:
             self._attr_is_locked = True
-            self._attr_is_locking = False
-            self._attr_is_unlocking = False
         else:
             self._attr_is_locked = None
 
+        command = self._coordinator.commands.pending((C3PortType.DOOR, self._idx))
+        self._attr_is_locking = command is not None and not command.activate
+        self._attr_is_unlocking = command is not None and command.activate
+
         self._attr_is_jammed = None  # self._coordinator.status.has_alarm(self._idx, AlarmStatus.DOOR_OPEN_TIMEOUT)
 
         self.async_write_ha_state()
@@ -101,33 +110,35 @@ class C3LockEntity(CoordinatorEntity, LockEntity):
     @property
     def unique_id(self):
         """Get unique ID."""
-        return f"{self._coordinator.c3_panel.serial_number}-lock{self._idx}"
+        return f"{self._coordinator.serial_number}-lock{self._idx}"
 
     @property
     def icon(self) -> str | None:
         """Icon of the entity."""
         return _ICON_LOCK_IS_LOCKED[self._attr_is_locked]
 
-    def lock(self, **kwargs: Any) -> None:
-        """Lock the lock."""
-        control_command = ControlDeviceOutput(
-            self._idx, ControlOutputAddress.DOOR_OUTPUT, 0
+    def output_command(
+        self, activate: bool, duration: int | None = None
+    ) -> ControlDeviceOutput:
+        """Return the command to unlock (activate) or lock the door."""
+        return ControlDeviceOutput(
+            self._idx,
+            ControlOutputAddress.DOOR_OUTPUT,
+            (duration or self._coordinator.unlock_duration) if activate else 0,
         )
+
+    async def async_lock(self, **kwargs: Any) -> None:
+        """Lock the lock."""
+        control_command = self.output_command(False)
         try:
-            self._coordinator.c3_panel.control_device(control_command)
-            self._attr_is_locking = True
+            await self._coordinator.async_control_device(control_command)
         except ConnectionError as ex:
             _LOGGER.error("Lock of door %d failure: %s", self._idx, ex)
 
-    def unlock(self, **kwargs: Any) -> None:
+    async def async_unlock(self, **kwargs: Any) -> None:
         """Unlock the lock."""
-        control_command = ControlDeviceOutput(
-            self._idx,
-            ControlOutputAddress.DOOR_OUTPUT,
-            self._coordinator.unlock_duration,
-        )
+        control_command = self.output_command(True)
         try:
-            self._coordinator.c3_panel.control_device(control_command)
-            self._attr_is_unlocking = True
+            await self._coordinator.async_control_device(control_command)
         except ConnectionError as ex:
             _LOGGER.error("Unlock of door %d failure: %s", self._idx, ex)
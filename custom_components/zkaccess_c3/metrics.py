@@ -0,0 +1,113 @@
+"""Performance metrics of the polling of a C3 panel."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any
+
+# Upper bounds of the histogram buckets, the last bucket holds all larger values
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 200)
+
+
+class C3Histogram:
+    """Fixed bucket histogram, with the count, sum, maximum and last value."""
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        """Initialize an empty histogram with the bucket upper bounds."""
+        self._bounds = bounds
+        self._buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max: float | None = None
+        self.last: float | None = None
+
+    def observe(self, value: float) -> None:
+        """Add a value to the histogram."""
+        self._buckets[bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.last = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def average(self) -> float | None:
+        """Return the average of all values."""
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram as dictionary, with the count per bucket."""
+        return {
+            "count": self.count,
+            "average": round(self.average, 3) if self.average is not None else None,
+            "max": self.max,
+            "last": self.last,
+            "buckets": {
+                f"<={bound}": count for bound, count in zip(self._bounds, self._buckets)
+            }
+            | {f">{self._bounds[-1]}": self._buckets[-1]},
+        }
+
+
+@dataclass
+class C3PollMetrics:
+    """Counters and histograms of the polls and commands of a panel.
+
+    Durations are in milliseconds. The loop blocking time is the time the
+    records of a poll were processed on the event loop.
+    """
+
+    polls: int = 0
+    poll_failures: int = 0
+    timeouts: int = 0
+    reconnects: int = 0
+    records: int = 0
+    poll_duration: C3Histogram = field(
+        default_factory=lambda: C3Histogram(DURATION_BUCKETS_MS)
+    )
+    records_per_poll: C3Histogram = field(
+        default_factory=lambda: C3Histogram(COUNT_BUCKETS)
+    )
+    drain_iterations: C3Histogram = field(
+        default_factory=lambda: C3Histogram(COUNT_BUCKETS)
+    )
+    control_latency: C3Histogram = field(
+        default_factory=lambda: C3Histogram(DURATION_BUCKETS_MS)
+    )
+    loop_blocking: C3Histogram = field(
+        default_factory=lambda: C3Histogram(DURATION_BUCKETS_MS)
+    )
+
+    def record_poll(self, duration: float, success: bool) -> None:
+        """Record a poll, with its duration in seconds."""
+        self.polls += 1
+        if not success:
+            self.poll_failures += 1
+        self.poll_duration.observe(round(duration * 1000, 1))
+
+    def record_drain(self, records: int, iterations: int, blocking: float) -> None:
+        """Record the RT log drain of a poll, with the blocking time in seconds."""
+        self.records += records
+        self.records_per_poll.observe(records)
+        self.drain_iterations.observe(iterations)
+        self.loop_blocking.observe(round(blocking * 1000, 2))
+
+    def record_control(self, latency: float) -> None:
+        """Record the round-trip of a control command, in seconds."""
+        self.control_latency.observe(round(latency * 1000, 1))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as dictionary."""
+        return {
+            "polls": self.polls,
+            "poll_failures": self.poll_failures,
+            "timeouts": self.timeouts,
+            "reconnects": self.reconnects,
+            "records": self.records,
+            "poll_duration_ms": self.poll_duration.as_dict(),
+            "records_per_poll": self.records_per_poll.as_dict(),
+            "drain_iterations": self.drain_iterations.as_dict(),
+            "control_latency_ms": self.control_latency.as_dict(),
+            "loop_blocking_ms": self.loop_blocking.as_dict(),
+        }
@@ -0,0 +1,374 @@
+"""Local multiplexing proxy, sharing the session with a C3 panel."""
+from __future__ import annotations
+
+import asyncio
+import hmac
+import itertools
+import logging
+import re
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from ipaddress import ip_address
+from typing import Any
+
+from c3 import C3, rtlog
+from c3.consts import C3_MESSAGE_START, C3_REPLY_ERROR, C3_REPLY_OK, Command, EventType
+from c3.utils import C3DateTime
+from homeassistant.core import callback
+
+from .const import (
+    PROXY_MAX_PENDING_RECORDS,
+    PROXY_RECORDS_PER_REPLY,
+    PROXY_REQUEST_TIMEOUT,
+)
+from .transport import C3Priority, C3Transport
+
+_LOGGER = logging.getLogger(__name__)
+
+# Error codes of the C3 protocol, as used in error replies
+ERROR_COMMAND = -13
+ERROR_PASSWORD = -14
+_REPLY_ERROR = re.compile(r"Error (-?\d+) received in reply")
+# Session ID in the header of a connect request, before a session is set up
+CONNECT_SESSION_ID = 0xFEFE
+
+
+def _time_value(time_second: Any) -> int:
+    """Return the time of a record in the panel time format."""
+    if isinstance(time_second, C3DateTime):
+        return time_second.to_value()
+    return int(time_second or 0)
+
+
+def encode_rt_log_record(
+    record: rtlog.EventRecord | rtlog.DoorAlarmStatusRecord,
+) -> bytes | None:
+    """Return the binary (16 bytes) RT log format of a record.
+
+    Returns None for an event the library could not decode, which can not be
+    encoded again.
+    """
+    if isinstance(record, rtlog.DoorAlarmStatusRecord):
+        data = (
+            bytes(record.alarm_status[:4]).ljust(4, b"\0")
+            + bytes(record.dss_status[:4]).ljust(4, b"\0")
+            + bytes([0, int(record.verified), EventType.DOOR_ALARM_STATUS, 0])
+        )
+    elif record.event_type == EventType.UNKNOWN_UNSUPPORTED:
+        return None
+    else:
+        data = (
+            (record.card_no & 0xFFFFFFFF).to_bytes(4, "little")
+            + (record.pin & 0xFFFFFFFF).to_bytes(4, "little")
+            + bytes(
+                [
+                    int(record.verified) & 0xFF,
+                    record.port_nr & 0xFF,
+                    int(record.event_type),
+                    int(record.in_out_state) & 0xFF,
+                ]
+            )
+        )
+    return data + _time_value(record.time_second).to_bytes(4, "little")
+
+
+def is_loopback_address(host: str) -> bool:
+    """Return whether the host is a loopback IP address."""
+    try:
+        return ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def connect_password(command: int, message: bytes | bytearray) -> bytes:
+    """Return the password field of a connect request.
+
+    A session connect request starts with the session header (the initial
+    session ID and a request number), followed by the password. A session-less
+    connect request only holds the password. The password is padded with NUL
+    characters by some clients.
+    """
+    if (
+        command == Command.CONNECT_SESSION
+        and len(message) >= 4
+        and int.from_bytes(message[:2], "little") == CONNECT_SESSION_ID
+    ):
+        message = message[4:]
+    return bytes(message).rstrip(b"\0")
+
+
+@dataclass
+class C3ProxyMetrics:
+    """Statistics of the proxy clients and their requests."""
+
+    clients: int = 0
+    max_clients: int = 0
+    connections: int = 0
+    requests: int = 0
+    forwarded: int = 0
+    errors: int = 0
+    records_sent: int = 0
+    records_dropped: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as dictionary."""
+        return {
+            "clients": self.clients,
+            "max_clients": self.max_clients,
+            "connections": self.connections,
+            "requests": self.requests,
+            "forwarded": self.forwarded,
+            "errors": self.errors,
+            "records_sent": self.records_sent,
+            "records_dropped": self.records_dropped,
+        }
+
+
+class _C3ProxyClient:
+    """Session of a downstream client, with its pending RT log records."""
+
+    def __init__(self, session_id: int, peer: str) -> None:
+        """Initialize a client that did not connect a session yet."""
+        self.session_id = session_id
+        self.peer = peer
+        self.connected = False
+        self.session_less = True
+        self.pending: deque[bytes] = deque(maxlen=PROXY_MAX_PENDING_RECORDS)
+
+
+class C3Proxy:
+    """TCP server speaking the C3 protocol, on behalf of a single panel session.
+
+    Downstream clients (e.g. the ZKAccess software or a monitoring system)
+    connect to the proxy as if it were the panel. The RT log records read by
+    the coordinator are fanned out to a bounded queue per client, so RT log
+    requests of the clients are answered locally and any number of readers add
+    no load on the panel. All other commands are forwarded through the queue
+    of the transport, serialized with the polls and commands of the
+    integration. When the queue of a slow client is full, its oldest records
+    are dropped.
+    """
+
+    def __init__(
+        self,
+        transport: C3Transport,
+        host: str,
+        port: int,
+        password: str,
+        command_sent: Callable[[], None] | None = None,
+    ) -> None:
+        """Initialize the proxy, listening on the given address when started.
+
+        The optional command_sent callback is called after a control command of
+        a client was forwarded to the panel.
+        """
+        self._transport = transport
+        self.password = password
+        self._command_sent = command_sent
+        self._server: asyncio.Server | None = None
+        self._clients: dict[int, _C3ProxyClient] = {}
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._session_ids = itertools.count(0x1001)
+        self._status: bytes | None = None
+        self.host = host
+        self.port = port
+        self.metrics = C3ProxyMetrics()
+
+    async def async_start(self) -> None:
+        """Start listening for clients."""
+        self._server = await asyncio.start_server(
+            self._async_handle_client, host=self.host, port=self.port
+        )
+        _LOGGER.info(
+            "Proxy for C3 %s listening on %s port %d",
+            self._transport.panel.host,
+            self.host,
+            self.port,
+        )
+
+    async def async_stop(self) -> None:
+        """Stop listening and close the connections of all clients."""
+        if self._server is None:
+            return
+
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+        _LOGGER.info("Proxy for C3 %s stopped", self._transport.panel.host)
+
+    @callback
+    def async_publish(
+        self, records: list[rtlog.EventRecord | rtlog.DoorAlarmStatusRecord]
+    ) -> None:
+        """Queue the RT log records read from the panel for all clients.
+
+        The last status record is kept, and returned to each client when all its
+        event records are sent, as the panel does.
+        """
+        for record in records:
+            if (data := encode_rt_log_record(record)) is None:
+                continue
+            if isinstance(record, rtlog.DoorAlarmStatusRecord):
+                self._status = data
+                continue
+            for client in self._clients.values():
+                if not client.connected:
+                    continue
+                if len(client.pending) == client.pending.maxlen:
+                    self.metrics.records_dropped += 1
+                client.pending.append(data)
+
+    async def _async_handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve the requests of a client, until it disconnects."""
+        peer = str(writer.get_extra_info("peername"))
+        client = _C3ProxyClient(next(self._session_ids) & 0xFFFF or 1, peer)
+        self._clients[client.session_id] = client
+        self._writers.add(writer)
+        self.metrics.connections += 1
+        self.metrics.clients = len(self._clients)
+        self.metrics.max_clients = max(self.metrics.max_clients, len(self._clients))
+        _LOGGER.debug("Proxy client %s connected", peer)
+        try:
+            while True:
+                header = await reader.readexactly(5)
+                if header[0] != C3_MESSAGE_START:
+                    raise ValueError("Request does not start with start token")
+                size = header[3] + header[4] * 256
+                # pylint: disable-next=protected-access
+                message = C3._get_message(header + await reader.readexactly(size + 3))
+                if not await self._async_handle_request(
+                    client, writer, header[2], message
+                ):
+                    break
+        except asyncio.IncompleteReadError:
+            pass
+        except (ValueError, OSError) as ex:
+            _LOGGER.debug("Proxy client %s failed: %s", peer, ex)
+        finally:
+            del self._clients[client.session_id]
+            self._writers.discard(writer)
+            self.metrics.clients = len(self._clients)
+            writer.close()
+            _LOGGER.debug("Proxy client %s disconnected", peer)
+
+    async def _async_handle_request(
+        self,
+        client: _C3ProxyClient,
+        writer: asyncio.StreamWriter,
+        command: int,
+        message: bytearray,
+    ) -> bool:
+        """Reply to a single request, returns whether the client remains connected."""
+        self.metrics.requests += 1
+        if command in (Command.CONNECT_SESSION, Command.CONNECT_SESSION_LESS):
+            if self.password and not hmac.compare_digest(
+                connect_password(command, message), self.password.encode()
+            ):
+                await self._async_reply_error(client, writer, ERROR_PASSWORD)
+                return True
+            client.connected = True
+            client.session_less = command == Command.CONNECT_SESSION_LESS
+            client.pending.clear()
+            if client.session_less:
+                await self._async_reply(client, writer, b"")
+            else:
+                session = client.session_id.to_bytes(2, "little")
+                await self._async_write(writer, C3_REPLY_OK, session + bytes(2))
+            return True
+
+        if not client.session_less:
+            # Strip the session ID and request number
+            message = message[4:]
+
+        if not client.connected or command in (
+            Command.RTLOG_KEYVALUE,
+            Command.DISCOVER,
+        ):
+            await self._async_reply_error(client, writer, ERROR_COMMAND)
+        elif command == Command.DISCONNECT:
+            await self._async_reply(client, writer, b"")
+            return False
+        elif command == Command.RTLOG_BINARY:
+            await self._async_reply(client, writer, self._rt_log_reply(client))
+        else:
+            await self._async_forward(client, writer, command, bytes(message))
+        return True
+
+    def _rt_log_reply(self, client: _C3ProxyClient) -> bytes:
+        """Return the pending records of a client, followed by the status."""
+        records = [
+            client.pending.popleft()
+            for _ in range(min(len(client.pending), PROXY_RECORDS_PER_REPLY))
+        ]
+        if not client.pending and self._status is not None:
+            records.append(self._status)
+        self.metrics.records_sent += len(records)
+        return b"".join(records)
+
+    async def _async_forward(
+        self,
+        client: _C3ProxyClient,
+        writer: asyncio.StreamWriter,
+        command: int,
+        data: bytes,
+    ) -> None:
+        """Forward a request to the panel, and return its reply to the client."""
+        self.metrics.forwarded += 1
+        priority = C3Priority.CONTROL if command == Command.CONTROL else C3Priority.BULK
+        try:
+            async with asyncio.timeout(PROXY_REQUEST_TIMEOUT):
+                reply = await self._transport.async_forward(command, data, priority)
+        except (asyncio.TimeoutError, ConnectionError, ValueError, OSError) as ex:
+            _LOGGER.debug(
+                "Request %02x of proxy client %s failed: %s", command, client.peer, ex
+            )
+            match = _REPLY_ERROR.match(str(ex))
+            await self._async_reply_error(
+                client, writer, int(match.group(1)) if match else ERROR_COMMAND
+            )
+            return
+
+        await self._async_reply(client, writer, reply)
+        if command == Command.CONTROL and self._command_sent is not None:
+            self._command_sent()
+
+    async def _async_reply(
+        self, client: _C3ProxyClient, writer: asyncio.StreamWriter, data: bytes
+    ) -> None:
+        """Send a reply, prefixed with the session of the client."""
+        if not client.session_less:
+            data = client.session_id.to_bytes(2, "little") + bytes(2) + data
+        await self._async_write(writer, C3_REPLY_OK, data)
+
+    async def _async_reply_error(
+        self, client: _C3ProxyClient, writer: asyncio.StreamWriter, error: int
+    ) -> None:
+        """Send an error reply."""
+        self.metrics.errors += 1
+        await self._async_write(writer, C3_REPLY_ERROR, bytes([error & 0xFF]))
+
+    @staticmethod
+    async def _async_write(
+        writer: asyncio.StreamWriter, reply_command: int, data: bytes
+    ) -> None:
+        """Send a reply frame, waiting while the client is slow to receive."""
+        # pylint: disable-next=protected-access
+        writer.write(C3._construct_message(None, None, reply_command, data))
+        await writer.drain()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the proxy as dictionary."""
+        return {
+            "host": self.host,
+            "port": self.port,
+            "listening": self._server is not None,
+            "pending_records": {
+                client.peer: len(client.pending) for client in self._clients.values()
+            },
+            **self.metrics.as_dict(),
+        }
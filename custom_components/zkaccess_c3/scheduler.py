@@ -0,0 +1,104 @@
+"""Scheduling of the I/O of all C3 panels."""
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+from collections import deque
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DATA_SCHEDULER,
+    DOMAIN,
+    MAX_CONCURRENT_PANEL_IO,
+    SCHEDULER_JITTER,
+    SCHEDULER_METRICS_WINDOW,
+)
+
+
+class C3Scheduler:
+    """Integration wide scheduler of the panel I/O.
+
+    The idle polls of all panels are spread evenly over the poll interval, each
+    panel in its own time slot with a small random jitter. The number of polls
+    that run at the same time is limited, so adding panels does not increase
+    the latency of the others through thread and socket contention. Other panel
+    calls are not limited, a slow connect or table read of one panel must not
+    take a slot needed by the commands of the others.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self._hass = hass
+        self._panels: list[str] = []
+        self.io_limit = asyncio.Semaphore(MAX_CONCURRENT_PANEL_IO)
+        self._io_active = 0
+        self._polls: deque[tuple[float, int]] = deque()
+
+    def register(self, panel_id: str) -> None:
+        """Add a panel to the schedule."""
+        if panel_id not in self._panels:
+            self._panels.append(panel_id)
+
+    def unregister(self, panel_id: str) -> None:
+        """Remove a panel from the schedule."""
+        if panel_id in self._panels:
+            self._panels.remove(panel_id)
+
+    def next_poll_delay(self, panel_id: str, interval: float) -> float:
+        """Return the delay until the next idle poll of a panel, in its time slot."""
+        if panel_id not in self._panels or interval <= 0:
+            return interval
+
+        slot_width = interval / len(self._panels)
+        phase = self._panels.index(panel_id) * slot_width
+        now = self._hass.loop.time()
+        next_poll = (math.floor((now - phase) / interval) + 1) * interval + phase
+        if next_poll - now < interval / 2:
+            # Do not poll twice in quick succession after a fast poll period
+            next_poll += interval
+
+        return next_poll - now + random.uniform(0, SCHEDULER_JITTER * slot_width)
+
+    async def __aenter__(self) -> None:
+        """Wait for a free poll slot."""
+        await self.io_limit.acquire()
+        self._io_active += 1
+
+    async def __aexit__(self, *args: object) -> None:
+        """Release the poll slot."""
+        self._io_active -= 1
+        self.io_limit.release()
+
+    def record_poll(self, events: int) -> None:
+        """Record a completed poll and the number of events it received."""
+        now = self._hass.loop.time()
+        self._polls.append((now, events))
+        while self._polls and self._polls[0][0] < now - SCHEDULER_METRICS_WINDOW:
+            self._polls.popleft()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the aggregate throughput of all panels."""
+        now = self._hass.loop.time()
+        polls = [
+            events
+            for time, events in self._polls
+            if time >= now - SCHEDULER_METRICS_WINDOW
+        ]
+        return {
+            "panels": len(self._panels),
+            "io_active": self._io_active,
+            "io_limit": MAX_CONCURRENT_PANEL_IO,
+            "polls_per_second": round(len(polls) / SCHEDULER_METRICS_WINDOW, 3),
+            "events_per_second": round(sum(polls) / SCHEDULER_METRICS_WINDOW, 3),
+        }
+
+
+def async_get_scheduler(hass: HomeAssistant) -> C3Scheduler:
+    """Return the scheduler of the integration, create it when not available."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_SCHEDULER not in domain_data:
+        domain_data[DATA_SCHEDULER] = C3Scheduler(hass)
+    return domain_data[DATA_SCHEDULER]
@@ -0,0 +1,154 @@
+"""Diagnostic sensor implementation for the C3 panel performance metrics."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DATA_C3_COORDINATOR, DOMAIN
+from .coordinator import C3Coordinator, C3PortType
+
+
+@dataclass
+class C3SensorDescriptionMixin:
+    """Mixin for C3 metric sensors."""
+
+    value_fn: Callable[[C3Coordinator], float | int | None]
+
+
+@dataclass
+class C3SensorDescription(SensorEntityDescription, C3SensorDescriptionMixin):
+    """Class describing C3 metric sensor entities."""
+
+
+SENSOR_TYPES: tuple[C3SensorDescription, ...] = (
+    C3SensorDescription(
+        key="poll_duration",
+        name="Poll duration",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator: coordinator.metrics.poll_duration.last,
+    ),
+    C3SensorDescription(
+        key="records_per_poll",
+        name="Records per poll",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator: coordinator.metrics.records_per_poll.last,
+    ),
+    C3SensorDescription(
+        key="drain_iterations",
+        name="Drain iterations",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator: coordinator.metrics.drain_iterations.last,
+    ),
+    C3SensorDescription(
+        key="loop_blocking",
+        name="Event loop blocking time",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator: coordinator.metrics.loop_blocking.last,
+    ),
+    C3SensorDescription(
+        key="control_latency",
+        name="Control command latency",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator: coordinator.metrics.control_latency.last,
+    ),
+    C3SensorDescription(
+        key="confirmation_latency",
+        name="Command confirmation latency",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator: round(latency * 1000)
+        if (latency := coordinator.commands.metrics.last_latency) is not None
+        else None,
+    ),
+    C3SensorDescription(
+        key="reconnects",
+        name="Reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.metrics.reconnects,
+    ),
+    C3SensorDescription(
+        key="poll_timeouts",
+        name="Poll timeouts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.metrics.timeouts,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the diagnostic sensors based on config_entry."""
+    c3_coordinator = hass.data[DOMAIN][config_entry.entry_id][DATA_C3_COORDINATOR]
+
+    async_add_entities(
+        C3MetricSensorEntity(c3_coordinator, description)
+        for description in SENSOR_TYPES
+    )
+
+
+class C3MetricSensorEntity(CoordinatorEntity, SensorEntity):
+    """Entity representing a performance metric of the C3 panel coordinator.
+
+    The sensors are disabled by default. The state is only written when the
+    value of the metric changed.
+    """
+
+    entity_description: C3SensorDescription
+
+    def __init__(
+        self, coordinator: C3Coordinator, description: C3SensorDescription
+    ) -> None:
+        """Pass coordinator to CoordinatorEntity."""
+        super().__init__(coordinator, context=(C3PortType.DIAGNOSTIC, 0))
+        self._coordinator = coordinator
+        self.entity_description = description
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_entity_registry_enabled_default = False
+        self._attr_native_value = description.value_fn(coordinator)
+        self._last_available: bool | None = None
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, self._coordinator.serial_number)},
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        value = self.entity_description.value_fn(self._coordinator)
+        available = self.available
+        if value != self._attr_native_value or available != self._last_available:
+            self._attr_native_value = value
+            self._last_available = available
+            self.async_write_ha_state()
+
+    @property
+    def should_poll(self) -> bool:
+        """Disable polling, the C3 coordinator polls."""
+        return False
+
+    @property
+    def unique_id(self) -> str | None:
+        """Get unique ID."""
+        return f"{self._coordinator.serial_number}-{self.entity_description.key}"
@@ -0,0 +1,369 @@
+"""Services of the C3 integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from time import monotonic
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.const import ATTR_DEVICE_ID, ATTR_ENTITY_ID
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.entity_component import EntityComponent
+from homeassistant.helpers.json import save_json
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_C3_COORDINATOR, DOMAIN
+from .coordinator import C3Coordinator
+from .lock import C3LockEntity
+from .switch import C3AuxOutEntity
+from .tracing import DEFAULT_TRACE_BUFFER_SIZE, trace_as_chrome_trace, trace_as_json
+from .users import C3User, diff_users
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_COMPARE_USERS = "compare_users"
+SERVICE_CONTROL_OUTPUTS = "control_outputs"
+SERVICE_START_TRACING = "start_tracing"
+SERVICE_STOP_TRACING = "stop_tracing"
+SERVICE_SYNC_USERS = "sync_users"
+SERVICE_EXPORT_TRACE = "export_trace"
+SERVICES = (
+    SERVICE_COMPARE_USERS,
+    SERVICE_CONTROL_OUTPUTS,
+    SERVICE_START_TRACING,
+    SERVICE_STOP_TRACING,
+    SERVICE_SYNC_USERS,
+    SERVICE_EXPORT_TRACE,
+)
+
+ATTR_USERS = "users"
+ATTR_PIN = "pin"
+ATTR_CARD_NO = "card_no"
+ATTR_PASSWORD = "password"
+ATTR_DOORS = "doors"
+ATTR_ACTIVATE = "activate"
+ATTR_DURATION = "duration"
+ATTR_BUFFER_SIZE = "buffer_size"
+ATTR_FORMAT = "format"
+
+TRACE_FORMAT_JSON = "json"
+TRACE_FORMAT_CHROME = "chrome"
+
+COMPARE_USERS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Required(ATTR_USERS): vol.All(
+            cv.ensure_list,
+            [
+                vol.Schema(
+                    {
+                        vol.Required(ATTR_PIN): cv.positive_int,
+                        vol.Optional(ATTR_CARD_NO, default=0): cv.positive_int,
+                        vol.Optional(ATTR_PASSWORD, default=""): cv.string,
+                        vol.Optional(ATTR_DOORS): vol.All(
+                            cv.ensure_list, [vol.All(vol.Coerce(int), vol.Range(1, 4))]
+                        ),
+                    }
+                )
+            ],
+        ),
+    }
+)
+
+SYNC_USERS_SCHEMA = COMPARE_USERS_SCHEMA
+
+CONTROL_OUTPUTS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Optional(ATTR_ACTIVATE, default=True): cv.boolean,
+        vol.Optional(ATTR_DURATION): vol.All(vol.Coerce(int), vol.Range(1, 255)),
+    }
+)
+
+START_TRACING_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_BUFFER_SIZE, default=DEFAULT_TRACE_BUFFER_SIZE): vol.All(
+            vol.Coerce(int), vol.Range(10, 100000)
+        ),
+    }
+)
+
+STOP_TRACING_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+EXPORT_TRACE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_FORMAT, default=TRACE_FORMAT_JSON): vol.In(
+            [TRACE_FORMAT_JSON, TRACE_FORMAT_CHROME]
+        ),
+    }
+)
+
+
+def _get_coordinators(
+    hass: HomeAssistant, device_ids: list[str] | None
+) -> list[C3Coordinator]:
+    """Return the coordinators of the given devices, or of all panels."""
+    coordinators = [
+        entry_data[DATA_C3_COORDINATOR]
+        for entry_data in hass.data.get(DOMAIN, {}).values()
+        if isinstance(entry_data, dict) and DATA_C3_COORDINATOR in entry_data
+    ]
+    if device_ids is not None:
+        coordinators = [
+            coordinator
+            for coordinator in coordinators
+            if coordinator.device_id in device_ids
+        ]
+    if not coordinators:
+        raise HomeAssistantError("No C3 panel found for the selected devices")
+    return coordinators
+
+
+async def _async_sync_panel_users(
+    coordinator: C3Coordinator, users: list[dict[str, Any]], write: bool
+) -> dict[str, Any]:
+    """Compare the users of a single panel with the user list.
+
+    When write is set, the changed users are written to the panel.
+    """
+    target = [
+        C3User.from_service(user, coordinator.panel_info.nr_of_locks) for user in users
+    ]
+    try:
+        table = await coordinator.async_read_users()
+    except (ConnectionError, ValueError) as ex:
+        _LOGGER.error(
+            "Reading the users of %s failed: %s", coordinator.serial_number, ex
+        )
+        return {"error": str(ex)}
+
+    diff = diff_users(table.users, target)
+    _LOGGER.debug(
+        "Read %d user rows from %s in %.2f seconds",
+        table.rows,
+        coordinator.serial_number,
+        table.duration,
+    )
+    result = {
+        **diff.as_dict(),
+        "rows": table.rows,
+        "duration": round(table.duration, 3),
+        "rows_per_second": round(table.rows_per_second, 1),
+    }
+    if not write:
+        return result
+
+    try:
+        upload = await coordinator.async_write_users(diff)
+    except (ConnectionError, ValueError) as ex:
+        _LOGGER.error(
+            "Writing the users of %s failed: %s", coordinator.serial_number, ex
+        )
+        return {**result, "error": str(ex)}
+
+    _LOGGER.debug(
+        "Wrote %d user rows to %s in %.2f seconds",
+        upload.rows,
+        coordinator.serial_number,
+        upload.duration,
+    )
+    return {
+        **result,
+        "written": {
+            "rows": upload.rows,
+            "duration": round(upload.duration, 3),
+            "rows_per_second": round(upload.rows_per_second, 1),
+        },
+    }
+
+
+def _get_output_entity(
+    hass: HomeAssistant, entity_id: str
+) -> C3LockEntity | C3AuxOutEntity | None:
+    """Return the door lock or auxiliary output entity with the entity id."""
+    component: EntityComponent | None = hass.data.get(entity_id.split(".")[0])
+    entity = component.get_entity(entity_id) if component else None
+    return entity if isinstance(entity, C3LockEntity | C3AuxOutEntity) else None
+
+
+async def _async_control_panel_outputs(
+    coordinator: C3Coordinator,
+    entities: list[C3LockEntity | C3AuxOutEntity],
+    activate: bool,
+    duration: int | None,
+) -> dict[str, dict[str, Any]]:
+    """Send the control commands of the outputs of a single panel."""
+    start = monotonic()
+    try:
+        errors = await coordinator.async_control_devices(
+            [entity.output_command(activate, duration) for entity in entities]
+        )
+    except ConnectionError as ex:
+        errors = [ex] * len(entities)
+    latency = round(monotonic() - start, 3)
+
+    results = {}
+    for entity, error in zip(entities, errors):
+        results[entity.entity_id] = {"success": error is None, "latency": latency}
+        if error is not None:
+            _LOGGER.error("Control of %s failed: %s", entity.entity_id, error)
+            results[entity.entity_id]["error"] = str(error)
+    return results
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the C3 integration.
+
+    The services are registered at the setup of the first panel, to not import
+    the coordinator and entity platforms at startup, and removed again by
+    async_unload_services when the last panel is unloaded.
+    """
+    if hass.services.has_service(DOMAIN, SERVICE_COMPARE_USERS):
+        return
+
+    async def _async_sync_users(call: ServiceCall) -> ServiceResponse:
+        """Compare, and for sync_users write, the users of the panels in parallel."""
+        coordinators = _get_coordinators(hass, call.data.get(ATTR_DEVICE_ID))
+        results = await asyncio.gather(
+            *(
+                _async_sync_panel_users(
+                    coordinator,
+                    call.data[ATTR_USERS],
+                    call.service == SERVICE_SYNC_USERS,
+                )
+                for coordinator in coordinators
+            )
+        )
+        return {
+            "panels": {
+                coordinator.serial_number: result
+                for coordinator, result in zip(coordinators, results)
+            }
+        }
+
+    async def _async_control_outputs(call: ServiceCall) -> ServiceResponse:
+        """Control doors and auxiliary outputs, batched per panel."""
+        start = monotonic()
+        panel_entities: dict[
+            C3Coordinator, list[C3LockEntity | C3AuxOutEntity]
+        ] = defaultdict(list)
+        results: dict[str, dict[str, Any]] = {}
+        for entity_id in call.data[ATTR_ENTITY_ID]:
+            if entity := _get_output_entity(hass, entity_id):
+                panel_entities[entity.coordinator].append(entity)
+            else:
+                results[entity_id] = {
+                    "success": False,
+                    "error": "Not a C3 door or auxiliary output",
+                }
+
+        for panel_results in await asyncio.gather(
+            *(
+                _async_control_panel_outputs(
+                    coordinator,
+                    entities,
+                    call.data[ATTR_ACTIVATE],
+                    call.data.get(ATTR_DURATION),
+                )
+                for coordinator, entities in panel_entities.items()
+            )
+        ):
+            results.update(panel_results)
+
+        return {"targets": results, "latency": round(monotonic() - start, 3)}
+
+    async def _async_start_tracing(call: ServiceCall) -> None:
+        """Start tracing the round-trips with the panels."""
+        for coordinator in _get_coordinators(hass, call.data.get(ATTR_DEVICE_ID)):
+            coordinator.tracer.start(call.data[ATTR_BUFFER_SIZE])
+
+    async def _async_stop_tracing(call: ServiceCall) -> None:
+        """Stop tracing the round-trips with the panels."""
+        for coordinator in _get_coordinators(hass, call.data.get(ATTR_DEVICE_ID)):
+            coordinator.tracer.stop()
+
+    async def _async_export_trace(call: ServiceCall) -> ServiceResponse:
+        """Write the traced round-trips to a file in the configuration directory."""
+        panels = {
+            coordinator.serial_number: coordinator.tracer.spans
+            for coordinator in _get_coordinators(hass, call.data.get(ATTR_DEVICE_ID))
+        }
+        if call.data[ATTR_FORMAT] == TRACE_FORMAT_CHROME:
+            trace = trace_as_chrome_trace(panels)
+        else:
+            trace = trace_as_json(panels)
+
+        filename = hass.config.path(
+            f"{DOMAIN}_trace_{dt_util.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        await hass.async_add_executor_job(save_json, filename, trace)
+        _LOGGER.info("Trace written to %s", filename)
+        return {"filename": filename, **trace} if call.return_response else None
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_TRACING,
+        _async_start_tracing,
+        schema=START_TRACING_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_TRACING,
+        _async_stop_tracing,
+        schema=STOP_TRACING_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_TRACE,
+        _async_export_trace,
+        schema=EXPORT_TRACE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CONTROL_OUTPUTS,
+        _async_control_outputs,
+        schema=CONTROL_OUTPUTS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_COMPARE_USERS,
+        _async_sync_users,
+        schema=COMPARE_USERS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SYNC_USERS,
+        _async_sync_users,
+        schema=SYNC_USERS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the services of the C3 integration when no panel is set up."""
+    if any(
+        isinstance(entry_data, dict) and DATA_C3_COORDINATOR in entry_data
+        for entry_data in hass.data.get(DOMAIN, {}).values()
+    ):
+        return
+
+    for service in SERVICES:
+        hass.services.async_remove(DOMAIN, service)
@@ -0,0 +1,187 @@
+"""Persistent storage of C3 panel data."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from c3 import C3
+from c3.consts import DoorSensorType
+from c3.core import C3DoorSettings
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import BACKFILL_CURSOR_SAVE_DELAY, DOMAIN
+
+STORAGE_VERSION = 1
+
+
+@dataclass
+class C3PanelInfo:
+    """Device information and topology of a C3 panel."""
+
+    serial_number: str
+    device_name: str
+    firmware_version: str
+    nr_of_locks: int = 0
+    nr_aux_in: int = 0
+    nr_aux_out: int = 0
+    door_settings: dict[int, C3DoorSettings] = field(default_factory=dict)
+
+    @classmethod
+    def from_panel(
+        cls, panel: C3, door_settings: dict[int, C3DoorSettings]
+    ) -> C3PanelInfo:
+        """Create the panel information from a connected panel."""
+        return cls(
+            serial_number=panel.serial_number,
+            device_name=panel.device_name,
+            firmware_version=panel.firmware_version,
+            nr_of_locks=panel.nr_of_locks,
+            nr_aux_in=panel.nr_aux_in,
+            nr_aux_out=panel.nr_aux_out,
+            door_settings=dict(door_settings),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> C3PanelInfo:
+        """Create the panel information from its stored representation."""
+        return cls(
+            serial_number=data["serial_number"],
+            device_name=data["device_name"],
+            firmware_version=data["firmware_version"],
+            nr_of_locks=data["nr_of_locks"],
+            nr_aux_in=data["nr_aux_in"],
+            nr_aux_out=data["nr_aux_out"],
+            door_settings={
+                int(door_nr): C3DoorSettings(
+                    sensor_type=DoorSensorType(settings["sensor_type"]),
+                    lock_drive_time=settings["lock_drive_time"],
+                    door_alarm_timeout=settings["door_alarm_timeout"],
+                )
+                for door_nr, settings in data["door_settings"].items()
+            },
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the stored representation of the panel information."""
+        return {
+            "serial_number": self.serial_number,
+            "device_name": self.device_name,
+            "firmware_version": self.firmware_version,
+            "nr_of_locks": self.nr_of_locks,
+            "nr_aux_in": self.nr_aux_in,
+            "nr_aux_out": self.nr_aux_out,
+            "door_settings": {
+                str(door_nr): {
+                    "sensor_type": int(settings.sensor_type),
+                    "lock_drive_time": settings.lock_drive_time,
+                    "door_alarm_timeout": settings.door_alarm_timeout,
+                }
+                for door_nr, settings in self.door_settings.items()
+            },
+        }
+
+    def same_layout(self, other: C3PanelInfo) -> bool:
+        """Return whether both panels have the same entities."""
+        return (
+            self.serial_number,
+            self.nr_of_locks,
+            self.nr_aux_in,
+            self.nr_aux_out,
+        ) == (
+            other.serial_number,
+            other.nr_of_locks,
+            other.nr_aux_in,
+            other.nr_aux_out,
+        )
+
+
+# Time (ISO format), door, event type, card number and pin of an event
+C3EventKey = tuple[str, int, int, int, int]
+
+
+@dataclass
+class C3BackfillCursor:
+    """Position in the transaction table up to which events are published.
+
+    The time is the (panel local) time of the most recent published event, or
+    None when no event was published. Multiple events can have the same time,
+    so the keys of the published events at that time are kept as well.
+    """
+
+    time: datetime | None = None
+    keys: set[C3EventKey] = field(default_factory=set)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> C3BackfillCursor:
+        """Create the cursor from its stored representation."""
+        return cls(
+            time=datetime.fromisoformat(data["time"]) if data["time"] else None,
+            keys={tuple(key) for key in data["keys"]},
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the stored representation of the cursor."""
+        return {
+            "time": self.time.isoformat() if self.time else None,
+            "keys": [list(key) for key in sorted(self.keys)],
+        }
+
+    def is_new(self, time: datetime, key: C3EventKey) -> bool:
+        """Return whether an event is located after the cursor."""
+        if self.time is None or time > self.time:
+            return True
+        return time == self.time and key not in self.keys
+
+    def advance(self, time: datetime, key: C3EventKey) -> None:
+        """Move the cursor to include the event."""
+        if self.time is None or time > self.time:
+            self.time = time
+            self.keys = {key}
+        elif time == self.time:
+            self.keys.add(key)
+
+
+class C3PanelStore:
+    """Storage of the data of a single panel (config entry)."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the storage for the config entry."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+        self._data: dict[str, Any] = {}
+
+    async def async_load(self) -> None:
+        """Load the stored data."""
+        self._data = await self._store.async_load() or {}
+
+    @property
+    def panel_info(self) -> C3PanelInfo | None:
+        """Return the stored panel information."""
+        if "panel_info" in self._data:
+            return C3PanelInfo.from_dict(self._data["panel_info"])
+        return None
+
+    async def async_save_panel_info(self, panel_info: C3PanelInfo) -> None:
+        """Store the panel information."""
+        self._data["panel_info"] = panel_info.as_dict()
+        await self._store.async_save(self._data)
+
+    @property
+    def backfill_cursor(self) -> C3BackfillCursor | None:
+        """Return the stored transaction backfill cursor."""
+        if "backfill_cursor" in self._data:
+            return C3BackfillCursor.from_dict(self._data["backfill_cursor"])
+        return None
+
+    @callback
+    def async_schedule_save_backfill_cursor(self, cursor: C3BackfillCursor) -> None:
+        """Store the transaction backfill cursor, delayed to combine updates."""
+        self._data["backfill_cursor"] = cursor.as_dict()
+        self._store.async_delay_save(lambda: self._data, BACKFILL_CURSOR_SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Remove all stored data."""
+        await self._store.async_remove()
@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import logging
-from collections.abc import MutableMapping
 from typing import Any
 
 from c3.consts import ControlOutputAddress, InOutStatus
@@ -16,7 +15,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DATA_C3_COORDINATOR, DOMAIN
-from .coordinator import C3Coordinator
+from .coordinator import C3Coordinator, C3PortType
 
 _LOGGER = logging.getLogger(__name__)
 _ICON_AUX_UNKNOWN = "mdi:unknown"
@@ -56,21 +55,31 @@ class C3AuxOutEntity(CoordinatorEntity, SwitchEntity):
 
     def __init__(self, coordinator: C3Coordinator, idx: int) -> None:
         """Pass coordinator to CoordinatorEntity."""
-        super().__init__(coordinator, context=idx)
+        super().__init__(coordinator, context=(C3PortType.AUX_OUT, idx))
         self._coordinator = coordinator
         self._idx = idx
         self._attr_is_on: bool | None = None
         self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, self._coordinator.c3_panel.serial_number)},
+            identifiers={(DOMAIN, self._coordinator.serial_number)},
         )
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        if self._coordinator.c3_panel.aux_out_status(self._idx) == InOutStatus.OPEN:
+        """Handle updated data from the coordinator.
+
+        While a command is not confirmed by the panel, the expected state is shown.
+        """
+        aux_out_status = self._coordinator.c3_panel.aux_out_status(self._idx)
+        if command := self._coordinator.commands.pending(
+            (C3PortType.AUX_OUT, self._idx)
+        ):
+            self._attr_is_on = command.activate
+        elif aux_out_status == InOutStatus.OPEN:
             self._attr_is_on = True
-        elif self._coordinator.c3_panel.aux_out_status(self._idx) == InOutStatus.CLOSED:
+        elif aux_out_status == InOutStatus.CLOSED:
             self._attr_is_on = False
+        else:
+            self._attr_is_on = None
 
         self.async_write_ha_state()
 
@@ -87,64 +96,60 @@ class C3AuxOutEntity(CoordinatorEntity, SwitchEntity):
     @property
     def unique_id(self) -> str | None:
         """Get unique ID."""
-        return f"{self._coordinator.c3_panel.serial_number}-out{self._idx}"
+        return f"{self._coordinator.serial_number}-out{self._idx}"
 
     @property
     def icon(self) -> str | None:
         """Icon of the entity."""
         return _ICON_AUX_IS_ON[self._attr_is_on]
 
-    def turn_on(self, **kwargs: Any) -> None:
-        """Activate the auxiliary output."""
-        control_command = ControlDeviceOutput(
+    def output_command(
+        self, activate: bool, duration: int | None = None
+    ) -> ControlDeviceOutput:
+        """Return the command to activate or deactivate the auxiliary output."""
+        return ControlDeviceOutput(
             self._idx,
             ControlOutputAddress.AUX_OUTPUT,
-            self._coordinator.aux_on_duration,
+            (duration or self._coordinator.aux_on_duration) if activate else 0,
         )
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Activate the auxiliary output."""
+        control_command = self.output_command(True)
         try:
-            self._coordinator.c3_panel.control_device(control_command)
+            await self._coordinator.async_control_device(control_command)
         except ConnectionError as ex:
             _LOGGER.error("Activate of aux %d failure: %s", self._idx, ex)
 
-    def turn_off(self, **kwargs: Any) -> None:
+    async def async_turn_off(self, **kwargs: Any) -> None:
         """Deactivate the auxiliary output."""
-        control_command = ControlDeviceOutput(
-            self._idx, ControlOutputAddress.AUX_OUTPUT, 0
-        )
+        control_command = self.output_command(False)
         try:
-            self._coordinator.c3_panel.control_device(control_command)
+            await self._coordinator.async_control_device(control_command)
         except ConnectionError as ex:
             _LOGGER.error("Deactivate of aux %d failure: %s", self._idx, ex)
 
 
 class C3AlarmEntity(CoordinatorEntity, SwitchEntity):
-    """Entity representing the C3 panel auxiliary outputs."""
+    """Entity representing the alarm of a C3 panel door.
+
+    The events of the door are available from its event entity.
+    """
 
     def __init__(self, coordinator: C3Coordinator, idx: int) -> None:
         """Pass coordinator to CoordinatorEntity."""
-        super().__init__(coordinator, context=idx)
+        super().__init__(coordinator, context=(C3PortType.DOOR_ALARM, idx))
         self._coordinator = coordinator
         self._idx = idx
         self._attr_is_on: bool | None = None
-        self._attr_extra_state_attributes: MutableMapping[str, Any] = {
-            "last_event_time": None,
-            "last_event": None,
-        }
         self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, self._coordinator.c3_panel.serial_number)},
+            identifiers={(DOMAIN, self._coordinator.serial_number)},
         )
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         self._attr_is_on = self._coordinator.status.has_alarm(self._idx)
-        self._attr_extra_state_attributes[
-            "last_event_time"
-        ] = self._coordinator.last_door_event(self._idx).time_second
-        self._attr_extra_state_attributes["last_event"] = repr(
-            self._coordinator.last_door_event(self._idx).event_type
-        )
-
         self.async_write_ha_state()
 
     @property
@@ -160,23 +165,23 @@ class C3AlarmEntity(CoordinatorEntity, SwitchEntity):
     @property
     def unique_id(self) -> str | None:
         """Get unique ID."""
-        return f"{self._coordinator.c3_panel.serial_number}-alarm{self._idx}"
+        return f"{self._coordinator.serial_number}-alarm{self._idx}"
 
     @property
     def icon(self) -> str | None:
         """Icon of the entity."""
         return _ICON_ALARM_IS_ON[self._attr_is_on]
 
-    def turn_on(self, **kwargs: Any) -> None:
+    async def async_turn_on(self, **kwargs: Any) -> None:
         """Perform no action.
 
         You can't actively turn on an alarm.
         """
 
-    def turn_off(self, **kwargs: Any) -> None:
+    async def async_turn_off(self, **kwargs: Any) -> None:
         """Reset the alarm - all alarms."""
         try:
-            self._coordinator.c3_panel.control_device(ControlDeviceCancelAlarms())
+            await self._coordinator.async_control_device(ControlDeviceCancelAlarms())
             self._attr_is_on = False
         except ConnectionError as ex:
             _LOGGER.error("Cancel alarms failure: %s", ex)
@@ -0,0 +1,184 @@
+"""Opt-in tracing of the round-trips with a C3 panel."""
+from __future__ import annotations
+
+import logging
+from collections import deque
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from time import perf_counter, time
+from typing import Any, TypeVar
+
+from c3 import C3
+
+_T = TypeVar("_T")
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TRACE_BUFFER_SIZE = 1000
+
+
+@dataclass
+class C3TraceSpan:
+    """A single traced panel call.
+
+    The start is a Unix timestamp, durations are in milliseconds. The sizes
+    are the payload bytes of all requests and replies of the call.
+    """
+
+    name: str
+    caller: str
+    start: float
+    wait: float
+    duration: float
+    requests: int
+    sent: int
+    received: int
+    error: str | None = None
+
+
+class C3Tracer:
+    """Bounded buffer of traced calls of a panel.
+
+    While tracing is enabled, the transport passes every panel call through
+    trace(), which runs on the worker thread of the transport. The request and
+    reply sizes are counted by wrapping the request method of the C3 instance,
+    which is restored when tracing is disabled. When disabled, the only cost
+    is the check of enabled per queued call.
+    """
+
+    def __init__(self, panel: C3) -> None:
+        """Initialize a disabled tracer for the panel."""
+        self._panel = panel
+        self._spans: deque[C3TraceSpan] = deque(maxlen=DEFAULT_TRACE_BUFFER_SIZE)
+        self._requests = 0
+        self._sent = 0
+        self._received = 0
+        self.enabled = False
+
+    def start(self, buffer_size: int = DEFAULT_TRACE_BUFFER_SIZE) -> None:
+        """Enable tracing, with an empty buffer of the given size."""
+        self._spans = deque(maxlen=buffer_size)
+        if not self.enabled:
+            send_receive = self._panel._send_receive  # pylint: disable=protected-access
+
+            def _traced_send_receive(
+                command: Any, data: Any = None
+            ) -> tuple[bytearray, int]:
+                message, size = send_receive(command, data)
+                self._requests += 1
+                self._sent += len(data) if data else 0
+                self._received += size
+                return message, size
+
+            # pylint: disable-next=protected-access
+            self._panel._send_receive = _traced_send_receive
+        self.enabled = True
+        _LOGGER.info("Tracing of %s enabled", self._panel.host)
+
+    def stop(self) -> None:
+        """Disable tracing, the traced calls remain available for export."""
+        if self.enabled:
+            # Remove the instance attribute, to restore the method of the class
+            del self._panel._send_receive  # pylint: disable=protected-access
+            self.enabled = False
+            _LOGGER.info("Tracing of %s disabled", self._panel.host)
+
+    def trace(
+        self, caller: str, wait: float, func: Callable[..., _T], *args: Any
+    ) -> _T:
+        """Execute a blocking panel call and add it to the buffer."""
+        self._requests = self._sent = self._received = 0
+        error = None
+        start = time()
+        begin = perf_counter()
+        try:
+            return func(*args)
+        except Exception as ex:
+            error = f"{type(ex).__name__}: {ex}"
+            raise
+        finally:
+            self._spans.append(
+                C3TraceSpan(
+                    name=func.__name__.lstrip("_"),
+                    caller=caller,
+                    start=start,
+                    wait=round(wait * 1000, 3),
+                    duration=round((perf_counter() - begin) * 1000, 3),
+                    requests=self._requests,
+                    sent=self._sent,
+                    received=self._received,
+                    error=error,
+                )
+            )
+
+    @property
+    def spans(self) -> list[C3TraceSpan]:
+        """Return the traced calls, oldest first."""
+        return list(self._spans)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the tracer as dictionary."""
+        return {
+            "enabled": self.enabled,
+            "spans": len(self._spans),
+            "buffer_size": self._spans.maxlen,
+        }
+
+
+def trace_as_json(panels: dict[str, list[C3TraceSpan]]) -> dict[str, Any]:
+    """Return the traced calls by panel serial number."""
+    return {
+        "panels": {
+            serial_number: [asdict(span) for span in spans]
+            for serial_number, spans in panels.items()
+        }
+    }
+
+
+def trace_as_chrome_trace(panels: dict[str, list[C3TraceSpan]]) -> dict[str, Any]:
+    """Return the traced calls in the Chrome trace event format.
+
+    Each panel is a process, and each caller (poll, control, ...) a thread of
+    that process. The trace can be opened in chrome://tracing or Perfetto.
+    """
+    events: list[dict[str, Any]] = []
+    for pid, (serial_number, spans) in enumerate(panels.items(), start=1):
+        events.append(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "args": {"name": serial_number},
+            }
+        )
+        threads: dict[str, int] = {}
+        for span in spans:
+            if (tid := threads.get(span.caller)) is None:
+                tid = threads[span.caller] = len(threads) + 1
+                events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": pid,
+                        "tid": tid,
+                        "args": {"name": span.caller},
+                    }
+                )
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.caller,
+                    "ph": "X",
+                    "pid": pid,
+                    "tid": tid,
+                    "ts": round(span.start * 1_000_000),
+                    "dur": round(span.duration * 1000),
+                    "args": {
+                        "wait_ms": span.wait,
+                        "requests": span.requests,
+                        "sent": span.sent,
+                        "received": span.received,
+                        "error": span.error,
+                    },
+                }
+            )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
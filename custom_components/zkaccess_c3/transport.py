@@ -0,0 +1,535 @@
+"""Asynchronous transport for the communication with a C3 panel."""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AbstractAsyncContextManager, nullcontext
+from dataclasses import dataclass, field
+from enum import IntEnum
+from time import monotonic
+from typing import Any, TypeVar
+
+from c3 import C3, controldevice, rtlog
+from c3.consts import DoorSensorType, EventType, InOutDirection, VerificationMode
+from c3.core import C3DoorSettings
+from c3.utils import C3DateTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DATA_SESSIONS, DOMAIN, SESSION_HANDOFF_TIMEOUT
+from .tracing import C3Tracer
+
+_T = TypeVar("_T")
+_LOGGER = logging.getLogger(__name__)
+
+TRANSACTION_TABLE = "transaction"
+TRANSACTION_FIELDS = [
+    "Cardno",
+    "Pin",
+    "Verified",
+    "DoorID",
+    "EventType",
+    "InOutState",
+    "Time_second",
+]
+
+# Commands to write and delete table rows, which the c3 library does not support
+COMMAND_SETDATA = 0x07
+COMMAND_DELETEDATA = 0x09
+
+
+class C3Priority(IntEnum):
+    """Priority of a panel command, lower values are executed first."""
+
+    CONTROL = 0
+    SESSION = 1
+    POLL = 2
+    BULK = 3
+
+
+@dataclass
+class C3TransportMetrics:
+    """Queue statistics of a panel transport."""
+
+    commands: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    last_wait: float = 0.0
+    max_wait: float = 0.0
+    total_wait: float = 0.0
+
+    @property
+    def average_wait(self) -> float:
+        """Return the average time a command waited in the queue."""
+        return self.total_wait / self.commands if self.commands else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as dictionary."""
+        return {
+            "commands": self.commands,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "last_wait": round(self.last_wait, 4),
+            "max_wait": round(self.max_wait, 4),
+            "average_wait": round(self.average_wait, 4),
+        }
+
+
+@dataclass(order=True)
+class _C3Command:
+    """A queued panel call."""
+
+    priority: int
+    sequence: int
+    func: Callable[..., Any] = field(compare=False)
+    args: tuple[Any, ...] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    queued: float = field(compare=False, default_factory=monotonic)
+
+
+class C3Transport:
+    """Non-blocking access to a single C3 panel.
+
+    The c3 library communicates using a blocking socket. All calls that perform
+    panel I/O are submitted to a priority queue, which is processed by a single
+    owner. The owner executes the calls one by one on a dedicated worker thread,
+    so the event loop never waits on a panel round-trip and request/response
+    frames of polling and control commands never interleave.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        host: str,
+        port: int,
+        password: str,
+        io_limit: AbstractAsyncContextManager | None = None,
+    ) -> None:
+        """Initialize the transport for the panel at the given host and port.
+
+        The optional io_limit is entered for each poll, to limit the number of
+        polls that run at the same time across panels. Control commands, session
+        handshakes and bulk reads are not limited, so slow or unreachable panels
+        never delay the commands of the other panels.
+        """
+        self._hass = hass
+        self._password = password
+        self._io_limit = io_limit or nullcontext()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"C3Transport-{host}"
+        )
+        self._queue: asyncio.PriorityQueue[_C3Command] = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._worker: asyncio.Task | None = None
+        self._closed = False
+        self._running: C3Priority | None = None
+        self.metrics = C3TransportMetrics()
+        self.panel: C3 = C3(host, port)
+        self.tracer = C3Tracer(self.panel)
+
+    async def _async_call(
+        self, priority: C3Priority, func: Callable[..., _T], *args: Any
+    ) -> _T:
+        """Queue a blocking panel call and wait for its result."""
+        if self._closed:
+            raise ConnectionError(f"Transport of C3 {self.panel.host} is closed")
+        if self._worker is None:
+            self._worker = self._hass.async_create_background_task(
+                self._async_process_queue(), f"C3 transport {self.panel.host}"
+            )
+
+        future: asyncio.Future[_T] = self._hass.loop.create_future()
+        self._queue.put_nowait(
+            _C3Command(priority, next(self._sequence), func, args, future)
+        )
+        self.metrics.queue_depth = self._queue.qsize()
+        self.metrics.max_queue_depth = max(
+            self.metrics.max_queue_depth, self.metrics.queue_depth
+        )
+        return await future
+
+    @property
+    def bulk_call_running(self) -> bool:
+        """Return whether a bulk call (e.g. a table read) is executing."""
+        return self._running == C3Priority.BULK
+
+    async def _async_process_queue(self) -> None:
+        """Execute the queued panel calls in order of priority."""
+        while True:
+            command = await self._queue.get()
+            self.metrics.queue_depth = self._queue.qsize()
+            if command.future.done():
+                # The caller is no longer waiting (e.g. timed out)
+                continue
+
+            wait = monotonic() - command.queued
+            self.metrics.commands += 1
+            self.metrics.last_wait = wait
+            self.metrics.max_wait = max(self.metrics.max_wait, wait)
+            self.metrics.total_wait += wait
+
+            func, args = command.func, command.args
+            if self.tracer.enabled:
+                caller = C3Priority(command.priority).name.lower()
+                func, args = self.tracer.trace, (caller, wait, func, *args)
+
+            # The call always runs to completion, also when the caller is cancelled
+            # while waiting, to keep the session consistent for the next command.
+            io_limit = (
+                self._io_limit if command.priority == C3Priority.POLL else nullcontext()
+            )
+            self._running = C3Priority(command.priority)
+            try:
+                async with io_limit:
+                    result = await self._hass.loop.run_in_executor(
+                        self._executor, func, *args
+                    )
+            except asyncio.CancelledError:
+                if not command.future.done():
+                    command.future.set_exception(
+                        ConnectionError(f"Transport of C3 {self.panel.host} closed")
+                    )
+                raise
+            except Exception as ex:  # pylint: disable=broad-except
+                if not command.future.done():
+                    command.future.set_exception(ex)
+            else:
+                if not command.future.done():
+                    command.future.set_result(result)
+            finally:
+                self._running = None
+
+    def is_connected(self) -> bool:
+        """Return whether a session with the panel is established."""
+        return self.panel.is_connected()
+
+    async def async_connect(self) -> bool:
+        """Set up a session with the panel."""
+        return await self._async_call(
+            C3Priority.SESSION, self.panel.connect, self._password
+        )
+
+    async def async_disconnect(self) -> None:
+        """Close the session with the panel."""
+        await self._async_call(C3Priority.SESSION, self.panel.disconnect)
+
+    def _set_address(self, host: str, port: int) -> None:
+        """Close the session, and use the new address for the next session."""
+        self.panel.disconnect()
+        self.panel.host = host
+        self.panel.port = port
+        # Read the device information again at the next connect, another panel
+        # may be found at the new address
+        self.panel._initialized = False  # pylint: disable=protected-access
+
+    async def async_update_connection(
+        self, host: str, port: int, password: str
+    ) -> bool:
+        """Update the connection parameters of the panel.
+
+        The password is only used for the next session handshake, so the current
+        session is kept when the address is unchanged. Otherwise, the session is
+        closed. Returns whether the session was kept.
+        """
+        self._password = password
+        if (host, port) == (self.panel.host, self.panel.port):
+            return True
+
+        await self._async_call(C3Priority.SESSION, self._set_address, host, port)
+        return False
+
+    async def async_get_rt_log(
+        self,
+    ) -> list[rtlog.EventRecord | rtlog.DoorAlarmStatusRecord]:
+        """Retrieve the next batch of realtime log records."""
+        return await self._async_call(C3Priority.POLL, self.panel.get_rt_log)
+
+    async def async_control_device(
+        self, command: controldevice.ControlDeviceBase
+    ) -> None:
+        """Send a control command to the panel."""
+        await self._async_call(C3Priority.CONTROL, self.panel.control_device, command)
+
+    def _control_devices(
+        self, commands: list[controldevice.ControlDeviceBase]
+    ) -> list[Exception | None]:
+        """Send control commands back-to-back, returns the error of each command."""
+        results: list[Exception | None] = []
+        for command in commands:
+            try:
+                self.panel.control_device(command)
+            except (ConnectionError, ValueError) as ex:
+                results.append(ex)
+            else:
+                results.append(None)
+        return results
+
+    async def async_control_devices(
+        self, commands: list[controldevice.ControlDeviceBase]
+    ) -> list[Exception | None]:
+        """Send multiple control commands to the panel, as a single queued call."""
+        return await self._async_call(
+            C3Priority.CONTROL, self._control_devices, commands
+        )
+
+    def _forward(self, command: int, data: bytes) -> bytes:
+        """Send a request in the current session, returns the reply payload."""
+        if not self.panel.is_connected():
+            raise ConnectionError("No connection to C3 panel.")
+        # pylint: disable-next=protected-access
+        message, size = self.panel._send_receive(command, data)
+        return bytes(message[:size])
+
+    async def async_forward(
+        self, command: int, data: bytes, priority: C3Priority = C3Priority.BULK
+    ) -> bytes:
+        """Send a raw request of another client, in the session of the transport.
+
+        Used by the proxy, the request is queued with the calls of the
+        integration, so the request and reply frames never interleave.
+        """
+        return await self._async_call(priority, self._forward, command, data)
+
+    def _read_door_settings(self) -> dict[int, C3DoorSettings]:
+        """Read the settings of all doors with a single parameter request."""
+        door_nrs = range(1, self.panel.nr_of_locks + 1)
+        params = self.panel.get_device_param(
+            [
+                f"Door{door_nr}{param}"
+                for door_nr in door_nrs
+                for param in ("SensorType", "Drivertime", "Detectortime")
+            ]
+        )
+
+        door_settings: dict[int, C3DoorSettings] = {}
+        for door_nr in door_nrs:
+            prefix = f"Door{door_nr}"
+            if f"{prefix}SensorType" in params:
+                door_settings[door_nr] = C3DoorSettings(
+                    sensor_type=DoorSensorType(int(params[f"{prefix}SensorType"])),
+                    lock_drive_time=int(params.get(f"{prefix}Drivertime", 0)),
+                    door_alarm_timeout=int(params.get(f"{prefix}Detectortime", 0)),
+                )
+
+        self.set_door_settings(door_settings)
+        return door_settings
+
+    async def async_read_door_settings(self) -> dict[int, C3DoorSettings]:
+        """Retrieve the settings of all doors with a single parameter request."""
+        return await self._async_call(C3Priority.SESSION, self._read_door_settings)
+
+    def _read_transactions(self) -> list[rtlog.EventRecord]:
+        """Read the stored transaction table, as event records."""
+        records = []
+        for row in self.panel.get_device_data(TRANSACTION_TABLE, TRANSACTION_FIELDS):
+            record = rtlog.EventRecord()
+            record.card_no = row["Cardno"]
+            record.pin = row["Pin"]
+            try:
+                record.verified = VerificationMode(row["Verified"])
+            except ValueError:
+                record.verified = VerificationMode.OTHER
+            record.port_nr = row["DoorID"]
+            try:
+                record.event_type = EventType(row["EventType"])
+            except ValueError:
+                record.event_type = EventType.UNKNOWN_UNSUPPORTED
+            try:
+                record.in_out_state = InOutDirection(row["InOutState"])
+            except ValueError:
+                record.in_out_state = InOutDirection.UNKNOWN_UNSUPPORTED
+            record.time_second = C3DateTime.from_value(row["Time_second"])
+            records.append(record)
+        return records
+
+    async def async_get_transactions(self) -> list[rtlog.EventRecord]:
+        """Retrieve the stored transaction table, oldest transaction first.
+
+        The table is read at the lowest priority, after pending polls and
+        control commands.
+        """
+        return await self._async_call(C3Priority.BULK, self._read_transactions)
+
+    async def async_get_device_data(
+        self, table_name: str, field_names: list[str]
+    ) -> list[dict[str, Any]]:
+        """Retrieve the given fields of all rows of a data table.
+
+        The table is read at the lowest priority, after pending polls and
+        control commands.
+        """
+        return await self._async_call(
+            C3Priority.BULK, self.panel.get_device_data, table_name, field_names
+        )
+
+    def _table_fields(
+        self, table_name: str, field_names: list[str]
+    ) -> tuple[int, list[tuple[int, str]]]:
+        """Return the index of a data table, and the index and type of the fields."""
+        # pylint: disable-next=protected-access
+        cfg = next(
+            (c for c in self.panel._get_device_data_cfg() if c.name == table_name), None
+        )
+        if cfg is None:
+            raise ValueError(f"Table '{table_name}' is not available")
+        fields = {f.name: (f.index, f.type) for f in cfg.fields}
+        if missing := [name for name in field_names if name not in fields]:
+            raise ValueError(f"Fields {missing} are not available in '{table_name}'")
+        return cfg.index, [fields[name] for name in field_names]
+
+    @staticmethod
+    def _encode_rows(
+        table: int, fields: list[tuple[int, str]], rows: list[tuple[Any, ...]]
+    ) -> bytes:
+        """Encode table rows, in the layout of a GETDATA reply.
+
+        The table index, the number of fields and their indexes are followed by
+        the size and value of each field of each row.
+        """
+        data = bytearray([table, len(fields)])
+        data.extend(index for index, _ in fields)
+        for row in rows:
+            for (_, field_type), value in zip(fields, row):
+                encoded = (
+                    str(value).encode("ascii")
+                    if field_type == "s"
+                    else int(value).to_bytes(4, "little")
+                )
+                data.append(len(encoded))
+                data.extend(encoded)
+        return bytes(data)
+
+    def _write_rows(
+        self,
+        command: int,
+        table: int,
+        fields: list[tuple[int, str]],
+        rows: list[tuple[Any, ...]],
+    ) -> int:
+        """Write or delete a batch of table rows with a single request."""
+        self._forward(command, self._encode_rows(table, fields, rows))
+        return len(rows)
+
+    async def _async_write_rows(
+        self,
+        command: int,
+        table_name: str,
+        field_names: list[str],
+        rows: list[tuple[Any, ...]],
+        batch_size: int,
+    ) -> int:
+        """Write or delete table rows in batches, returns the number of rows.
+
+        Each batch is a separate call at the lowest priority, so polls and
+        control commands are executed in between.
+        """
+        if not rows:
+            return 0
+        table, fields = await self._async_call(
+            C3Priority.BULK, self._table_fields, table_name, field_names
+        )
+        for start in range(0, len(rows), batch_size):
+            await self._async_call(
+                C3Priority.BULK,
+                self._write_rows,
+                command,
+                table,
+                fields,
+                rows[start : start + batch_size],
+            )
+        return len(rows)
+
+    async def async_set_device_data(
+        self,
+        table_name: str,
+        field_names: list[str],
+        rows: list[tuple[Any, ...]],
+        batch_size: int,
+    ) -> int:
+        """Add or replace rows of a data table, in batches."""
+        return await self._async_write_rows(
+            COMMAND_SETDATA, table_name, field_names, rows, batch_size
+        )
+
+    async def async_delete_device_data(
+        self,
+        table_name: str,
+        field_names: list[str],
+        rows: list[tuple[Any, ...]],
+        batch_size: int,
+    ) -> int:
+        """Delete the rows of a data table matching the given field values."""
+        return await self._async_write_rows(
+            COMMAND_DELETEDATA, table_name, field_names, rows, batch_size
+        )
+
+    def set_door_settings(self, door_settings: dict[int, C3DoorSettings]) -> None:
+        """Provide the door settings to the library.
+
+        The library uses the door settings when processing RT logs and control
+        commands. When not provided, it reads them from the panel door by door.
+        """
+        # pylint: disable-next=protected-access
+        self.panel._status.door_settings.update(door_settings)
+
+    async def async_close(self) -> None:
+        """Disconnect from the panel and stop processing commands.
+
+        The callers of the calls that are still queued receive a ConnectionError.
+        """
+        if self._closed:
+            return
+        try:
+            await self.async_disconnect()
+        except (ConnectionError, OSError) as ex:
+            _LOGGER.debug("Disconnect from %s failed: %s", self.panel.host, ex)
+
+        self._closed = True
+        while not self._queue.empty():
+            command = self._queue.get_nowait()
+            if not command.future.done():
+                command.future.set_exception(
+                    ConnectionError(f"Transport of C3 {self.panel.host} closed")
+                )
+        self.metrics.queue_depth = 0
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self._executor.shutdown(wait=False)
+
+
+@callback
+def async_store_session(hass: HomeAssistant, transport: C3Transport) -> None:
+    """Keep a connected transport, to be claimed by the coordinator of its panel.
+
+    The config flow validates a panel with a session handshake, which is handed
+    over to the coordinator of the created entry. The transport is closed when
+    it is not claimed in time, so an unused session is never left open.
+    """
+    key = (transport.panel.host, transport.panel.port)
+    sessions: dict[tuple[str, int], C3Transport] = hass.data.setdefault(
+        DOMAIN, {}
+    ).setdefault(DATA_SESSIONS, {})
+    if (previous := sessions.pop(key, None)) is not None:
+        hass.async_create_task(previous.async_close())
+    sessions[key] = transport
+
+    @callback
+    def _async_expire(_: Any) -> None:
+        if sessions.get(key) is transport:
+            del sessions[key]
+            _LOGGER.debug("Closing unclaimed session with %s", key[0])
+            hass.async_create_task(transport.async_close())
+
+    async_call_later(hass, SESSION_HANDOFF_TIMEOUT, _async_expire)
+
+
+@callback
+def async_claim_session(
+    hass: HomeAssistant, host: str, port: int
+) -> C3Transport | None:
+    """Return the stored transport of the panel at the address, if any."""
+    return hass.data.get(DOMAIN, {}).get(DATA_SESSIONS, {}).pop((host, port), None)
@@ -0,0 +1,174 @@
+"""Synchronization of the users (cards and PINs) of a C3 panel with a user list."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any
+
+from .const import USERS_WRITE_BATCH_SIZE
+from .transport import C3Transport
+
+USER_TABLE = "user"
+USER_FIELDS = ["CardNo", "Pin", "Password"]
+USER_AUTHORIZE_TABLE = "userauthorize"
+USER_AUTHORIZE_FIELDS = ["Pin", "AuthorizeDoorId"]
+USER_AUTHORIZE_WRITE_FIELDS = ["Pin", "AuthorizeTimezoneId", "AuthorizeDoorId"]
+# The default time zone of the panel, access is allowed at any time
+USER_AUTHORIZE_TIMEZONE = 1
+
+
+@dataclass(frozen=True)
+class C3User:
+    """A user of the panel, with the doors it is authorized for."""
+
+    pin: int
+    card_no: int = 0
+    password: str = ""
+    # Bit mask of the authorized doors, door 1 is bit 0
+    doors: int = 0
+
+    @classmethod
+    def from_service(cls, data: Mapping[str, Any], nr_of_locks: int) -> C3User:
+        """Create the user from the service call data.
+
+        Without doors, the user is authorized for all doors of the panel.
+        """
+        doors = data.get("doors")
+        return cls(
+            pin=data["pin"],
+            card_no=data["card_no"],
+            password=data["password"],
+            doors=sum(1 << (door - 1) for door in set(doors))
+            if doors is not None
+            else (1 << nr_of_locks) - 1,
+        )
+
+
+@dataclass
+class C3UserDiff:
+    """Changes that bring the users of a panel in line with a user list."""
+
+    added: list[C3User] = field(default_factory=list)
+    changed: list[C3User] = field(default_factory=list)
+    removed: list[C3User] = field(default_factory=list)
+    unchanged: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the PINs of the users to add, change and remove."""
+        return {
+            "added": [user.pin for user in self.added],
+            "changed": [user.pin for user in self.changed],
+            "removed": [user.pin for user in self.removed],
+            "unchanged": self.unchanged,
+        }
+
+
+def diff_users(current: Mapping[int, C3User], target: Iterable[C3User]) -> C3UserDiff:
+    """Compare the current users of a panel, by PIN, with the target users."""
+    diff = C3UserDiff()
+    remaining = dict(current)
+    for user in target:
+        existing = remaining.pop(user.pin, None)
+        if existing is None:
+            diff.added.append(user)
+        elif existing != user:
+            diff.changed.append(user)
+        else:
+            diff.unchanged += 1
+    diff.removed.extend(remaining.values())
+    return diff
+
+
+@dataclass
+class C3UserTable:
+    """The users read from a panel, with the read statistics."""
+
+    users: dict[int, C3User]
+    rows: int
+    duration: float
+
+    @property
+    def rows_per_second(self) -> float:
+        """Return the number of table rows read per second."""
+        return self.rows / self.duration if self.duration else 0.0
+
+
+@dataclass
+class C3UserUpload:
+    """The rows written to a panel, with the write statistics."""
+
+    rows: int
+    duration: float
+
+    @property
+    def rows_per_second(self) -> float:
+        """Return the number of table rows written per second."""
+        return self.rows / self.duration if self.duration else 0.0
+
+
+async def async_read_users(transport: C3Transport) -> C3UserTable:
+    """Read the user and user authorization tables of a panel."""
+    start = monotonic()
+    user_rows = await transport.async_get_device_data(USER_TABLE, USER_FIELDS)
+    authorize_rows = await transport.async_get_device_data(
+        USER_AUTHORIZE_TABLE, USER_AUTHORIZE_FIELDS
+    )
+    duration = monotonic() - start
+
+    doors: dict[int, int] = {}
+    for row in authorize_rows:
+        doors[row["Pin"]] = doors.get(row["Pin"], 0) | row["AuthorizeDoorId"]
+
+    return C3UserTable(
+        users={
+            row["Pin"]: C3User(
+                pin=row["Pin"],
+                card_no=row["CardNo"],
+                password=row["Password"],
+                doors=doors.get(row["Pin"], 0),
+            )
+            for row in user_rows
+        },
+        rows=len(user_rows) + len(authorize_rows),
+        duration=duration,
+    )
+
+
+async def async_write_users(
+    transport: C3Transport, diff: C3UserDiff, batch_size: int = USERS_WRITE_BATCH_SIZE
+) -> C3UserUpload:
+    """Write only the changed users to the panel, in batches.
+
+    The authorizations of changed and removed users are deleted, the removed
+    users are deleted, and the added and changed users are written with their
+    new authorizations.
+    """
+    start = monotonic()
+    written = [*diff.added, *diff.changed]
+    rows = await transport.async_delete_device_data(
+        USER_AUTHORIZE_TABLE,
+        ["Pin"],
+        [(user.pin,) for user in (*diff.changed, *diff.removed)],
+        batch_size,
+    )
+    rows += await transport.async_delete_device_data(
+        USER_TABLE, ["Pin"], [(user.pin,) for user in diff.removed], batch_size
+    )
+    rows += await transport.async_set_device_data(
+        USER_TABLE,
+        USER_FIELDS,
+        [(user.card_no, user.pin, user.password) for user in written],
+        batch_size,
+    )
+    rows += await transport.async_set_device_data(
+        USER_AUTHORIZE_TABLE,
+        USER_AUTHORIZE_WRITE_FIELDS,
+        [
+            (user.pin, USER_AUTHORIZE_TIMEZONE, user.doors)
+            for user in written
+            if user.doors
+        ],
+        batch_size,
+    )
+    return C3UserUpload(rows=rows, duration=monotonic() - start)
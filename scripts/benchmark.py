@@ -0,0 +1,712 @@
+"""Benchmark of the C3 integration against simulated panels.
+
+For each number of panels, a Home Assistant instance is started with a config
+entry per simulated panel. During the run, events are generated at the given
+rate and control commands are sent periodically. Reported are the poll latency,
+the event throughput, the control command round-trip time and the time the
+event loop was blocked.
+
+With --startup, the startup of the integration is measured instead: the time
+to import the integration in a fresh interpreter, the time until the config
+entries are set up, and the time until their first refresh completed. Both for
+the first setup and for a reload, which uses the stored panel information. The
+benchmark fails when the import or setup time exceeds its budget.
+
+With --recorder, the recorder is set up with a SQLite database, and the
+number of state and attribute rows written for the entities of the
+integration is reported, extrapolated to an hour.
+
+With --discovery, the network discovery is run against a simulated discovery
+responder on the loopback interface, sending the request from several sockets
+so each panel replies more than once. The benchmark fails when a panel is not
+found, or is reported more than once.
+
+Usage (from the repository root):
+    scripts/benchmark --panels 1 10 50 --duration 30 --latency 0.01
+    scripts/benchmark --startup --panels 1 10 --import-budget 25
+    scripts/benchmark --recorder --panels 5 --duration 120 --event-rate 1
+    scripts/benchmark --discovery --panels 1 50 --interfaces 3
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from c3.consts import ControlOutputAddress
+from c3.controldevice import ControlDeviceOutput
+from c3_simulator import SimulatedPanel, SimulatedPanelConfig, start_discovery_responder
+from homeassistant import bootstrap, config_entries, loader
+from homeassistant.components.recorder import get_instance
+from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT, CONF_SCAN_INTERVAL
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.recorder import async_initialize_recorder
+from homeassistant.setup import async_setup_component
+
+from custom_components.zkaccess_c3.const import DATA_C3_COORDINATOR, DOMAIN
+from custom_components.zkaccess_c3.coordinator import C3Coordinator
+from custom_components.zkaccess_c3.discovery import async_discover_panels
+
+_LOGGER = logging.getLogger(__name__)
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that should only be imported when a panel is set up
+_DEFERRED_MODULES = (
+    "c3",
+    f"custom_components.{DOMAIN}.coordinator",
+    "homeassistant.components.network",
+)
+_IMPORT_SCRIPT = f"""
+import sys
+import time
+
+import homeassistant.config_entries
+import homeassistant.helpers.config_validation
+
+loaded = set(sys.modules)
+start = time.perf_counter()
+import custom_components.{DOMAIN}
+
+print((time.perf_counter() - start) * 1000)
+print(" ".join(
+    module
+    for module in {_DEFERRED_MODULES!r}
+    if module in sys.modules and module not in loaded
+))
+"""
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of a single benchmark run."""
+
+    panels: int
+    duration: float
+    polls: int = 0
+    poll_failures: int = 0
+    poll_p50_ms: float = 0.0
+    poll_p95_ms: float = 0.0
+    events: int = 0
+    events_per_second: float = 0.0
+    event_backlog: int = 0
+    controls: int = 0
+    control_p50_ms: float = 0.0
+    control_p95_ms: float = 0.0
+    loop_block_max_ms: float = 0.0
+    loop_block_p99_ms: float = 0.0
+
+
+@dataclass
+class StartupResult:
+    """Measurements of a single startup benchmark run, in milliseconds."""
+
+    panels: int
+    import_ms: float
+    setup_ms: float
+    first_refresh_ms: float
+    reload_ms: float
+    reload_refresh_ms: float
+    eager_imports: str
+
+
+@dataclass
+class RecorderResult:
+    """Recorder rows written for the entities of the integration, per hour."""
+
+    panels: int
+    duration: float
+    events: int
+    state_rows_per_hour: int
+    attribute_rows_per_hour: int
+    attribute_kb_per_hour: float
+    state_kb_per_hour: float
+
+
+@dataclass
+class DiscoveryResult:
+    """Measurements of a single discovery benchmark run."""
+
+    panels: int
+    interfaces: int
+    replies: int
+    devices: int
+    duplicates: int
+    missing: int
+    first_reply_ms: float
+    last_reply_ms: float
+
+
+@dataclass
+class _Samples:
+    """Raw samples collected during a run."""
+
+    polls: list[float] = field(default_factory=list)
+    poll_failures: int = 0
+    controls: list[float] = field(default_factory=list)
+    loop_lag: list[float] = field(default_factory=list)
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    """Return the percentile of the values, in milliseconds."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(len(ordered) * percentile / 100), len(ordered) - 1)
+    return round(ordered[index] * 1000, 2)
+
+
+def _instrument_coordinator(samples: _Samples) -> Callable[[], None]:
+    """Measure the duration of each coordinator poll, returns the undo function."""
+    update_data = C3Coordinator._async_update_data
+
+    async def _async_timed_update_data(self: C3Coordinator):
+        start = time.perf_counter()
+        try:
+            return await update_data(self)
+        except Exception:
+            samples.poll_failures += 1
+            raise
+        finally:
+            samples.polls.append(time.perf_counter() - start)
+
+    def _restore() -> None:
+        C3Coordinator._async_update_data = update_data
+
+    C3Coordinator._async_update_data = _async_timed_update_data
+    return _restore
+
+
+async def _async_monitor_loop(samples: _Samples, interval: float = 0.005) -> None:
+    """Measure how late the event loop wakes up a sleeping task."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.loop_lag.append(max(loop.time() - expected, 0.0))
+
+
+async def _async_send_controls(
+    coordinator: C3Coordinator, samples: _Samples, interval: float, offset: float
+) -> None:
+    """Periodically activate an auxiliary output and measure the round-trip."""
+    await asyncio.sleep(offset)
+    while True:
+        start = time.perf_counter()
+        try:
+            await coordinator.async_control_device(
+                ControlDeviceOutput(1, ControlOutputAddress.AUX_OUTPUT, 1)
+            )
+        except ConnectionError:
+            pass
+        else:
+            samples.controls.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+
+
+async def _async_setup_hass(config_dir: Path) -> HomeAssistant:
+    """Start a minimal Home Assistant instance, with the integration available."""
+    (config_dir / "custom_components").symlink_to(_REPO_ROOT / "custom_components")
+    hass = HomeAssistant(str(config_dir))
+    hass.config.skip_pip = True
+    loader.async_setup(hass)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await bootstrap.load_registries(hass)
+    await async_setup_component(hass, "homeassistant", {})
+    await hass.async_start()
+    return hass
+
+
+def _measure_import(runs: int = 5) -> tuple[float, list[str]]:
+    """Import the integration in fresh interpreters, returns the fastest time.
+
+    Also returns the deferred modules that were imported by the integration.
+    """
+    times = []
+    eager_imports: list[str] = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_SCRIPT],
+            capture_output=True,
+            check=True,
+            cwd=_REPO_ROOT,
+            text=True,
+        ).stdout.splitlines()
+        times.append(float(output[0]))
+        eager_imports = output[1].split() if len(output) > 1 else []
+    return round(min(times), 2), eager_imports
+
+
+async def _async_wait_refreshed(hass: HomeAssistant, timeout: float = 60) -> None:
+    """Wait until the first refresh of all coordinators completed."""
+    end = time.perf_counter() + timeout
+    while time.perf_counter() < end:
+        if all(
+            hass.data[DOMAIN][entry.entry_id][DATA_C3_COORDINATOR].last_update_success
+            for entry in hass.config_entries.async_entries(DOMAIN)
+        ):
+            return
+        await asyncio.sleep(0.005)
+    raise TimeoutError("The first refresh did not complete")
+
+
+async def async_run_startup(
+    args: argparse.Namespace, nr_of_panels: int
+) -> StartupResult:
+    """Measure the import, setup and reload time for the given number of panels."""
+    import_ms, eager_imports = _measure_import()
+    panels = [
+        SimulatedPanel(
+            SimulatedPanelConfig(
+                nr_of_locks=args.locks,
+                nr_aux_in=args.locks,
+                nr_aux_out=args.locks,
+                serial_number=f"SIM{nr:07d}",
+                latency=args.latency,
+                event_rate=0,
+            )
+        )
+        for nr in range(nr_of_panels)
+    ]
+    for panel in panels:
+        await panel.start()
+        panel.add_events(args.burst)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await _async_setup_hass(Path(config_dir))
+        start = time.perf_counter()
+        for nr, panel in enumerate(panels):
+            await hass.config_entries.async_add(
+                config_entries.ConfigEntry(
+                    version=1,
+                    domain=DOMAIN,
+                    title=f"Panel {nr}",
+                    data={
+                        CONF_HOST: "127.0.0.1",
+                        CONF_PORT: panel.port,
+                        CONF_NAME: f"Panel {nr}",
+                    },
+                    source=config_entries.SOURCE_USER,
+                )
+            )
+        await hass.async_block_till_done()
+        setup = time.perf_counter() - start
+        await _async_wait_refreshed(hass)
+        first_refresh = time.perf_counter() - start
+
+        # A reload sets up the entries from the stored panel information
+        for panel in panels:
+            panel.add_events(args.burst)
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                hass.config_entries.async_reload(entry.entry_id)
+                for entry in hass.config_entries.async_entries(DOMAIN)
+            )
+        )
+        await hass.async_block_till_done()
+        reload = time.perf_counter() - start
+        await _async_wait_refreshed(hass)
+        reload_refresh = time.perf_counter() - start
+        await hass.async_stop()
+
+    for panel in panels:
+        await panel.stop()
+
+    return StartupResult(
+        panels=nr_of_panels,
+        import_ms=import_ms,
+        setup_ms=round(setup * 1000, 1),
+        first_refresh_ms=round(first_refresh * 1000, 1),
+        reload_ms=round(reload * 1000, 1),
+        reload_refresh_ms=round(reload_refresh * 1000, 1),
+        eager_imports=",".join(eager_imports) or "-",
+    )
+
+
+def _check_budget(args: argparse.Namespace, results: list[StartupResult]) -> bool:
+    """Return whether all startup results are within the budget."""
+    within_budget = True
+    for result in results:
+        if result.import_ms > args.import_budget:
+            _LOGGER.error(
+                "Import took %.1f ms, the budget is %.1f ms",
+                result.import_ms,
+                args.import_budget,
+            )
+            within_budget = False
+        if result.eager_imports != "-":
+            _LOGGER.error("Imported at startup: %s", result.eager_imports)
+            within_budget = False
+        setup_ms = max(result.setup_ms, result.reload_ms) / result.panels
+        if setup_ms > args.setup_budget:
+            _LOGGER.error(
+                "Setup took %.1f ms per panel, the budget is %.1f ms",
+                setup_ms,
+                args.setup_budget,
+            )
+            within_budget = False
+    return within_budget
+
+
+def _check_discovery(results: list[DiscoveryResult]) -> bool:
+    """Return whether each discovery found every panel exactly once."""
+    found_all = True
+    for result in results:
+        if result.missing or result.duplicates:
+            _LOGGER.error(
+                "Discovery of %d panel(s) missed %d and reported %d more than once",
+                result.panels,
+                result.missing,
+                result.duplicates,
+            )
+            found_all = False
+    return found_all
+
+
+async def async_run_discovery(
+    args: argparse.Namespace, nr_of_panels: int
+) -> DiscoveryResult:
+    """Discover the given number of panels through a simulated responder."""
+    panels = [
+        SimulatedPanel(SimulatedPanelConfig(serial_number=f"SIM{nr:07d}"))
+        for nr in range(nr_of_panels)
+    ]
+    transport, responder = await start_discovery_responder(panels)
+    target = transport.get_extra_info("sockname")[:2]
+    reported: list[tuple[float, str | None]] = []
+
+    # Each socket receives a reply of every panel, which must be reported once
+    start = time.perf_counter()
+    try:
+        devices = await async_discover_panels(
+            ["127.0.0.1"] * args.interfaces,
+            lambda device_info: reported.append(
+                (time.perf_counter() - start, device_info.serial_number)
+            ),
+            args.discovery_timeout,
+            target,
+        )
+    finally:
+        transport.close()
+
+    serial_numbers = [serial_number for _, serial_number in reported]
+    expected = {panel.config.serial_number for panel in panels}
+    return DiscoveryResult(
+        panels=nr_of_panels,
+        interfaces=args.interfaces,
+        replies=responder.requests * nr_of_panels,
+        devices=len(devices),
+        duplicates=len(serial_numbers) - len(set(serial_numbers)),
+        missing=len(expected - set(serial_numbers)),
+        first_reply_ms=round(min((t for t, _ in reported), default=0.0) * 1000, 2),
+        last_reply_ms=round(max((t for t, _ in reported), default=0.0) * 1000, 2),
+    )
+
+
+def _count_recorder_rows(
+    database: Path, entity_ids: list[str]
+) -> tuple[int, int, int, int]:
+    """Return the state rows, attribute rows and their sizes of the entities."""
+    connection = sqlite3.connect(database)
+    try:
+        placeholders = ",".join("?" * len(entity_ids))
+        states = f"""
+            SELECT states.state_id, states.state, states.attributes_id
+            FROM states JOIN states_meta USING (metadata_id)
+            WHERE states_meta.entity_id IN ({placeholders})
+        """
+        state_rows, state_bytes = connection.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(LENGTH(state)), 0) FROM ({states})",
+            entity_ids,
+        ).fetchone()
+        attribute_rows, attribute_bytes = connection.execute(
+            f"""
+            SELECT COUNT(*), COALESCE(SUM(LENGTH(shared_attrs)), 0)
+            FROM state_attributes
+            WHERE attributes_id IN (SELECT attributes_id FROM ({states}))
+            """,
+            entity_ids,
+        ).fetchone()
+    finally:
+        connection.close()
+    return state_rows, state_bytes, attribute_rows, attribute_bytes
+
+
+async def async_run_recorder(
+    args: argparse.Namespace, nr_of_panels: int
+) -> RecorderResult:
+    """Measure the recorder rows written for the given number of panels."""
+    panels = [
+        SimulatedPanel(
+            SimulatedPanelConfig(
+                nr_of_locks=args.locks,
+                nr_aux_in=args.locks,
+                nr_aux_out=args.locks,
+                serial_number=f"SIM{nr:07d}",
+                latency=args.latency,
+                event_rate=args.event_rate,
+            )
+        )
+        for nr in range(nr_of_panels)
+    ]
+    for panel in panels:
+        await panel.start()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        database = Path(config_dir) / "recorder.db"
+        hass = await _async_setup_hass(Path(config_dir))
+        async_initialize_recorder(hass)
+        await async_setup_component(
+            hass,
+            "recorder",
+            {"recorder": {"db_url": f"sqlite:///{database}", "commit_interval": 1}},
+        )
+        for nr, panel in enumerate(panels):
+            await hass.config_entries.async_add(
+                config_entries.ConfigEntry(
+                    version=1,
+                    domain=DOMAIN,
+                    title=f"Panel {nr}",
+                    data={
+                        CONF_HOST: "127.0.0.1",
+                        CONF_PORT: panel.port,
+                        CONF_NAME: f"Panel {nr}",
+                    },
+                    source=config_entries.SOURCE_USER,
+                    options={CONF_SCAN_INTERVAL: args.scan_interval},
+                )
+            )
+        await hass.async_block_till_done()
+        await asyncio.sleep(args.scan_interval)
+
+        # Only count the rows written after the setup
+        entity_registry = er.async_get(hass)
+        entity_ids = [
+            entity.entity_id
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            for entity in er.async_entries_for_config_entry(
+                entity_registry, entry.entry_id
+            )
+        ]
+        recorder = get_instance(hass)
+        await recorder.async_block_till_done()
+        before = await hass.async_add_executor_job(
+            _count_recorder_rows, database, entity_ids
+        )
+        events_before = sum(panel.state.events_sent for panel in panels)
+
+        start = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        duration = time.perf_counter() - start
+
+        events = sum(panel.state.events_sent for panel in panels) - events_before
+        await recorder.async_block_till_done()
+        after = await hass.async_add_executor_job(
+            _count_recorder_rows, database, entity_ids
+        )
+        await hass.async_stop()
+
+    for panel in panels:
+        await panel.stop()
+
+    state_rows, state_bytes, attribute_rows, attribute_bytes = (
+        (value_after - value_before) * 3600 / duration
+        for value_before, value_after in zip(before, after)
+    )
+    return RecorderResult(
+        panels=nr_of_panels,
+        duration=round(duration, 1),
+        events=events,
+        state_rows_per_hour=round(state_rows),
+        attribute_rows_per_hour=round(attribute_rows),
+        attribute_kb_per_hour=round(attribute_bytes / 1024, 1),
+        state_kb_per_hour=round(state_bytes / 1024, 1),
+    )
+
+
+async def async_run(args: argparse.Namespace, nr_of_panels: int) -> BenchmarkResult:
+    """Run the benchmark for the given number of panels."""
+    samples = _Samples()
+    panels = [
+        SimulatedPanel(
+            SimulatedPanelConfig(
+                nr_of_locks=args.locks,
+                nr_aux_in=args.locks,
+                nr_aux_out=args.locks,
+                serial_number=f"SIM{nr:07d}",
+                latency=args.latency,
+                packet_loss=args.loss,
+                event_rate=args.event_rate,
+            )
+        )
+        for nr in range(nr_of_panels)
+    ]
+    for panel in panels:
+        await panel.start()
+
+    restore = _instrument_coordinator(samples)
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await _async_setup_hass(Path(config_dir))
+        for nr, panel in enumerate(panels):
+            await hass.config_entries.async_add(
+                config_entries.ConfigEntry(
+                    version=1,
+                    domain=DOMAIN,
+                    title=f"Panel {nr}",
+                    data={
+                        CONF_HOST: "127.0.0.1",
+                        CONF_PORT: panel.port,
+                        CONF_NAME: f"Panel {nr}",
+                    },
+                    source=config_entries.SOURCE_USER,
+                    options={CONF_SCAN_INTERVAL: args.scan_interval},
+                )
+            )
+        await hass.async_block_till_done()
+
+        # Measure the steady state only, not the setup
+        samples.polls.clear()
+        events_before = sum(panel.state.events_sent for panel in panels)
+        for panel in panels:
+            panel.add_events(args.burst)
+
+        tasks = [asyncio.create_task(_async_monitor_loop(samples))]
+        for nr, entry in enumerate(hass.config_entries.async_entries(DOMAIN)):
+            coordinator = hass.data[DOMAIN][entry.entry_id][DATA_C3_COORDINATOR]
+            tasks.append(
+                asyncio.create_task(
+                    _async_send_controls(
+                        coordinator,
+                        samples,
+                        args.control_interval,
+                        args.control_interval * nr / nr_of_panels,
+                    )
+                )
+            )
+
+        start = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        duration = time.perf_counter() - start
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        events = sum(panel.state.events_sent for panel in panels) - events_before
+        backlog = sum(len(panel.state.pending_events) for panel in panels)
+        await hass.async_stop()
+
+    restore()
+    for panel in panels:
+        await panel.stop()
+
+    return BenchmarkResult(
+        panels=nr_of_panels,
+        duration=round(duration, 1),
+        polls=len(samples.polls),
+        poll_failures=samples.poll_failures,
+        poll_p50_ms=_percentile(samples.polls, 50),
+        poll_p95_ms=_percentile(samples.polls, 95),
+        events=events,
+        events_per_second=round(events / duration, 1),
+        event_backlog=backlog,
+        controls=len(samples.controls),
+        control_p50_ms=_percentile(samples.controls, 50),
+        control_p95_ms=_percentile(samples.controls, 95),
+        loop_block_max_ms=round(max(samples.loop_lag, default=0.0) * 1000, 2),
+        loop_block_p99_ms=_percentile(samples.loop_lag, 99),
+    )
+
+
+def _write_table(
+    results: list[BenchmarkResult]
+    | list[StartupResult]
+    | list[RecorderResult]
+    | list[DiscoveryResult],
+) -> None:
+    """Write the results as a table to stdout."""
+    columns = list(asdict(results[0]))
+    widths = [
+        max(len(column), *(len(str(getattr(result, column))) for result in results))
+        for column in columns
+    ]
+    lines = [
+        "  ".join(column.rjust(width) for column, width in zip(columns, widths)),
+        *(
+            "  ".join(
+                str(getattr(result, column)).rjust(width)
+                for column, width in zip(columns, widths)
+            )
+            for result in results
+        ),
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+async def _main() -> int:
+    """Run the benchmark for all requested numbers of panels."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--panels", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--duration", type=float, default=30, help="seconds per run")
+    parser.add_argument("--scan-interval", type=int, default=15)
+    parser.add_argument("--locks", type=int, default=4, help="doors/aux per panel")
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="request loss ratio")
+    parser.add_argument("--event-rate", type=float, default=0.2, help="per panel")
+    parser.add_argument("--burst", type=int, default=0, help="events at start")
+    parser.add_argument("--control-interval", type=float, default=5, help="seconds")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument("--startup", action="store_true", help="measure the startup")
+    parser.add_argument("--import-budget", type=float, default=25, help="ms")
+    parser.add_argument("--setup-budget", type=float, default=250, help="ms/panel")
+    parser.add_argument("--recorder", action="store_true", help="count DB rows")
+    parser.add_argument("--discovery", action="store_true", help="discover panels")
+    parser.add_argument("--interfaces", type=int, default=2, help="discovery sockets")
+    parser.add_argument("--discovery-timeout", type=float, default=1, help="seconds")
+    args = parser.parse_args()
+
+    results: (
+        list[BenchmarkResult]
+        | list[StartupResult]
+        | list[RecorderResult]
+        | list[DiscoveryResult]
+    ) = []
+    for nr_of_panels in args.panels:
+        _LOGGER.info("Running benchmark with %d panel(s)", nr_of_panels)
+        if args.startup:
+            results.append(await async_run_startup(args, nr_of_panels))
+        elif args.recorder:
+            results.append(await async_run_recorder(args, nr_of_panels))
+        elif args.discovery:
+            results.append(await async_run_discovery(args, nr_of_panels))
+        else:
+            results.append(await async_run(args, nr_of_panels))
+
+    _write_table(results)
+    if args.json:
+        args.json.write_text(json.dumps([asdict(result) for result in results]))
+    if args.startup and not _check_budget(args, results):
+        return 1
+    if args.discovery and not _check_discovery(results):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    _LOGGER.setLevel(logging.INFO)
+    logging.getLogger("homeassistant.loader").setLevel(logging.ERROR)
+    sys.exit(asyncio.run(_main()))
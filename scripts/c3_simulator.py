@@ -0,0 +1,482 @@
+"""Simulated C3/inBio panels, speaking the C3 protocol as used by the c3 library.
+
+The simulator serves the TCP protocol (session connect/disconnect, RT log,
+control commands, parameter reads, the user and transaction tables, and
+writing and deleting user rows) and
+the UDP discovery protocol. The
+latency, packet loss, event rate and number of doors and auxiliaries of each
+panel are configurable, and bursts of events can be queued at any time.
+
+Run standalone to serve panels to a Home Assistant instance, e.g.:
+    python3 scripts/c3_simulator.py --count 4 --event-rate 0.5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import socket
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from c3 import consts, crc, utils
+from c3.utils import C3DateTime
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class SimulatedPanelConfig:
+    """Behaviour of a simulated panel."""
+
+    nr_of_locks: int = 4
+    nr_aux_in: int = 4
+    nr_aux_out: int = 4
+    serial_number: str = "SIM0000001"
+    latency: float = 0.0
+    packet_loss: float = 0.0
+    event_rate: float = 0.0
+    records_per_reply: int = 4
+    max_transactions: int = 2000
+
+
+@dataclass
+class SimulatedPanelState:
+    """Mutable state of a simulated panel."""
+
+    alarm_status: bytearray = field(default_factory=lambda: bytearray(4))
+    dss_status: bytearray = field(default_factory=lambda: bytearray([1, 1, 1, 1]))
+    aux_out_status: bytearray = field(default_factory=lambda: bytearray(4))
+    pending_events: list[bytes] = field(default_factory=list)
+    transactions: list[bytes] = field(default_factory=list)
+    users: list[tuple[int, int, str]] = field(default_factory=list)
+    authorizations: list[tuple[int, int, int]] = field(default_factory=list)
+    control_commands: list[bytes] = field(default_factory=list)
+    events_sent: int = 0
+    requests: int = 0
+    commands: Counter = field(default_factory=Counter)
+
+
+def _frame(command: int, payload: bytes) -> bytes:
+    """Return a complete C3 message, including start/end markers and checksum."""
+    message = bytearray(
+        [
+            consts.C3_PROTOCOL_VERSION,
+            command,
+            utils.lsb(len(payload)),
+            utils.msb(len(payload)),
+        ]
+    )
+    message.extend(payload)
+    checksum = crc.crc16(message)
+    message.append(utils.lsb(checksum))
+    message.append(utils.msb(checksum))
+    return (
+        bytes([consts.C3_MESSAGE_START])
+        + bytes(message)
+        + bytes([consts.C3_MESSAGE_END])
+    )
+
+
+def _time_value() -> int:
+    """Return the current time, encoded as C3 timestamp."""
+    now = time.localtime()
+    return C3DateTime(
+        now.tm_year, now.tm_mon, now.tm_mday, now.tm_hour, now.tm_min, now.tm_sec
+    ).to_value()
+
+
+# Name, index and fields (name, type and index) of the data tables
+_USER_TABLE = ("user", 1, (("CardNo", "i", 1), ("Pin", "i", 2), ("Password", "s", 3)))
+_USER_AUTHORIZE_TABLE = (
+    "userauthorize",
+    2,
+    (("Pin", "i", 1), ("AuthorizeTimezoneId", "i", 2), ("AuthorizeDoorId", "i", 3)),
+)
+_TRANSACTION_TABLE = (
+    "transaction",
+    5,
+    (
+        ("Cardno", "i", 1),
+        ("Pin", "i", 2),
+        ("Verified", "i", 3),
+        ("DoorID", "i", 4),
+        ("EventType", "i", 5),
+        ("InOutState", "i", 6),
+        ("Time_second", "i", 7),
+    ),
+)
+_TABLES = (_USER_TABLE, _USER_AUTHORIZE_TABLE, _TRANSACTION_TABLE)
+# Commands to write and delete table rows, not defined by the c3 library
+_SETDATA = 0x07
+_DELETEDATA = 0x09
+
+
+def event_record(
+    door: int, event_type: int, card_no: int = 0, pin: int = 0, verified: int = 4
+) -> bytes:
+    """Build a binary realtime event record."""
+    return (
+        card_no.to_bytes(4, "little")
+        + pin.to_bytes(4, "little")
+        + bytes([verified, door, event_type, 0])
+        + _time_value().to_bytes(4, "little")
+    )
+
+
+class SimulatedPanel:
+    """A single simulated panel, serving one TCP port."""
+
+    def __init__(self, config: SimulatedPanelConfig | None = None) -> None:
+        """Initialize the panel."""
+        self.config = config or SimulatedPanelConfig()
+        self.state = SimulatedPanelState()
+        self._server: asyncio.AbstractServer | None = None
+        self._clients: set[asyncio.StreamWriter] = set()
+        self._session_id = random.randint(0x0100, 0xFFF0)
+        self._event_task: asyncio.Task | None = None
+
+    @property
+    def port(self) -> int:
+        """Return the TCP port the panel listens on."""
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Start serving."""
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        if self.config.event_rate > 0:
+            self._event_task = asyncio.create_task(self._generate_events())
+
+    async def stop(self) -> None:
+        """Stop serving and drop all client connections."""
+        if self._event_task:
+            self._event_task.cancel()
+            self._event_task = None
+        if self._server:
+            self._server.close()
+            for writer in list(self._clients):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def add_events(self, count: int, door: int = 1, event_type: int = 0) -> None:
+        """Queue a burst of events."""
+        for nr in range(count):
+            self._add_event(event_record(door, event_type, card_no=1000 + nr, pin=nr))
+
+    def add_offline_events(
+        self, count: int, door: int = 1, event_type: int = 0
+    ) -> None:
+        """Record events in the transaction table only, as during an outage."""
+        for nr in range(count):
+            self._store_transaction(
+                event_record(door, event_type, card_no=2000 + nr, pin=nr)
+            )
+
+    def _add_event(self, record: bytes) -> None:
+        """Queue an event in the RT log and record it as transaction."""
+        self.state.pending_events.append(record)
+        self._store_transaction(record)
+
+    def _store_transaction(self, record: bytes) -> None:
+        """Record an event in the transaction table, dropping the oldest."""
+        self.state.transactions.append(record)
+        del self.state.transactions[: -self.config.max_transactions]
+
+    async def _generate_events(self) -> None:
+        """Queue events at the configured rate."""
+        while True:
+            await asyncio.sleep(random.expovariate(self.config.event_rate))
+            self.add_events(1, door=random.randint(1, max(self.config.nr_of_locks, 1)))
+
+    def _status_record(self) -> bytes:
+        """Return the door/alarm status record."""
+        return (
+            bytes(self.state.alarm_status)
+            + bytes(self.state.dss_status)
+            + bytes([0, 0, consts.EventType.DOOR_ALARM_STATUS, 0])
+            + _time_value().to_bytes(4, "little")
+        )
+
+    def _params(self, names: list[str]) -> bytes:
+        """Return the requested device parameters."""
+        values = {
+            "~SerialNumber": self.config.serial_number,
+            "FirmVer": "AC Ver 4.7.8.3033",
+            "DeviceName": "C3-SIM",
+            "LockCount": str(self.config.nr_of_locks),
+            "AuxInCount": str(self.config.nr_aux_in),
+            "AuxOutCount": str(self.config.nr_aux_out),
+        }
+        for door in range(1, self.config.nr_of_locks + 1):
+            values[f"Door{door}SensorType"] = "0"
+            values[f"Door{door}Drivertime"] = "5"
+            values[f"Door{door}Detectortime"] = "15"
+        return ",".join(
+            f"{name}={values[name]}" for name in names if name in values
+        ).encode("ascii")
+
+    def _control(self, data: bytes) -> None:
+        """Apply a control command."""
+        self.state.control_commands.append(data)
+        if data[0] == consts.ControlOperation.OUTPUT:
+            port, address, duration = data[1], data[2], data[3]
+            if address == consts.ControlOutputAddress.DOOR_OUTPUT:
+                self.state.dss_status[port - 1] = 2 if duration else 1
+                event_type = (
+                    consts.EventType.REMOTE_OPENING
+                    if duration
+                    else consts.EventType.REMOTE_CLOSING
+                )
+            else:
+                self.state.aux_out_status[port - 1] = 1 if duration else 0
+                event_type = (
+                    consts.EventType.OPEN_AUX_OUTPUT
+                    if duration
+                    else consts.EventType.CLOSE_AUX_OUTPUT
+                )
+            self._add_event(event_record(port, event_type, verified=200))
+        elif data[0] == consts.ControlOperation.CANCEL_ALARM:
+            self.state.alarm_status = bytearray(4)
+
+    def _table_config(self) -> bytes:
+        """Return the configuration of the data tables."""
+        return b"\n".join(
+            ",".join(
+                [f"{name}={index}"]
+                + [f"{field}={kind}{nr}" for field, kind, nr in fields]
+            ).encode("ascii")
+            for name, index, fields in _TABLES
+        )
+
+    def _table_rows(self, table_index: int) -> list[tuple]:
+        """Return the rows of a data table, with values in order of the fields."""
+        if table_index == _USER_TABLE[1]:
+            return self.state.users
+        if table_index == _USER_AUTHORIZE_TABLE[1]:
+            return self.state.authorizations
+        if table_index == _TRANSACTION_TABLE[1]:
+            return [
+                (
+                    int.from_bytes(record[0:4], "little"),
+                    int.from_bytes(record[4:8], "little"),
+                    *record[8:12],
+                    int.from_bytes(record[12:16], "little"),
+                )
+                for record in self.state.transactions
+            ]
+        return []
+
+    def _table_data(self, data: bytes) -> bytes:
+        """Return the requested fields of all rows of a data table."""
+        table = next((table for table in _TABLES if table[1] == data[0]), None)
+        if table is None:
+            return bytes([data[0], 0])
+
+        requested = set(data[2 : 2 + data[1]])
+        columns = [
+            (column, kind, nr)
+            for column, (_, kind, nr) in enumerate(table[2])
+            if nr in requested
+        ]
+        reply = bytearray([table[1], len(columns)])
+        reply.extend(nr for _, _, nr in columns)
+        for row in self._table_rows(table[1]):
+            for column, kind, _ in columns:
+                value = (
+                    row[column].encode("ascii")
+                    if kind == "s"
+                    else row[column].to_bytes(4, "little")
+                )
+                reply.append(len(value))
+                reply.extend(value)
+        return bytes(reply)
+
+    def _write_table(self, command: int, data: bytes) -> bytes:
+        """Add, replace (by PIN) or delete rows of the user tables."""
+        table = next((table for table in _TABLES if table[1] == data[0]), None)
+        if table is None or table is _TRANSACTION_TABLE:
+            return b""
+
+        columns = {nr: (column, kind) for column, (_, kind, nr) in enumerate(table[2])}
+        fields = [columns[nr] for nr in data[2 : 2 + data[1]]]
+        rows = self._table_rows(table[1])
+        pin_column = next(
+            column for column, (name, _, _) in enumerate(table[2]) if name == "Pin"
+        )
+        payload = data[2 + data[1] :]
+        while payload:
+            values: dict[int, int | str] = {}
+            for column, kind in fields:
+                value = payload[1 : 1 + payload[0]]
+                payload = payload[1 + payload[0] :]
+                values[column] = (
+                    value.decode("ascii")
+                    if kind == "s"
+                    else int.from_bytes(value, "little")
+                )
+            if command == _DELETEDATA:
+                rows[:] = [
+                    row
+                    for row in rows
+                    if any(row[column] != value for column, value in values.items())
+                ]
+            else:
+                rows[:] = [row for row in rows if row[pin_column] != values[pin_column]]
+                rows.append(
+                    tuple(
+                        values.get(column, "" if kind == "s" else 0)
+                        for column, (_, kind, _) in enumerate(table[2])
+                    )
+                )
+        return b""
+
+    def _reply(self, command: int, data: bytes) -> bytes:
+        """Return the reply payload to a request."""
+        if command == consts.Command.CONNECT_SESSION:
+            return self._session_id.to_bytes(2, "little") + bytes(2)
+        if command == consts.Command.GETPARAM:
+            return self._params(data.decode("ascii").split(","))
+        if command == consts.Command.RTLOG_BINARY:
+            count = self.config.records_per_reply
+            records = self.state.pending_events[:count]
+            del self.state.pending_events[:count]
+            self.state.events_sent += len(records)
+            if len(records) < count:
+                records.append(self._status_record())
+            return b"".join(records)
+        if command == consts.Command.CONTROL:
+            self._control(data)
+        if command == consts.Command.DATATABLE_CFG:
+            return self._table_config()
+        if command == consts.Command.GETDATA:
+            return self._table_data(data)
+        if command in (_SETDATA, _DELETEDATA):
+            return self._write_table(command, data)
+        return b""
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve the requests of a single client connection."""
+        self._clients.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(5)
+                size = header[3] + header[4] * 256
+                body = await reader.readexactly(size + 3)
+                command = header[2]
+                session = command != consts.Command.CONNECT_SESSION and size >= 4
+                data = bytes(body[4:size] if session else body[:size])
+                self.state.requests += 1
+                self.state.commands[command] += 1
+                if random.random() < self.config.packet_loss:
+                    continue
+                if self.config.latency:
+                    await asyncio.sleep(self.config.latency)
+                payload = self._reply(command, data)
+                if command != consts.Command.CONNECT_SESSION:
+                    payload = (
+                        self._session_id.to_bytes(2, "little") + bytes(2) + payload
+                    )
+                writer.write(_frame(consts.C3_REPLY_OK, payload))
+                await writer.drain()
+                if command == consts.Command.DISCONNECT:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+
+class SimulatedDiscoveryResponder(asyncio.DatagramProtocol):
+    """Reply to C3 discovery broadcasts on behalf of simulated panels."""
+
+    def __init__(self, panels: list[SimulatedPanel], host: str) -> None:
+        """Initialize the responder, reporting the panels at the given host."""
+        self.panels = panels
+        self.host = host
+        self.requests = 0
+        self._transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """Store the transport."""
+        self._transport = transport
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        """Reply to a discovery request with the information of each panel."""
+        if len(data) < 5 or data[2] != consts.Command.DISCOVER:
+            return
+        self.requests += 1
+        for nr, panel in enumerate(self.panels):
+            info = (
+                f"MAC=00:17:61:00:{nr // 256:02x}:{nr % 256:02x},IP={self.host},"
+                f"SN={panel.config.serial_number},Device=C3-SIM,"
+                "Ver=AC Ver 4.7.8.3033"
+            )
+            self._transport.sendto(
+                _frame(consts.C3_REPLY_OK, info.encode("ascii")), addr
+            )
+
+
+async def start_discovery_responder(
+    panels: list[SimulatedPanel], host: str = "127.0.0.1", port: int = 0
+) -> tuple[asyncio.DatagramTransport, SimulatedDiscoveryResponder]:
+    """Start a UDP discovery responder for the panels."""
+    loop = asyncio.get_running_loop()
+    advertised_host = (
+        socket.gethostbyname(socket.gethostname()) if host == "0.0.0.0" else host
+    )
+    return await loop.create_datagram_endpoint(
+        lambda: SimulatedDiscoveryResponder(panels, advertised_host),
+        local_addr=(host, port),
+        allow_broadcast=True,
+    )
+
+
+async def _main() -> None:
+    """Serve simulated panels until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=consts.C3_PORT_DEFAULT)
+    parser.add_argument("--count", type=int, default=1, help="number of panels")
+    parser.add_argument("--locks", type=int, default=4)
+    parser.add_argument("--aux-in", type=int, default=4)
+    parser.add_argument("--aux-out", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--loss", type=float, default=0.0)
+    parser.add_argument("--event-rate", type=float, default=0.0)
+    parser.add_argument("--discovery", action="store_true")
+    args = parser.parse_args()
+
+    panels = []
+    for nr in range(args.count):
+        panel = SimulatedPanel(
+            SimulatedPanelConfig(
+                nr_of_locks=args.locks,
+                nr_aux_in=args.aux_in,
+                nr_aux_out=args.aux_out,
+                serial_number=f"SIM{nr:07d}",
+                latency=args.latency,
+                packet_loss=args.loss,
+                event_rate=args.event_rate,
+            )
+        )
+        await panel.start(args.host, args.port + nr)
+        _LOGGER.info(
+            "Simulated panel %s on port %d", panel.config.serial_number, panel.port
+        )
+        panels.append(panel)
+
+    if args.discovery:
+        await start_discovery_responder(panels, args.host, consts.C3_PORT_BROADCAST)
+
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())